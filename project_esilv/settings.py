@@ -50,6 +50,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tests.replica.ReadYourWritesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,14 +78,66 @@ WSGI_APPLICATION = 'project_esilv.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/2.0/ref/settings/#databases
+# SQLite by default. For a server database, set DATABASE_ENGINE (django.db.backends.postgresql,
+# django.db.backends.mysql) and DATABASE_NAME, DATABASE_USER, DATABASE_PASSWORD, DATABASE_HOST, DATABASE_PORT.
+# DATABASE_CONN_MAX_AGE is the number of seconds a connection is kept between requests (0 : a new connection per request).
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ENGINE': os.environ.get('DATABASE_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.environ.get('DATABASE_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'USER': os.environ.get('DATABASE_USER', ''),
+        'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+        'HOST': os.environ.get('DATABASE_HOST', ''),
+        'PORT': os.environ.get('DATABASE_PORT', ''),
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', '60')),
     }
 }
 
+# Read-only replica of the default database, read by the reporting views (see tests/replica.py).
+# Set DATABASE_REPLICA_NAME, and DATABASE_REPLICA_ENGINE, DATABASE_REPLICA_USER, ... like the default database.
+# After a write, the reads of a user stay on the default database for TESTS_REPLICA_PIN_SECONDS (longer than the lag of the replica).
+# The tests add their own stand-in replica (see tests/tests.py).
+
+TESTS_REPORTING_DATABASE = None
+
+if os.environ.get('DATABASE_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        'ENGINE': os.environ.get('DATABASE_REPLICA_ENGINE', DATABASES['default']['ENGINE']),
+        'NAME': os.environ['DATABASE_REPLICA_NAME'],
+        'USER': os.environ.get('DATABASE_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DATABASE_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.environ.get('DATABASE_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.environ.get('DATABASE_REPLICA_PORT', DATABASES['default']['PORT']),
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+    }
+    TESTS_REPORTING_DATABASE = 'replica'
+
+TESTS_REPLICA_PIN_SECONDS = int(os.environ.get('TESTS_REPLICA_PIN_SECONDS', '10'))
+
+DATABASE_ROUTERS = ['tests.replica.ReportingRouter']
+
+# Cache shared by the processes of the server (web workers and grade_submissions): rendered pass pages,
+# answer keys, lists of the available tests... The versions of the cached objects are in the database (see tests/caches.py).
+# A file cache by default; set CACHE_BACKEND (django.core.cache.backends.memcached.MemcachedCache for example) and CACHE_LOCATION
+# for a cache shared by several machines.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')),
+    }
+}
+
+# Pragmas applied to each new SQLite connection (see tests/db_tuning.py): WAL journal,
+# wait up to SQLITE_BUSY_TIMEOUT milliseconds for the lock, sync the journal at the checkpoints only.
+
+TESTS_SQLITE_PRAGMAS = [
+    ('busy_timeout', int(os.environ.get('SQLITE_BUSY_TIMEOUT', '20000'))),
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.0/ref/settings/#auth-password-validators
@@ -129,3 +182,10 @@ STATIC_URL = '/pages/static/'
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
+
+
+# Grading of the submitted tests
+# When True, the pass page only records the answers and the marks are computed by
+# "python manage.py grade_submissions" running next to the web server.
+
+TESTS_ASYNC_GRADING = os.environ.get('TESTS_ASYNC_GRADING', '0') == '1'
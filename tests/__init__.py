@@ -1 +1 @@
-
+default_app_config = 'tests.apps.TestsEndSessionConfig'
@@ -1,16 +1,20 @@
 from django.contrib import admin
 from .models import (
 	DynMCQInfo,
+	DynMCQTest_Question,
 	DynMCQquestion,
 	DynMCQanswer,
 	Pass_DynMCQTest,
 	Pass_DynMCQTest_Info,
 	Dynquestion,
 	Pass_DynquestionTest,
+	Test_Statistics,
+	Question_Statistics,
     )
 
 # Register your models here.
 admin.site.register(DynMCQInfo)
+admin.site.register(DynMCQTest_Question)
 admin.site.register(DynMCQquestion)
 admin.site.register(DynMCQanswer)
 admin.site.register(Pass_DynMCQTest)
@@ -18,3 +22,5 @@ admin.site.register(Pass_DynMCQTest_Info)
 admin.site.register(Dynquestion)
 admin.site.register(Pass_DynquestionTest)
 
+admin.site.register(Test_Statistics)
+admin.site.register(Question_Statistics)
@@ -0,0 +1,133 @@
+import json
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DynMCQTest_Question,Grading_Job,Pass_DynMCQTest,Pass_DynMCQTest_Info,Pass_DynquestionTest,Question_Statistics,Test_Statistics
+from .answer_keys import get_answer_key
+from .caches import get_test_version
+from .replica import read_primary
+
+
+def record_submission(id_test, mark, right_questions):
+	"""Function to add a graded submission to the statistics of its test
+	Must be called in the transaction saving the mark, so that a submission is counted once.
+	If the statistics of the test have never been built, nothing is done : they will be built from the database at the first reading.
+	Parameter :
+		id_test (str) : id of the test
+		mark (int) : mark of the submission
+		right_questions (list) : (q_type, q_num) of the questions rightly answered
+	"""
+	with transaction.atomic():
+		#The update locks the row before the histogram is read
+		if Test_Statistics.objects.filter(id_test = id_test).update(nb_attempts = F('nb_attempts') + 1, marks_sum = F('marks_sum') + mark, revision = F('revision') + 1, updated = timezone.now()) == 0:
+			return
+		histogram = json.loads(Test_Statistics.objects.filter(id_test = id_test).values_list('marks_histogram', flat=True).get())
+		histogram[str(mark)] = histogram.get(str(mark), 0) + 1
+		Test_Statistics.objects.filter(id_test = id_test).update(marks_histogram = json.dumps(histogram))
+		for q_type in (DynMCQTest_Question.MCQ, DynMCQTest_Question.NORMAL):
+			q_nums = [q_num for right_type, q_num in right_questions if right_type == q_type]
+			if q_nums:
+				Question_Statistics.objects.filter(id_test = id_test, q_type = q_type, q_num__in = q_nums).update(nb_right = F('nb_right') + 1)
+
+#The statistics are saved and the answer key cached : they are read from the default database, not from a late replica
+@read_primary()
+def rebuild_statistics(DynMCQTestInfo):
+	"""Function to build the statistics of a test from the stored submissions
+	Used the first time the statistics are read and when the questions or the answer key of the test change.
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+	Return :
+		stats (Test_Statistics instance) : statistics of the test
+	"""
+	id_test = DynMCQTestInfo.id_test
+	version = get_test_version(id_test)
+	answer_key = get_answer_key(DynMCQTestInfo)
+	#The row exists before the submissions are read, so that the submissions graded meanwhile wait for its lock in record_submission
+	Test_Statistics.objects.get_or_create(id_test = id_test)
+
+	with transaction.atomic():
+		#The update locks the row until the statistics are written : a submission graded during the rebuild is either read here
+		#or added by record_submission after the commit, never lost
+		Test_Statistics.objects.filter(id_test = id_test).update(updated = timezone.now())
+
+		#Submissions still waiting in the grading queue are counted when they are graded
+		pending = set(Grading_Job.objects.filter(id_test = id_test).exclude(status = Grading_Job.DONE).values_list('id_student', 'attempt'))
+		marks = {}
+		for id_student, attempt, mark in Pass_DynMCQTest_Info.objects.filter(id_test = id_test, mark__isnull = False).values_list('id_student', 'attempt', 'mark'):
+			if (id_student, attempt) not in pending:
+				marks[(id_student, attempt)] = mark
+
+		#Only the attempts with answers have been submitted
+		submitted = set()
+		nb_right = {}
+		for q_type, q_num in DynMCQTest_Question.objects.filter(test = DynMCQTestInfo).values_list('q_type', 'q_num'):
+			nb_right[(q_type, q_num)] = 0
+		for id_student, attempt, q_num, r_ans in Pass_DynMCQTest.objects.filter(id_test = id_test).values_list('id_student', 'attempt', 'q_num', 'r_ans').iterator():
+			if (id_student, attempt) in marks:
+				submitted.add((id_student, attempt))
+				for question in answer_key.right_questions([(q_num, r_ans)]):
+					if question in nb_right:
+						nb_right[question] += 1
+		#The answers to a normal question are graded together
+		normal_answers = {}
+		for id_student, attempt, q_num, r_answer in Pass_DynquestionTest.objects.filter(id_test = id_test).values_list('id_student', 'attempt', 'q_num', 'r_answer').iterator():
+			if (id_student, attempt) in marks:
+				submitted.add((id_student, attempt))
+				normal_answers.setdefault(int(q_num), []).append(r_answer)
+		for q_num, r_answers in normal_answers.items():
+			if (DynMCQTest_Question.NORMAL, q_num) in nb_right:
+				nb_right[(DynMCQTest_Question.NORMAL, q_num)] += sum(answer_key.check_normal_many(q_num, r_answers))
+
+		histogram = {}
+		marks_sum = 0
+		for attempt in submitted:
+			mark = marks[attempt]
+			histogram[str(mark)] = histogram.get(str(mark), 0) + 1
+			marks_sum += mark
+
+		#A new revision, the marks may have changed without a change of version (see regrading.py)
+		Test_Statistics.objects.filter(id_test = id_test).update(
+			nb_attempts = len(submitted),
+			marks_sum = marks_sum,
+			marks_histogram = json.dumps(histogram),
+			version = str(version),
+			revision = F('revision') + 1,
+			updated = timezone.now(),
+		)
+		Question_Statistics.objects.filter(id_test = id_test).delete()
+		Question_Statistics.objects.bulk_create([Question_Statistics(id_test = id_test, q_type = q_type, q_num = q_num, nb_right = count) for (q_type, q_num), count in nb_right.items()])
+	return Test_Statistics.objects.get(id_test = id_test)
+
+def get_current_statistics(id_test):
+	"""Function to get the statistics of a test if they are up to date, without building them
+	Parameter :
+		id_test (str) : id of the test
+	Return :
+		stats (Test_Statistics instance) : None if the statistics are missing or built for a previous version of the test
+	"""
+	stats = Test_Statistics.objects.filter(id_test = id_test).first()
+	if stats is None or stats.version != str(get_test_version(id_test)):
+		return None
+	return stats
+
+def get_statistics(DynMCQTestInfo):
+	"""Function to read the statistics of a test, built from the database if they are missing or out of date
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+	Return :
+		stats (Test_Statistics instance) : statistics of the test
+		stats_question (list) : number of right answers for each question, in the order of the test
+	"""
+	stats = get_current_statistics(DynMCQTestInfo.id_test)
+	if stats is None:
+		stats = rebuild_statistics(DynMCQTestInfo)
+	nb_right = {}
+	for q_type, q_num, count in Question_Statistics.objects.filter(id_test = DynMCQTestInfo.id_test).values_list('q_type', 'q_num', 'nb_right'):
+		nb_right[(q_type, q_num)] = count
+	stats_question = []
+	for q_type, q_num in DynMCQTestInfo.test_questions.order_by('position').values_list('q_type', 'q_num'):
+		stats_question.append(nb_right.get((q_type, q_num), 0))
+	return stats, stats_question
+
@@ -0,0 +1,113 @@
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import DynMCQanswer,DynMCQTest_Question,Dynquestion
+from .caches import LRUCache,get_test_version
+from .backend_code import AnswerGrader
+
+#Answer keys of the last used tests, for the current process
+ANSWER_KEYS = LRUCache(getattr(settings, 'TESTS_ANSWER_KEY_CACHE_SIZE', 256))
+
+#Timeout of the answer keys in the shared Django cache (they are invalidated by version anyway)
+ANSWER_KEY_TIMEOUT = getattr(settings, 'TESTS_ANSWER_KEY_TIMEOUT', 24 * 3600)
+
+
+class AnswerKey(object):
+	"""Compiled answer key of a test, grading a submission with no query :
+
+	Attributes :
+
+	mcq (dict) : q_num -> frozenset of the ans_num of the right answers of the MCQ question
+	normal (dict) : q_num -> AnswerGrader of the normal question (case insensitive, the words are aligned on the expected answer)
+
+	Function linked to the class :
+
+	check_mcq : returns True if the answer of a MCQ question is right
+	check_normal : returns True if the answer of a normal question is right
+	check_normal_many : returns for each answer of a list to a normal question if it is right
+	right_questions : returns the questions rightly answered in a whole submission
+	grade : returns the mark of a whole submission
+	"""
+	def __init__(self, mcq, normal):
+		self.mcq = mcq
+		self.normal = normal
+
+	def check_mcq(self, q_num, r_ans):
+		"""r_ans is the stored answer of the student (['1', '3'] or "[1],[3]")"""
+		right_answers = self.mcq.get(int(q_num))
+		if right_answers is None:
+			return False
+		return frozenset(int(ans_num) for ans_num in re.findall(r'\d+', str(r_ans))) == right_answers
+
+	def check_normal(self, q_num, r_answer):
+		grader = self.normal.get(int(q_num))
+		if grader is None:
+			return False
+		return grader.is_right(r_answer)
+
+	def check_normal_many(self, q_num, r_answers):
+		"""r_answers is a list of answers to the same question, graded in one call"""
+		grader = self.normal.get(int(q_num))
+		if grader is None:
+			return [False] * len(r_answers)
+		return [diff <= grader.tolerance for diff in grader.grade_many(r_answers)]
+
+	def right_questions(self, mcq_answers=(), normal_answers=()):
+		"""mcq_answers and normal_answers are iterables of (q_num, answer), returns a list of (q_type, q_num)"""
+		right_questions = []
+		for q_num, r_ans in mcq_answers:
+			if self.check_mcq(q_num, r_ans):
+				right_questions.append((DynMCQTest_Question.MCQ, int(q_num)))
+		for q_num, r_answer in normal_answers:
+			if self.check_normal(q_num, r_answer):
+				right_questions.append((DynMCQTest_Question.NORMAL, int(q_num)))
+		return right_questions
+
+	def grade(self, mcq_answers=(), normal_answers=()):
+		"""mcq_answers and normal_answers are iterables of (q_num, answer)"""
+		return len(self.right_questions(mcq_answers, normal_answers))
+
+def compile_answer_key(DynMCQTestInfo):
+	"""Function to build the answer key of a test from the database
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+	Return :
+		(AnswerKey) : answer key of the test
+	"""
+	mcq_questions, normal_questions = DynMCQTestInfo.get_question_ids()
+	right_answers = {}
+	for q_num in mcq_questions:
+		right_answers[q_num] = set()
+	if mcq_questions:
+		for q_num, ans_num in DynMCQanswer.objects.filter(q_num__in = mcq_questions, right_ans = 1).values_list('q_num', 'ans_num'):
+			right_answers[q_num].add(ans_num)
+	normal = {}
+	if normal_questions:
+		for q_num, r_text in Dynquestion.objects.filter(q_num__in = normal_questions).values_list('q_num', 'r_text'):
+			normal[q_num] = AnswerGrader(str(r_text), case_sensitive = False)
+	mcq = {q_num: frozenset(ans_nums) for q_num, ans_nums in right_answers.items()}
+	return AnswerKey(mcq, normal)
+
+def get_answer_key(DynMCQTestInfo):
+	"""Function to get the answer key of a test :
+	First from the cache of the process, then from the shared Django cache and finally from the database.
+	The key is rebuilt when the version of the test changes (see caches.invalidate_test).
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+	Return :
+		(AnswerKey) : answer key of the test
+	"""
+	id_test = DynMCQTestInfo.id_test
+	version = get_test_version(id_test)
+	local = ANSWER_KEYS.get(id_test)
+	if local is not None and local[0] == version:
+		return local[1]
+	shared_key = 'answer_key:%s:%s' % (id_test, version)
+	answer_key = cache.get(shared_key)
+	if answer_key is None:
+		answer_key = compile_answer_key(DynMCQTestInfo)
+		cache.set(shared_key, answer_key, ANSWER_KEY_TIMEOUT)
+	ANSWER_KEYS.set(id_test, (version, answer_key))
+	return answer_key
@@ -1,5 +1,10 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class TestsEndSessionConfig(AppConfig):
     name = 'tests'
+
+    def ready(self):
+        from .db_tuning import apply_sqlite_pragmas
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='tests_sqlite_pragmas')
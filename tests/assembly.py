@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import DynMCQTest_Question,DynMCQquestion,DynMCQanswer,Dynquestion
+from .caches import LRUCache,get_test_version,invalidate_test
+
+#Questions of the last opened tests, for the current process
+TEST_QUESTIONS = LRUCache(getattr(settings, 'TESTS_QUESTIONS_CACHE_SIZE', 64))
+
+#Timeout of the questions in the shared Django cache (they are invalidated by version anyway)
+TEST_QUESTIONS_TIMEOUT = getattr(settings, 'TESTS_QUESTIONS_TIMEOUT', 24 * 3600)
+
+
+def load_test_questions(DynMCQTestInfo):
+	"""Function to load all the questions and MCQ answers of a test in a constant number of queries
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+	Return :
+		DynMCQquestionTestList (list) : DynMCQquestion instances in the order of the test
+		DynquestionTestList (list) : Dynquestion instances in the order of the test
+		DynMCQanswers (dict) : q_num -> list of the DynMCQanswer instances of the question ordered by ans_num
+	"""
+	DynMCQquestionTestList = []
+	DynquestionTestList = []
+	DynMCQanswers = {}
+	mcq_questions, normal_questions = DynMCQTestInfo.get_question_ids()
+
+	#One query for each question type, then we put the questions back in the order of the test
+	if mcq_questions:
+		mcq_bulk = DynMCQquestion.objects.in_bulk(mcq_questions)
+		DynMCQquestionTestList = [mcq_bulk[q_num] for q_num in mcq_questions if q_num in mcq_bulk]
+		#One query for all the answers of the MCQ questions
+		for q_num in mcq_questions:
+			DynMCQanswers[q_num] = []
+		for answer in DynMCQanswer.objects.filter(q_num__in = mcq_questions).order_by('q_num','ans_num'):
+			DynMCQanswers[answer.q_num].append(answer)
+	if normal_questions:
+		normal_bulk = Dynquestion.objects.in_bulk(normal_questions)
+		DynquestionTestList = [normal_bulk[q_num] for q_num in normal_questions if q_num in normal_bulk]
+	return DynMCQquestionTestList, DynquestionTestList, DynMCQanswers
+
+def get_test_questions(DynMCQTestInfo):
+	"""Function to get the questions and MCQ answers of a test (see load_test_questions) :
+	First from the cache of the process, then from the shared Django cache and finally from the database.
+	The questions are loaded again when the version of the test changes (see caches.invalidate_test).
+	The returned instances are shared : they must not be modified.
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+	Return :
+		(tuple) : DynMCQquestionTestList, DynquestionTestList and DynMCQanswers as returned by load_test_questions
+	"""
+	id_test = DynMCQTestInfo.id_test
+	version = get_test_version(id_test)
+	local = TEST_QUESTIONS.get(id_test)
+	if local is not None and local[0] == version:
+		return local[1]
+	shared_key = 'test_questions:%s:%s' % (id_test, version)
+	questions = cache.get(shared_key)
+	if questions is None:
+		questions = load_test_questions(DynMCQTestInfo)
+		cache.set(shared_key, questions, TEST_QUESTIONS_TIMEOUT)
+	TEST_QUESTIONS.set(id_test, (version, questions))
+	return questions
+
+def get_questions_answers_list(DynMCQquestionTestList, DynMCQanswers):
+	"""Function to order the MCQ questions and their answers in a same list to display it properly
+	Parameter :
+		DynMCQquestionTestList (list) : DynMCQquestion instances of the test
+		DynMCQanswers (dict) : q_num -> list of DynMCQanswer instances (see load_test_questions)
+	Return :
+		Questions_Answers_List (list) : each question followed by its answers
+	"""
+	Questions_Answers_List = []
+	for question in DynMCQquestionTestList:
+		Questions_Answers_List.append(question)
+		Questions_Answers_List.extend(DynMCQanswers.get(question.q_num, []))
+	return Questions_Answers_List
+
+def invalidate_question(q_type, q_num):
+	"""Function to invalidate the cached content of every test using a question
+	Parameter :
+		q_type (str) : DynMCQTest_Question.MCQ or DynMCQTest_Question.NORMAL
+		q_num (int) : id of the question
+	"""
+	for id_test in DynMCQTest_Question.objects.filter(q_type = q_type, q_num = q_num).values_list('test_id', flat=True).distinct():
+		invalidate_test(id_test)
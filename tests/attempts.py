@@ -0,0 +1,46 @@
+from collections import defaultdict
+
+from .models import Pass_DynMCQTest,Pass_DynMCQTest_Info,Pass_DynquestionTest
+
+#Number of attempts read at a time by iter_attempts
+ATTEMPTS_CHUNK_SIZE = 2000
+
+
+def iter_attempts(id_test, chunk_size=ATTEMPTS_CHUNK_SIZE):
+	"""Function to read the attempts of a test with their answers, a chunk of attempts at a time
+	The attempts are streamed with iterator(), the answers of each chunk are read with 2 queries,
+	so that the memory used does not depend on the number of attempts of the test.
+	Parameter :
+		id_test (str) : id of the test
+		chunk_size (int) : number of attempts read at a time
+	Return :
+		(generator) : lists of (Pass_DynMCQTest_Info instance, mcq_answers, normal_answers) ordered by student and attempt,
+		mcq_answers and normal_answers are lists of (q_num, answer)
+	"""
+	chunk = []
+	infos = Pass_DynMCQTest_Info.objects.filter(id_test = id_test).order_by('id_student', 'attempt').only('id', 'id_test', 'id_student', 'attempt', 'mark', 'penalty', 'time')
+	for info in infos.iterator(chunk_size = chunk_size):
+		chunk.append(info)
+		if len(chunk) >= chunk_size:
+			yield load_answers(id_test, chunk)
+			chunk = []
+	if chunk:
+		yield load_answers(id_test, chunk)
+
+def load_answers(id_test, infos):
+	"""Function to read the answers of a list of attempts of a test
+	Parameter :
+		id_test (str) : id of the test
+		infos (list) : Pass_DynMCQTest_Info instances of the test
+	Return :
+		(list) : (Pass_DynMCQTest_Info instance, mcq_answers, normal_answers) for each attempt of infos
+	"""
+	#The students of the chunk use the unique index (id_test, id_student, attempt, q_num)
+	students = {info.id_student for info in infos}
+	mcq = defaultdict(list)
+	for id_student, attempt, q_num, r_ans in Pass_DynMCQTest.objects.filter(id_test = id_test, id_student__in = students).values_list('id_student', 'attempt', 'q_num', 'r_ans'):
+		mcq[(id_student, attempt)].append((q_num, r_ans))
+	normal = defaultdict(list)
+	for id_student, attempt, q_num, r_answer in Pass_DynquestionTest.objects.filter(id_test = id_test, id_student__in = students).values_list('id_student', 'attempt', 'q_num', 'r_answer'):
+		normal[(id_student, attempt)].append((q_num, r_answer))
+	return [(info, mcq.get((info.id_student, info.attempt), []), normal.get((info.id_student, info.attempt), [])) for info in infos]
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from .models import DynMCQInfo
+from .caches import get_version
+
+#Timeout of the cached lists, they are also invalidated at each launch or stop of a test (the version is shared by the processes through the database)
+AVAILABLE_TESTS_TIMEOUT = getattr(settings, 'TESTS_AVAILABLE_TESTS_TIMEOUT', 300)
+
+
+def get_available_tests(user):
+	"""Function to get the launched tests that a user can pass, from the groups of the user
+	The list is cached for each set of groups, every list is invalidated in all the processes when a test is launched or stopped (DynMCQInfo.set_activated_groups).
+	Parameter :
+		user (User instance) : the user
+	Return :
+		tests (list) : DynMCQInfo instances, ordered by id_test
+	"""
+	return get_available_tests_for_groups(user.groups.values_list('id', flat=True))
+
+def available_tests_key(group_ids):
+	return 'available_tests:%s:%s' % (get_version('available_tests'), ','.join(str(group_id) for group_id in group_ids))
+
+def get_available_tests_for_groups(group_ids):
+	"""Function to get the launched tests for a set of groups (see get_available_tests)
+	Parameter :
+		group_ids (iterable) : ids of the groups of a user
+	Return :
+		tests (list) : DynMCQInfo instances, ordered by id_test
+	"""
+	group_ids = sorted(group_ids)
+	if not group_ids:
+		return []
+	key = available_tests_key(group_ids)
+	tests = cache.get(key)
+	if tests is None:
+		#A test activated for several groups of the user is listed once
+		tests = list(DynMCQInfo.objects.filter(activated_groups__in = group_ids).distinct().order_by('id_test'))
+		cache.set(key, tests, AVAILABLE_TESTS_TIMEOUT)
+	return tests
+
+def student_group_sets(DynMCQTestInfo):
+	"""Function to get the different sets of groups of the users who can pass a test
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+	Return :
+		(set) : tuples of sorted group ids
+	"""
+	groups = {}
+	#One query : the groups of every user of the activated groups
+	for user_id, group_id in User.groups.through.objects.filter(user__groups__in = DynMCQTestInfo.activated_groups.all()).values_list('user_id', 'group_id').distinct():
+		groups.setdefault(user_id, []).append(group_id)
+	return {tuple(sorted(group_ids)) for group_ids in groups.values()}
@@ -1,6 +1,121 @@
+import functools
 import re
 
 
+@functools.lru_cache(maxsize=64)
+def get_tokenizer(split_args, keep_separators=False):
+    """
+    Returns the compiled regex splitting a text on the separators split_args (tuple of strings).
+    The separators are kept as tokens when keep_separators is True (e.g. to give a bonus to the spaces of the indentation).
+    The regex is compiled once for each set of separators.
+    """
+    separators = '|'.join(re.escape(split_arg) for split_arg in split_args)
+    if keep_separators:
+        separators = '(' + separators + ')'
+    return re.compile(separators)
+
+
+class AnswerGrader(object):
+    """
+    Grader of the answers to one question, built once from the expected answer and reused for every answer entered.
+    The entered tokens are aligned with the expected tokens by edit distance (a missing or an additional word only costs 1),
+    then each difference is weighted with the keywords categories:
+    - exact keywords (or every token when there are no categories) cost 1 when they are missing or replaced.
+    - variable keywords can be replaced by any other token that is not an exact keyword (the name of a constant).
+      When they are in keywords_constraints, they must be replaced by the same token along the text.
+    - bonus keywords remove 1 from the difference when they are found, and cost nothing when they are missing.
+      A separator given as a bonus keyword (e.g. ' ') is kept as a token.
+
+    diff returns the difference of one answer, grade_many the differences of a list of answers (each different answer is aligned once).
+    An answer is right when its difference is at most tolerance.
+    """
+    def __init__(self, expected, split_args=(' ',), keywords_categories=None, keywords_constraints=None, case_sensitive=True, tolerance=0):
+        keywords_categories = keywords_categories or {}
+        self.case_sensitive = case_sensitive
+        self.tolerance = tolerance
+        self.exact = frozenset(self.normalize(keyword) for keyword in keywords_categories.get('exact', []))
+        self.variable = frozenset(self.normalize(keyword) for keyword in keywords_categories.get('variable', []))
+        self.bonus = frozenset(self.normalize(keyword) for keyword in keywords_categories.get('bonus', []))
+        self.constraints = frozenset(self.normalize(keyword) for keyword in (keywords_constraints or []))
+        split_args = tuple(split_args)
+        self.separators = frozenset(self.normalize(split_arg) for split_arg in split_args)
+        self.tokenizer = get_tokenizer(split_args, bool(self.bonus & self.separators))
+        self.expected = self.tokens(expected)
+
+    def normalize(self, text):
+        return text if self.case_sensitive else text.lower()
+
+    def tokens(self, text):
+        """Splits a text into its tokens (without empty tokens, so that repeated separators are ignored)"""
+        return [token for token in self.tokenizer.split(self.normalize(str(text))) if token]
+
+    def substitution_cost(self, expected_token, entered_token):
+        if expected_token == entered_token:
+            return -1 if expected_token in self.bonus else 0
+        if expected_token in self.variable and entered_token not in self.exact and entered_token not in self.separators:
+            return 0
+        return 1
+
+    def deletion_cost(self, expected_token):
+        return 0 if expected_token in self.bonus else 1
+
+    def diff(self, entered):
+        """Returns the difference between the expected answer and the entered one (0 when they are identical)"""
+        entered = self.tokens(entered)
+        expected = self.expected
+        if entered == expected and not self.bonus:
+            return 0
+        n, m = len(expected), len(entered)
+        # costs[i][j] : difference between the i first expected tokens and the j first entered tokens
+        costs = [[0] * (m + 1) for _ in range(n + 1)]
+        for j in range(1, m + 1):
+            costs[0][j] = j
+        for i in range(1, n + 1):
+            costs[i][0] = costs[i - 1][0] + self.deletion_cost(expected[i - 1])
+            for j in range(1, m + 1):
+                costs[i][j] = min(
+                    costs[i - 1][j - 1] + self.substitution_cost(expected[i - 1], entered[j - 1]),
+                    costs[i - 1][j] + self.deletion_cost(expected[i - 1]),
+                    costs[i][j - 1] + 1,
+                )
+        diff = costs[n][m]
+        if self.constraints & self.variable:
+            diff += self.constraint_violations(costs, entered)
+        return diff
+
+    def constraint_violations(self, costs, entered):
+        """Follows the alignment back and counts the constrained variables not renamed as their first occurrence"""
+        expected = self.expected
+        pairs = []
+        i, j = len(expected), len(entered)
+        while i > 0 and j > 0:
+            if costs[i][j] == costs[i - 1][j - 1] + self.substitution_cost(expected[i - 1], entered[j - 1]):
+                pairs.append((expected[i - 1], entered[j - 1]))
+                i, j = i - 1, j - 1
+            elif costs[i][j] == costs[i - 1][j] + self.deletion_cost(expected[i - 1]):
+                i -= 1
+            else:
+                j -= 1
+        names = {}
+        violations = 0
+        for expected_token, entered_token in reversed(pairs):
+            if expected_token in self.constraints and expected_token in self.variable:
+                if names.setdefault(expected_token, entered_token) != entered_token:
+                    violations += 1
+        return violations
+
+    def is_right(self, entered):
+        return self.diff(entered) <= self.tolerance
+
+    def grade_many(self, answers):
+        """Returns the difference of each answer of a list, identical answers are aligned once"""
+        diffs = {}
+        for answer in answers:
+            if answer not in diffs:
+                diffs[answer] = self.diff(answer)
+        return [diffs[answer] for answer in answers]
+
+
 def compare_input_wt_expected(input_expected, input_entered, split_args=[' '], keywords_categories=None, keywords_constraints=None, verbose=False):
     """
     Compares two inputs: the expected answer with the entered one. The goal is to enable a more advanced comparison than an exact match:
@@ -10,51 +125,17 @@ def compare_input_wt_expected(input_expected, input_entered, split_args=[' '], k
     2. keywords_constraints:
     - Some keywords should remain identical along the text although the comparison method is variable.
 
-    Warning: for now the function is fully case sensitive. But it isn't sensitive to indentation.
-    """
-    #TODO: transform into an object (that will have different properties for the different domains)
+    The comparison is done by AnswerGrader: the words are aligned by edit distance, so an answer longer or shorter than expected is compared too.
 
-    # Transform split args list for into a regex-readable list
-    split_args_re = '|'.join(split_args)
+    Warning: for now the function is fully case sensitive. But it isn't sensitive to indentation (unless ' ' is a bonus keyword).
+    """
+    grader = AnswerGrader(input_expected, split_args, keywords_categories, keywords_constraints)
 
-    # Split keywords
-    split_expected = re.split(split_args_re, input_expected)
-    split_entered = re.split(split_args_re, input_entered)
-    
     if verbose:
-        print(split_expected)
-        print(split_entered)
-        
-    diff = 0
-
-
-    # ----- Exact method -----
-    #TODO: transform into a list comprehension command
-    #TODO: add the list indicating the penalty for each word
-    for i, _ in enumerate(split_entered):
-        if split_entered[i] != split_expected[i]:
-            diff += 1 # should be different for some keywords
-        
-
-    # TODO: To implement later
-    # elif keywords_categories['exact'] or keywords_categories['variable'] or keywords_categories['bonus']:
-    #     # ----- Variables and bonuses methods -----
-    #     print("dic")
-    #     for i, _ in enumerate(split_entered):
-    #         # Treat exact keywords
-    #         if split_entered[i] != split_expected[i] and split_expected[i] in keywords_categories['exact']:
-    #             diff += 1
-    #         # Treat bonus keywords
-    #         elif split_entered[i] == split_expected[i] and split_expected[i] in keywords_categories['bonus']:
-    #             diff -= 1
-    #         #TODO: see how to check the identation
-    #         elif split_entered[i] == split_expected[i] and split_expected[i] in keywords_categories['variable']:
-    #             #TODO: concerning constraints, in this case, the name of the variable should remain the same
-    #             #TODO: also, it should refer to constraints to check which values the variable name can be, since it mostly is anything but signs like '=' or '-'. But that holds only for coding courses.
-    #             None
-        
-    return diff
+        print(grader.expected)
+        print(grader.tokens(input_entered))
 
+    return grader.diff(input_entered)
 
 
 if __name__ == '__main__':
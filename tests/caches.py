@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+
+
+class LRUCache(object):
+	"""Process-local cache keeping the most recently used entries :
+	When more than maxsize entries are stored, the least recently used one is removed.
+
+	Attributes :
+
+	maxsize (int) : maximal number of entries
+
+	Function linked to the class :
+
+	get : returns the value of a key (or default) and marks it as recently used
+	set : stores a value
+	delete : removes a key
+	clear : removes every key
+	"""
+	def __init__(self, maxsize=128):
+		self.maxsize = maxsize
+		self._data = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key, default=None):
+		with self._lock:
+			if key not in self._data:
+				return default
+			self._data.move_to_end(key)
+			return self._data[key]
+
+	def set(self, key, value):
+		with self._lock:
+			self._data[key] = value
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+
+	def delete(self, key):
+		with self._lock:
+			self._data.pop(key, None)
+
+	def clear(self):
+		with self._lock:
+			self._data.clear()
+
+	def __len__(self):
+		return len(self._data)
+
+	def __contains__(self, key):
+		return key in self._data
+
+#Seconds during which a version read from the database is kept by the process :
+#a change made by another process is seen after at most this delay, the changes of the process are seen at once
+VERSION_TTL = getattr(settings, 'TESTS_VERSION_TTL', 2)
+
+#Versions read by the current process : name -> (version, expiry time)
+VERSIONS = LRUCache(getattr(settings, 'TESTS_VERSION_CACHE_SIZE', 1024))
+
+
+def get_version(name):
+	"""Function to get the version of a cached object, shared between the processes through the database :
+	The version is kept VERSION_TTL seconds by the process, a warm request sends no query.
+	Parameter :
+		name (str) : name of the cached object (test:<id_test> for example)
+	Return :
+		version (int) : current version
+	"""
+	local = VERSIONS.get(name)
+	if local is not None and local[1] > time.monotonic():
+		return local[0]
+	return read_version(name)
+
+def read_version(name):
+	"""Function to read the version of a cached object from the database (one query on a unique index) and keep it in the process"""
+	#models.py imports this module
+	from .models import Cache_Version
+	#Always from the default database, a late replica would keep serving the stale entries
+	version = Cache_Version.objects.using(DEFAULT_DB_ALIAS).filter(name = name).values_list('version', flat=True).first()
+	if version is None:
+		#We start from the current time so that a new database never reuses the numbers of the entries left in a shared cache
+		version = Cache_Version.objects.using(DEFAULT_DB_ALIAS).get_or_create(name = name, defaults = {'version': int(time.time() * 1000)})[0].version
+	VERSIONS.set(name, (version, time.monotonic() + VERSION_TTL))
+	return version
+
+def bump_version(name):
+	"""Function to invalidate every cached entry built for a previous version of the object, in all the processes
+	(at once in the current process, after at most VERSION_TTL seconds in the others)
+	Parameter :
+		name (str) : name of the cached object
+	Return :
+		version (int) : the new version
+	"""
+	from .models import Cache_Version
+	if Cache_Version.objects.using(DEFAULT_DB_ALIAS).filter(name = name).update(version = F('version') + 1) == 0:
+		#The version has never been read
+		read_version(name)
+		Cache_Version.objects.using(DEFAULT_DB_ALIAS).filter(name = name).update(version = F('version') + 1)
+	return read_version(name)
+
+def get_test_version(id_test):
+	"""Function to get the version of the content of a test (questions, answers and right answers)
+	Every cache built from the content of the test is keyed by this version.
+	Parameter :
+		id_test (str) : id of the test
+	Return :
+		version (int) : version of the test
+	"""
+	return get_version('test:' + str(id_test))
+
+def invalidate_test(id_test):
+	"""Function to invalidate the cached content of a test when its questions or answers change
+	Parameter :
+		id_test (str) : id of the test
+	"""
+	bump_version('test:' + str(id_test))
@@ -0,0 +1,171 @@
+import io
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from .aggregates import get_current_statistics,get_statistics
+from .caches import LRUCache
+from .mark_statistics import MarkStatistics
+
+#Rendered charts (PNG) of the last displayed statistics, for the current process
+CHARTS = LRUCache(getattr(settings, 'TESTS_CHART_CACHE_SIZE', 64))
+
+#matplotlib is only imported when the first chart is drawn (see load_matplotlib)
+_matplotlib = None
+_matplotlib_lock = threading.Lock()
+
+
+def load_matplotlib():
+	"""Function to import matplotlib the first time a chart is drawn, with the headless Agg backend
+	Importing matplotlib is slow : the processes which never draw a chart (commands, tests, most workers) do not pay it.
+	Return :
+		Figure (class) : matplotlib.figure.Figure
+		FigureCanvasAgg (class) : the Agg canvas, rendering a Figure to PNG
+	"""
+	global _matplotlib
+	if _matplotlib is None:
+		with _matplotlib_lock:
+			if _matplotlib is None:
+				import matplotlib
+				matplotlib.use('Agg')
+				from matplotlib.figure import Figure
+				from matplotlib.backends.backend_agg import FigureCanvasAgg
+				_matplotlib = (Figure, FigureCanvasAgg)
+	return _matplotlib
+
+def new_figure():
+	"""Function to create a figure, which is not registered in pyplot"""
+	Figure, FigureCanvasAgg = load_matplotlib()
+	return Figure()
+
+def figure_to_png(fig):
+	"""Function to render a figure in memory
+	The figure is not registered in pyplot, it is freed with its last reference.
+	Parameter :
+		fig (Figure) : the figure
+	Return :
+		png (bytes) : the image
+	"""
+	Figure, FigureCanvasAgg = load_matplotlib()
+	buffer = io.BytesIO()
+	FigureCanvasAgg(fig).print_png(buffer)
+	return buffer.getvalue()
+
+def GraphsQuestions(stats_question, nb_q):
+	"""Function to create a graph to display statistics on questions
+	Parameter :
+		stats_question (list) : list of occurences of good answers for each questions
+		nb_q (int) : number of questionss
+	Return :
+		png (bytes) : the image
+	"""
+	fig = new_figure()
+	ax = fig.subplots()
+
+	questions = []
+	i = 1
+	while i <= nb_q:
+		questions.append("q"+str(i))
+		i += 1
+	y_pos = np.arange(len(stats_question))
+	performance = stats_question
+
+	ax.barh(y_pos, performance, align='center')
+	ax.set_yticks(y_pos)
+	ax.set_yticklabels(questions)
+	ax.invert_yaxis()
+	ax.set_xlabel('Bonnes réponses')
+	ax.set_title('Stats Questions')
+	return figure_to_png(fig)
+
+def GraphsNote(total_freq,nb_q):
+	"""Function to create a graph to display statistics on marks
+	Parameter :
+		total_freq (list) : list of frequences of the test
+		nb_q (int) : number of questionss
+	Return :
+		png (bytes) : the image
+	"""
+	labels = []
+	i = 0
+	while i <= nb_q:
+		labels.append(str(i)+"/"+str(nb_q))
+		i += 1
+	sizes = []
+	for q in total_freq:
+		sizes.append(float(q[0]))
+	fig = new_figure()
+	ax = fig.subplots()
+	ax.pie(sizes, labels=labels, autopct='%1.1f%%',shadow=True, startangle=90)
+	ax.axis('equal')
+	ax.set_title('Statistiques des notes')
+	return figure_to_png(fig)
+
+def GraphsBoxplot(marks_list):
+	"""Function to create a boxplot to display statistics on marks
+	Parameter :
+		marks_list (list) : list of the pass test marks
+	Return :
+		png (bytes) : the image
+	"""
+	fig = new_figure()
+	ax = fig.subplots()
+	ax.boxplot(marks_list,vert=False,)
+	ax.set_title('Boxplot du test')
+	return figure_to_png(fig)
+
+def render_chart(name, marks_stats, stats_question):
+	"""Function to render a chart of the statistics page from the statistics of the test"""
+	if name == 'questions':
+		return GraphsQuestions(stats_question, len(stats_question))
+	total_freq = marks_stats.frequences(len(stats_question))
+	if name == 'marks':
+		return GraphsNote(total_freq, len(total_freq)-1)
+	return GraphsBoxplot(marks_stats.marks())
+
+#Names of the charts of the statistics page
+CHART_NAMES = ('questions', 'marks', 'boxplot')
+
+def get_chart(DynMCQTestInfo, name):
+	"""Function to get a chart of the statistics of a test, rendered again only when the statistics change
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+		name (str) : one of CHART_NAMES
+	Return :
+		png (bytes) : the image, None if the test has no graded submission
+		stats (Test_Statistics instance) : the statistics drawn in the chart
+	"""
+	stats, stats_question = get_statistics(DynMCQTestInfo)
+	if stats.nb_attempts == 0:
+		return None, stats
+	key = (DynMCQTestInfo.id_test, stats.version, stats.revision, name)
+	png = CHARTS.get(key)
+	if png is None:
+		png = render_chart(name, MarkStatistics.from_histogram(stats.get_histogram()), stats_question)
+		CHARTS.set(key, png)
+	return png, stats
+
+def get_etag(stats, name):
+	"""Function to get the ETag of a chart drawn from the statistics stats"""
+	return '%s-%s-%s-%s' % (stats.id_test, stats.version, stats.revision, name)
+
+def chart_etag(id_test, name):
+	"""Function to get the ETag of a chart without rendering it
+	Parameter :
+		id_test (str) : id of the test
+		name (str) : name of the chart
+	Return :
+		etag (str) : None if the statistics have to be built again
+	"""
+	stats = get_current_statistics(id_test)
+	if stats is None:
+		return None
+	return get_etag(stats, name)
+
+def chart_last_modified(id_test):
+	"""Function to get the time of the last change of the charts of a test, None if the statistics have to be built again"""
+	stats = get_current_statistics(id_test)
+	if stats is None:
+		return None
+	return stats.updated
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections
+
+#Pragmas applied to each new SQLite connection when TESTS_SQLITE_PRAGMAS is not in the settings :
+#the busy timeout first, changing the journal mode needs the lock of the database
+DEFAULT_PRAGMAS = [
+	('busy_timeout', 20000),
+	('journal_mode', 'WAL'),
+	('synchronous', 'NORMAL'),
+]
+
+
+def get_pragmas():
+	"""Function to get the pragmas applied to the new SQLite connections, list of (name, value)"""
+	return getattr(settings, 'TESTS_SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+	"""Function connected to the connection_created signal (see apps.py) :
+	With the WAL journal the students reading a page do not block the submissions and a submission does not block the readers,
+	the busy timeout makes the writers wait for the lock instead of failing with "database is locked",
+	and the NORMAL synchronous level only syncs the journal at the checkpoints (a commit may be lost with the power, never corrupted).
+	Parameter :
+		connection (DatabaseWrapper) : the new connection, nothing is done for the other databases than SQLite
+	"""
+	if connection.vendor != 'sqlite':
+		return
+	with connection.cursor() as cursor:
+		for name, value in get_pragmas():
+			cursor.execute('PRAGMA %s = %s' % (name, value))
+
+def sqlite_pragmas(connection, names=('journal_mode', 'synchronous', 'busy_timeout')):
+	"""Function to read the pragmas of a SQLite connection
+	Return :
+		(dict) : value of each pragma, empty for the other databases
+	"""
+	if connection.vendor != 'sqlite':
+		return {}
+	values = {}
+	with connection.cursor() as cursor:
+		for name in names:
+			cursor.execute('PRAGMA %s' % name)
+			values[name] = cursor.fetchone()[0]
+	return values
+
+@contextmanager
+def scratch_database():
+	"""Context manager replacing the default database by a new SQLite file with the tables of the migrations (benchmarks and load tests) :
+	The file is removed and the database of the settings is used again at the end.
+	Return :
+		name (str) : path of the SQLite file
+	"""
+	settings_dict = connections.databases['default']
+	saved_settings = dict(settings_dict)
+	directory = tempfile.mkdtemp(prefix = 'scratch_database')
+	connections['default'].close()
+	settings_dict.update({'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(directory, 'db.sqlite3')})
+	try:
+		call_command('migrate', verbosity = 0, interactive = False)
+		yield settings_dict['NAME']
+	finally:
+		connections['default'].close()
+		settings_dict.clear()
+		settings_dict.update(saved_settings)
+		shutil.rmtree(directory, ignore_errors = True)
@@ -0,0 +1,160 @@
+import datetime
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import DynMCQInfo,Pass_DynMCQTest_Info
+
+#Lateness allowed before the first penalty point, in seconds
+LATE_TOLERANCE = 30
+
+#Seconds during which an attempt not submitted yet is cached as such
+UNSUBMITTED_TIMEOUT = 5
+
+
+def parse_duration(time):
+	"""Function to get the duration of a test in seconds
+	Parameter :
+		time (str) : "min:sec" (5:30) or "h:min:sec"
+	Return :
+		seconds (int) : duration in seconds
+	Raise ValueError if time is empty or not made of numbers
+	"""
+	parts = time.strip().split(':')
+	if len(parts) > 3 or not all(part.isdigit() for part in parts):
+		raise ValueError("the time must be min:sec or h:min:sec")
+	seconds = 0
+	for part in parts:
+		seconds = seconds * 60 + int(part)
+	return seconds
+
+def open_test(DynMCQTestInfo, now=None):
+	"""Function to start the clock of a launched test, if it is not started yet :
+	The deadline is the release time plus the time of the test.
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the launched test
+		now (datetime) : release time, the current time by default
+	"""
+	#A stopped test (no time) has no clock
+	if DynMCQTestInfo.release_at is not None or not DynMCQTestInfo.time:
+		return
+	now = now or timezone.now()
+	DynMCQTestInfo.release_at = now
+	DynMCQTestInfo.deadline_at = now + datetime.timedelta(seconds = parse_duration(DynMCQTestInfo.time))
+	DynMCQTestInfo.save(update_fields = ['release_at', 'deadline_at'])
+
+def close_test(DynMCQTestInfo):
+	"""Function to reset the clock of a test (stopped or launched again)"""
+	DynMCQTestInfo.release_at = None
+	DynMCQTestInfo.deadline_at = None
+	DynMCQTestInfo.save(update_fields = ['release_at', 'deadline_at'])
+
+def seconds_remaining(DynMCQTestInfo, now=None):
+	"""Function to get the time left before the deadline of a test
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+		now (datetime) : the current time by default
+	Return :
+		remaining (int) : seconds left (negative when the deadline is over), None if the test is not started
+	"""
+	return remaining_until(DynMCQTestInfo.deadline_at, now)
+
+def remaining_until(deadline_at, now=None):
+	"""Function to get the seconds left before deadline_at (datetime or None), rounded down"""
+	if deadline_at is None:
+		return None
+	delta = deadline_at - (now or timezone.now())
+	return delta.days * 86400 + delta.seconds
+
+def late_penalty(DynMCQTestInfo, now=None):
+	"""Function to get the penalty of a late submission : 1 point every full minute after the deadline,
+	only if the submission is more than LATE_TOLERANCE seconds late
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+		now (datetime) : time of the submission, the current time by default
+	Return :
+		penalty (int) : points removed from the mark
+	"""
+	remaining = seconds_remaining(DynMCQTestInfo, now)
+	if remaining is None or -remaining <= LATE_TOLERANCE:
+		return 0
+	return -remaining // 60
+
+def start_attempt(Pass_DynMCQInfo, now=None):
+	"""Function to record the time when a student opens an attempt the first time
+	Parameter :
+		Pass_DynMCQInfo (Pass_DynMCQTest_Info instance) : the attempt
+		now (datetime) : the current time by default
+	"""
+	if Pass_DynMCQInfo.started_at is not None:
+		return
+	now = now or timezone.now()
+	#Only the first opening is recorded, even with several tabs
+	if type(Pass_DynMCQInfo).objects.filter(pk = Pass_DynMCQInfo.pk, started_at__isnull = True).update(started_at = now):
+		Pass_DynMCQInfo.started_at = now
+
+def clock(test_clock, now=None):
+	"""Function to get the state of the clock of a test, sent to the countdown of the pages
+	Parameter :
+		test_clock (dict) : release_at and deadline_at of the test (see get_test_clock)
+		now (datetime) : the current time by default
+	Return :
+		(dict) : release_at, deadline_at (ISO format or None) and remaining (seconds or None)
+	"""
+	return {
+		'release_at': test_clock['release_at'].isoformat() if test_clock['release_at'] else None,
+		'deadline_at': test_clock['deadline_at'].isoformat() if test_clock['deadline_at'] else None,
+		'remaining': remaining_until(test_clock['deadline_at'], now),
+	}
+
+def submitted_key(id_test, id_student, attempt):
+	return 'attempt_submitted:%s:%s:%s' % (id_test, id_student, attempt)
+
+def get_test_clock(id_test):
+	"""Function to get the release time and the deadline of a test
+	They are read from the database at each call (one query on the primary key) : a clock kept in the cache of a process
+	would miss a test launched again or stopped by another process.
+	Parameter :
+		id_test (str) : id of the test
+	Return :
+		(dict) : {'release_at': datetime or None, 'deadline_at': datetime or None}, None if the test does not exist
+	"""
+	return DynMCQInfo.objects.filter(id_test = id_test).values('release_at', 'deadline_at').first()
+
+def mark_submitted(Pass_DynMCQInfo):
+	"""Function to record in the cache that an attempt is submitted (an attempt is never submitted again)"""
+	cache.set(submitted_key(Pass_DynMCQInfo.id_test, Pass_DynMCQInfo.id_student, Pass_DynMCQInfo.attempt), True, None)
+
+def attempt_status(id_test, id_student, attempt, now=None):
+	"""Function to get the state of an attempt, without reading the questions of the test :
+	The clock of the test is read from the database, the submitted attempts from the cache.
+	Parameter :
+		id_test (str) : id of the test
+		id_student (str) : id of the student
+		attempt (int) : number of the attempt
+		now (datetime) : the current time by default
+	Return :
+		(dict) : {'open': bool, 'remaining': seconds or None, 'submitted': bool}, None if the test or the attempt does not exist
+	"""
+	test_clock = get_test_clock(id_test)
+	if test_clock is None:
+		return None
+	key = submitted_key(id_test, id_student, attempt)
+	submitted = cache.get(key)
+	if submitted is None:
+		#The time of the attempt is written with the answers
+		rows = list(Pass_DynMCQTest_Info.objects.filter(id_test = id_test, id_student = id_student, attempt = attempt).values_list('time', flat=True))
+		if not rows:
+			return None
+		submitted = rows[0] is not None
+		if submitted:
+			cache.set(key, True, None)
+		else:
+			#add does not replace the value set by a submission meanwhile
+			cache.add(key, False, UNSUBMITTED_TIMEOUT)
+	remaining = remaining_until(test_clock['deadline_at'], now)
+	return {
+		'open': remaining is not None and remaining >= 0,
+		'remaining': remaining,
+		'submitted': submitted,
+	}
@@ -0,0 +1,59 @@
+import csv
+
+from .models import DynMCQTest_Question
+from .answer_keys import get_answer_key
+from .attempts import ATTEMPTS_CHUNK_SIZE,iter_attempts
+
+
+class Echo(object):
+	"""File-like object returning what is written, so that the csv writer formats one row at a time"""
+	def write(self, value):
+		return value
+
+def results_header(questions):
+	"""Function to get the header of the results of a test
+	Parameter :
+		questions (list) : (q_type, q_num) of the questions, in the order of the test
+	Return :
+		(list) : names of the columns
+	"""
+	header = ['id_student', 'attempt', 'time', 'mark', 'penalty']
+	for position, (q_type, q_num) in enumerate(questions, 1):
+		header.append('q%d (%s %d)' % (position, 'mcq' if q_type == DynMCQTest_Question.MCQ else 'normal', q_num))
+	return header
+
+def results_rows(DynMCQTestInfo, chunk_size=ATTEMPTS_CHUNK_SIZE):
+	"""Function to get the results of a test, one row per attempt
+	The attempts are read by chunks (see attempts.iter_attempts) : the memory used does not depend on the number of attempts.
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+		chunk_size (int) : number of attempts read at a time
+	Return :
+		(generator) : the header then a row for each attempt, with 1 for a right answer, 0 for a wrong one and nothing for an unanswered question
+	"""
+	questions = list(DynMCQTestInfo.test_questions.order_by('position').values_list('q_type', 'q_num'))
+	answer_key = get_answer_key(DynMCQTestInfo)
+	yield results_header(questions)
+	for chunk in iter_attempts(DynMCQTestInfo.id_test, chunk_size):
+		for info, mcq_answers, normal_answers in chunk:
+			answered = {(DynMCQTest_Question.MCQ, int(q_num)) for q_num, r_ans in mcq_answers}
+			answered.update((DynMCQTest_Question.NORMAL, int(q_num)) for q_num, r_answer in normal_answers)
+			right = set(answer_key.right_questions(mcq_answers, normal_answers))
+			row = [info.id_student, info.attempt, info.time or '', '' if info.mark is None else info.mark, '' if info.penalty is None else info.penalty]
+			for question in questions:
+				if question not in answered:
+					row.append('')
+				else:
+					row.append(1 if question in right else 0)
+			yield row
+
+def stream_csv(rows):
+	"""Function to format rows in CSV, one line at a time
+	Parameter :
+		rows (iterable) : lists of values
+	Return :
+		(generator) : the lines of the CSV file
+	"""
+	writer = csv.writer(Echo())
+	for row in rows:
+		yield writer.writerow(row)
@@ -10,6 +10,7 @@ from .models import (
 )
 
 from .backend_code import compare_input_wt_expected as compare
+from .exam_clock import parse_duration
 		
 class DynMCQTestInfoForm(forms.ModelForm):
 	"""Form to fill id_test and title of the DynMCQInfo test
@@ -23,16 +24,10 @@ class DynMCQTestInfoForm(forms.ModelForm):
 			'title',
 		]
 
-class DynMCQTestInfoForm_questions(forms.ModelForm):
+class DynMCQTestInfoForm_questions(forms.Form):
 	"""Form to fill the question numbers of the DynMCQInfo test (MultipleChoiceField with Checkbox)
 	"""
 	questions = forms.MultipleChoiceField(widget=forms.CheckboxSelectMultiple())
-
-	class Meta:
-		model = DynMCQInfo
-		fields = [
-			'questions',
-		]
 	
 class DynMCQTestInfoForm_launch(forms.ModelForm):
 	"""Form to fill activated_for and time attribute when lauching the DynMCQInfo test 
@@ -46,6 +41,17 @@ class DynMCQTestInfoForm_launch(forms.ModelForm):
 			'time',
 			'activated_for',
 		]
+
+	def clean_time(self):
+		#The clock of the test is computed from the time (see exam_clock.open_test)
+		time = self.cleaned_data['time'].strip()
+		try:
+			seconds = parse_duration(time)
+		except ValueError:
+			raise forms.ValidationError("The time must be mm:ss or h:mm:ss")
+		if seconds == 0:
+			raise forms.ValidationError("The time must be longer than 0 seconds")
+		return time
 		
 class MCQQuestion_difficulty_form(forms.ModelForm):
 	"""Form to fill the difficulty of a DynMCQquestion question
@@ -145,3 +151,14 @@ class Pass_DynquestionTestForm(forms.ModelForm):
 		fields = [
 			'r_answer',
 		]
+
+class Question_import_form(forms.Form):
+	"""Form to upload a question bank (JSON or CSV file, see question_bank.py)
+	"""
+	questions_file = forms.FileField(required=True)
+	
+	def clean_questions_file(self):
+		questions_file = self.cleaned_data['questions_file']
+		if not questions_file.name.lower().endswith(('.json', '.csv')):
+			raise forms.ValidationError("The file must be a .json or a .csv file")
+		return questions_file
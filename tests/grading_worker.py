@@ -0,0 +1,27 @@
+import pickle
+
+#Functions run in the processes of a pool by regrading.py :
+#this module does not import Django, the processes started with spawn set it up in init_worker
+
+#Answer key of the graded test, in the current process
+_answer_key = None
+
+
+def init_worker(answer_key_data):
+	"""Function to prepare a process of the pool
+	Parameter :
+		answer_key_data (bytes) : the pickled AnswerKey of the test
+	"""
+	global _answer_key
+	import django
+	django.setup()
+	_answer_key = pickle.loads(answer_key_data)
+
+def grade_attempts(attempts):
+	"""Function to grade attempts with the answer key of the process
+	Parameter :
+		attempts (list) : (pk, mcq_answers, normal_answers) of each attempt
+	Return :
+		(list) : (pk, number of right questions) of each attempt
+	"""
+	return [(pk, len(_answer_key.right_questions(mcq_answers, normal_answers))) for pk, mcq_answers, normal_answers in attempts]
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+
+from tests.models import DynMCQInfo,Pass_DynMCQTest_Info
+from tests.pass_page import build_pass_forms,render_questions
+from tests.views import DynMCQtest_pass_view
+
+
+def render_uncached(DynMCQTestInfo):
+	"""Function rendering the questions at each request, as DynMCQtest_pass_view did before pass_page.py"""
+	return render_questions(*build_pass_forms(DynMCQTestInfo))
+
+
+class Command(BaseCommand):
+	help = "Measure the opening of the pass page of a test by many students at the same time, with and without the cached questions"
+
+	def add_arguments(self, parser):
+		parser.add_argument('id_test', help="Id of the test")
+		parser.add_argument('--openers', type=int, default=300, help="Number of students opening the page")
+		parser.add_argument('--threads', type=int, default=16, help="Number of requests served at the same time")
+
+	def open_page(self, id_student):
+		"""Returns the time taken by the view for one student"""
+		request = RequestFactory().get('/tests/pass/dynmcqtest/%s/%s/1' % (self.id_test, id_student))
+		request.user = AnonymousUser()
+		start = time.perf_counter()
+		try:
+			response = DynMCQtest_pass_view(request, self.id_test, id_student, 1)
+		finally:
+			connection.close()
+		if response.status_code != 200:
+			raise CommandError("The pass page returned %d" % response.status_code)
+		return time.perf_counter() - start
+
+	def run(self, students, threads):
+		start = time.perf_counter()
+		with ThreadPoolExecutor(threads) as pool:
+			latencies = np.array(list(pool.map(self.open_page, students)))
+		return time.perf_counter() - start, latencies
+
+	def handle(self, *args, **options):
+		self.id_test = options['id_test']
+		if not DynMCQInfo.objects.filter(id_test = self.id_test).exists():
+			raise CommandError("The test %s does not exist" % self.id_test)
+		#Attempts of fake students, already started so that opening the page writes nothing
+		students = ['bench%d' % i for i in range(options['openers'])]
+		Pass_DynMCQTest_Info.objects.bulk_create([Pass_DynMCQTest_Info(id_test = self.id_test, id_student = id_student, attempt = 1, started_at = timezone.now()) for id_student in students])
+		try:
+			self.stdout.write("%d students, %d requests at a time" % (len(students), options['threads']))
+			self.stdout.write("%10s %10s %12s %12s %12s" % ("questions", "total (s)", "pages/s", "p50 (ms)", "p95 (ms)"))
+			with mock.patch('tests.views.get_questions_fragment', render_uncached):
+				results = [('rendered',) + self.run(students, options['threads'])]
+			results.append(('cached',) + self.run(students, options['threads']))
+			for name, total, latencies in results:
+				self.stdout.write("%10s %10.2f %12.0f %12.1f %12.1f" % (name, total, len(students) / total, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 95) * 1000))
+		finally:
+			Pass_DynMCQTest_Info.objects.filter(id_test = self.id_test, id_student__in = students).delete()
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from tests.startup import measure_startup
+
+
+class Command(BaseCommand):
+	help = "Measure the start of a worker process : django.setup() and the resolution of a URL, with the slowest imports"
+
+	def add_arguments(self, parser):
+		parser.add_argument('--url', default='/tests/manage/statistics/1/', help="URL resolved after the setup")
+		parser.add_argument('--top', type=int, default=15, help="Number of slowest imports displayed")
+
+	def handle(self, *args, **options):
+		wall_time, imports, modules = measure_startup(options['url'])
+		self.stdout.write("Start : %.3f s, %d modules, %.3f s spent in imports" % (wall_time, len(modules), sum(i[0] for i in imports) / 1e6))
+		self.stdout.write("%12s %12s  %s" % ("self (ms)", "cumul. (ms)", "module"))
+		for self_time, cumulative_time, module in sorted(imports, reverse=True)[:options['top']]:
+			self.stdout.write("%12.1f %12.1f  %s" % (self_time / 1000, cumulative_time / 1000, module))
+		if any(module.split('.')[0] == 'matplotlib' for module in modules):
+			self.stderr.write("matplotlib is imported at the start")
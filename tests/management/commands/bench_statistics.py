@@ -0,0 +1,52 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from tests.mark_statistics import MarkStatistics
+from tests.views import Moyenne,Note_plus_basse,Note_plus_haute,Q1,Q3,Mediane,Frequences
+
+
+def legacy_statistics(marks_list, nb_questions):
+	"""Function computing the statistics of the marks as statistics_view did before MarkStatistics"""
+	statistiques_notes = [0] * (nb_questions + 1)
+	for mark in marks_list:
+		statistiques_notes[mark] += 1
+	return (Moyenne(marks_list), Note_plus_basse(marks_list), Note_plus_haute(marks_list), Q1(marks_list), Q3(marks_list), Mediane(marks_list), Frequences(statistiques_notes, marks_list))
+
+def mark_statistics(marks_list, nb_questions):
+	"""Function computing the same statistics with MarkStatistics"""
+	marks_stats = MarkStatistics(marks_list)
+	return ("%.2f" % marks_stats.mean, marks_stats.min, marks_stats.max, marks_stats.q1, marks_stats.q3, marks_stats.median, marks_stats.frequences(nb_questions))
+
+
+class Command(BaseCommand):
+	help = "Compare the time of the statistics of the marks computed by MarkStatistics and by the functions of views.py"
+
+	def add_arguments(self, parser):
+		parser.add_argument('--sizes', default='10000,100000,1000000', help="Numbers of attempts, separated by commas")
+		parser.add_argument('--nb-questions', type=int, default=20, help="Number of questions of the test (highest mark)")
+		parser.add_argument('--repeat', type=int, default=3, help="Number of runs, the best time is kept")
+		parser.add_argument('--seed', type=int, default=0)
+
+	def best_time(self, function, marks_list, nb_questions, repeat):
+		best = None
+		for i in range(repeat):
+			start = time.perf_counter()
+			result = function(marks_list, nb_questions)
+			elapsed = time.perf_counter() - start
+			if best is None or elapsed < best:
+				best = elapsed
+		return best, result
+
+	def handle(self, *args, **options):
+		rng = np.random.RandomState(options['seed'])
+		nb_questions = options['nb_questions']
+		self.stdout.write("%10s %12s %12s %8s" % ("attempts", "legacy (s)", "numpy (s)", "speedup"))
+		for size in [int(size) for size in options['sizes'].split(',')]:
+			marks_list = rng.binomial(nb_questions, 0.6, size).tolist()
+			legacy_time, legacy_result = self.best_time(legacy_statistics, marks_list, nb_questions, options['repeat'])
+			numpy_time, numpy_result = self.best_time(mark_statistics, marks_list, nb_questions, options['repeat'])
+			if legacy_result != numpy_result:
+				self.stderr.write("Different results for %d attempts" % size)
+			self.stdout.write("%10d %12.4f %12.4f %7.1fx" % (size, legacy_time, numpy_time, legacy_time / numpy_time))
@@ -0,0 +1,131 @@
+import os
+import queue
+import shutil
+import threading
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from tests.aggregates import rebuild_statistics
+from tests.db_tuning import get_pragmas,scratch_database,sqlite_pragmas
+from tests.exports import results_rows
+from tests.models import DynMCQanswer,DynMCQInfo,DynMCQquestion,Pass_DynMCQTest,Pass_DynMCQTest_Info
+from tests.submissions import save_submission
+
+#Pragmas of SQLite before the high concurrency profile : rollback journal, full sync and the 5 seconds timeout of the sqlite3 module
+PREVIOUS_PRAGMAS = [
+	('busy_timeout', 5000),
+	('journal_mode', 'DELETE'),
+	('synchronous', 'FULL'),
+]
+
+BENCH_TEST = 'bench'
+NB_QUESTIONS = 10
+
+
+class Command(BaseCommand):
+	help = "Measure the submissions of many students at the same time on a scratch SQLite database, with the previous pragmas and with TESTS_SQLITE_PRAGMAS"
+
+	def add_arguments(self, parser):
+		parser.add_argument('--students', type=int, default=1000, help="Number of submissions")
+		parser.add_argument('--threads', type=int, default=64, help="Number of submissions sent at the same time")
+		parser.add_argument('--readers', type=int, default=4, help="Number of teachers exporting the results during the submissions")
+
+	def seed(self, students):
+		"""Creates the test, its questions and the attempts of the students"""
+		test = DynMCQInfo.objects.create(id_test = BENCH_TEST, title = "Bench")
+		q_nums = []
+		for i in range(NB_QUESTIONS):
+			question = DynMCQquestion.objects.create(q_text = "Question %d" % i, nb_ans = "2")
+			DynMCQanswer.objects.bulk_create([DynMCQanswer(q_num = question.q_num, ans_num = 1, ans_text = "right", right_ans = 1), DynMCQanswer(q_num = question.q_num, ans_num = 2, ans_text = "wrong", right_ans = 0)])
+			q_nums.append(question.q_num)
+		test.set_questions(q_nums, [])
+		Pass_DynMCQTest_Info.objects.bulk_create([Pass_DynMCQTest_Info(id_test = BENCH_TEST, id_student = id_student, attempt = 1) for id_student in students])
+		#The submissions update the statistics of the test (the same row for all the students)
+		rebuild_statistics(test)
+		return test, q_nums
+
+	def submit(self, id_student):
+		"""Saves the answers of a student, returns the time taken"""
+		info = Pass_DynMCQTest_Info.objects.get(id_test = BENCH_TEST, id_student = id_student, attempt = 1)
+		mcq_answers = [Pass_DynMCQTest(id_test = BENCH_TEST, id_student = id_student, attempt = 1, q_num = str(q_num), r_ans = "1") for q_num in self.q_nums]
+		start = time.perf_counter()
+		save_submission(info, mcq_answers, [], len(self.q_nums), timezone.now(), [])
+		return time.perf_counter() - start
+
+	def writer(self, students, latencies, errors):
+		try:
+			while True:
+				try:
+					id_student = students.get_nowait()
+				except queue.Empty:
+					return
+				try:
+					latencies.append(self.submit(id_student))
+				except OperationalError as error:
+					errors.append(str(error))
+		finally:
+			connection.close()
+
+	def reader(self, stop, reads, errors):
+		try:
+			while not stop.is_set():
+				try:
+					for row in results_rows(self.test):
+						pass
+					reads.append(1)
+				except OperationalError as error:
+					errors.append(str(error))
+		finally:
+			connection.close()
+
+	def run(self, database, pragmas, nb_students, nb_threads, nb_readers):
+		"""Runs the submissions on a copy of the scratch database with the given pragmas"""
+		connections['default'].close()
+		connections.databases['default']['NAME'] = database
+		with override_settings(TESTS_SQLITE_PRAGMAS = pragmas):
+			students = ['s%d' % i for i in range(nb_students)]
+			self.test, self.q_nums = self.seed(students)
+			profile = sqlite_pragmas(connection)
+			todo = queue.Queue()
+			for id_student in students:
+				todo.put(id_student)
+			latencies, write_errors, reads, read_errors = [], [], [], []
+			stop = threading.Event()
+			readers = [threading.Thread(target = self.reader, args = (stop, reads, read_errors)) for i in range(nb_readers)]
+			writers = [threading.Thread(target = self.writer, args = (todo, latencies, write_errors)) for i in range(nb_threads)]
+			start = time.perf_counter()
+			for thread in readers + writers:
+				thread.start()
+			for thread in writers:
+				thread.join()
+			total = time.perf_counter() - start
+			stop.set()
+			for thread in readers:
+				thread.join()
+			saved = Pass_DynMCQTest_Info.objects.filter(id_test = BENCH_TEST, mark__isnull = False).count()
+			connection.close()
+		return profile, total, np.array(latencies or [0]), saved, write_errors, len(reads), read_errors
+
+	def handle(self, *args, **options):
+		if connections.databases['default']['ENGINE'] != 'django.db.backends.sqlite3':
+			self.stderr.write("The benchmark runs on SQLite, the database of the settings is not used")
+		profiles = (('previous', PREVIOUS_PRAGMAS), ('tuned', get_pragmas()))
+		#The tables are created once, each run starts from a copy
+		with override_settings(TESTS_SQLITE_PRAGMAS = PREVIOUS_PRAGMAS), scratch_database() as template:
+			connections.databases['default']['CONN_MAX_AGE'] = 0
+			self.stdout.write("%d submissions by %d threads, %d readers exporting the results" % (options['students'], options['threads'], options['readers']))
+			self.stdout.write("%8s %8s %6s %10s %12s %10s %10s %8s %12s %8s" % ("profile", "journal", "sync", "timeout", "total (s)", "p50 (ms)", "p95 (ms)", "saved", "lock errors", "exports"))
+			for name, pragmas in profiles:
+				connection.close()
+				database = os.path.join(os.path.dirname(template), '%s.sqlite3' % name)
+				shutil.copy(template, database)
+				profile, total, latencies, saved, write_errors, reads, read_errors = self.run(database, pragmas, options['students'], options['threads'], options['readers'])
+				locked = sum('locked' in error for error in write_errors + read_errors)
+				self.stdout.write("%8s %8s %6s %10s %12.2f %10.1f %10.1f %8d %12d %8d" % (name, profile['journal_mode'], profile['synchronous'], profile['busy_timeout'], total, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 95) * 1000, saved, locked, reads))
+				for error in sorted(set(write_errors + read_errors)):
+					self.stdout.write("    %s" % error)
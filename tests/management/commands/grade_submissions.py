@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tests.models import Grading_Job
+from tests.submissions import drain_queue
+
+
+class Command(BaseCommand):
+	help = "Grade the submissions queued by the pass page when TESTS_ASYNC_GRADING is enabled"
+
+	def add_arguments(self, parser):
+		parser.add_argument('--once', action='store_true', help="Grade the pending submissions then exit")
+		parser.add_argument('--batch-size', type=int, default=100, help="Number of submissions claimed at a time")
+		parser.add_argument('--sleep', type=float, default=1.0, help="Seconds to wait when the queue is empty")
+		parser.add_argument('--requeue', action='store_true', help="Put back in the queue the jobs left running by a stopped worker and the failed jobs")
+
+	def handle(self, *args, **options):
+		if options['requeue']:
+			nb_requeued = Grading_Job.objects.filter(status__in = [Grading_Job.RUNNING, Grading_Job.FAILED]).update(status = Grading_Job.PENDING)
+			self.stdout.write("%d job(s) put back in the queue" % nb_requeued)
+		while True:
+			nb_graded, nb_failed = drain_queue(options['batch_size'])
+			if nb_failed:
+				self.stderr.write("%d submission(s) could not be graded, see the log (--requeue to grade them again)" % nb_failed)
+			if nb_graded or nb_failed:
+				self.stdout.write("%d submission(s) graded" % nb_graded)
+				#The queue may still contain jobs
+				continue
+			if options['once']:
+				break
+			time.sleep(options['sleep'])
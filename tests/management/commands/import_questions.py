@@ -0,0 +1,29 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tests.question_bank import read_questions,import_questions
+
+
+class Command(BaseCommand):
+	help = "Import a question bank (JSON or CSV file) in a single transaction"
+
+	def add_arguments(self, parser):
+		parser.add_argument('path', help="JSON or CSV file of questions")
+		parser.add_argument('--format', choices=('json', 'csv'), help="Format of the file, from its extension by default")
+		parser.add_argument('--dry-run', action='store_true', help="Check and insert the questions, then roll back")
+
+	def handle(self, *args, **options):
+		file_format = options['format'] or options['path'].lower().rsplit('.', 1)[-1]
+		try:
+			with open(options['path'], newline='', encoding='utf-8-sig') as questions_file:
+				questions = read_questions(questions_file.read(), file_format)
+			with transaction.atomic():
+				nb_mcq, nb_normal, nb_answers = import_questions(questions)
+				if options['dry_run']:
+					transaction.set_rollback(True)
+		except OSError as error:
+			raise CommandError(error)
+		except ValidationError as error:
+			raise CommandError("\n".join(error.messages))
+		self.stdout.write("%d MCQ question(s) (%d answers) and %d question(s) %s" % (nb_mcq, nb_answers, nb_normal, "checked" if options['dry_run'] else "imported"))
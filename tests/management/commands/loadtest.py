@@ -0,0 +1,182 @@
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group,User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tests.assembly import get_test_questions
+from tests.db_tuning import scratch_database
+from tests.models import DynMCQanswer,DynMCQInfo,DynMCQquestion,Dynquestion,Pass_DynMCQTest_Info
+
+LOAD_TEST = 'load'
+LOAD_GROUP = 'load_group'
+NB_ANSWERS = 4
+
+#Requests of a cycle of a student, in their order
+STEPS = ('menu', 'pass page', 'submission')
+
+
+class Command(BaseCommand):
+	help = "Simulate an exam session on a scratch database : a mixed test is launched, then the students open the menu, open the pass page and submit their answers at the same time"
+
+	def add_arguments(self, parser):
+		parser.add_argument('--students', type=int, default=200, help="Number of students")
+		parser.add_argument('--concurrency', type=int, default=16, help="Number of students sending requests at the same time")
+		parser.add_argument('--cycles', type=int, default=1, help="Number of attempts of each student")
+		parser.add_argument('--mcq', type=int, default=10, help="Number of MCQ questions of the test")
+		parser.add_argument('--normal', type=int, default=5, help="Number of free-text questions of the test")
+		parser.add_argument('--think', type=float, default=0, help="Seconds waited by a student between two requests")
+		parser.add_argument('--right', type=float, default=0.7, help="Probability of a right answer")
+		parser.add_argument('--seed', type=int, default=0, help="Seed of the random answers")
+
+	def seed(self, nb_students, nb_mcq, nb_normal):
+		"""Creates the students in their group, a teacher and the test with its questions"""
+		rng = random.Random(self.random_seed)
+		password = make_password(None)
+		group = Group.objects.create(name = LOAD_GROUP)
+		User.objects.bulk_create([User(username = 'load%d' % i, password = password) for i in range(nb_students)])
+		students = list(User.objects.filter(username__startswith = 'load').order_by('id'))
+		User.groups.through.objects.bulk_create([User.groups.through(user_id = student.pk, group_id = group.pk) for student in students])
+		teacher = User.objects.create(username = 'teacher', password = password, is_superuser = True)
+		mcq_questions = []
+		answers = []
+		for i in range(nb_mcq):
+			question = DynMCQquestion.objects.create(q_text = "Question %d" % i, nb_ans = str(NB_ANSWERS))
+			right = rng.randint(1, NB_ANSWERS)
+			answers.extend(DynMCQanswer(q_num = question.q_num, ans_num = ans_num, ans_text = "Answer %d" % ans_num, right_ans = 1 if ans_num == right else 0) for ans_num in range(1, NB_ANSWERS + 1))
+			mcq_questions.append(question.q_num)
+		DynMCQanswer.objects.bulk_create(answers)
+		normal_questions = [Dynquestion.objects.create(q_text = "Free question %d" % i, r_text = "answer%d" % i).q_num for i in range(nb_normal)]
+		test = DynMCQInfo.objects.create(id_test = LOAD_TEST, title = "Load test")
+		test.set_questions(mcq_questions, normal_questions)
+		return teacher, students
+
+	def launch(self, teacher, nb_questions):
+		"""Launches the test for the group of the students as a teacher does, then displays it (the clock starts)"""
+		client = Client()
+		client.force_login(teacher)
+		#Enough time for the whole session
+		response = client.post(reverse('tests:Launch Specific McqDyn', kwargs = {'input_id_test': LOAD_TEST}), {'activated_for': LOAD_GROUP, 'time': '%d:00' % (60 + nb_questions)})
+		test = DynMCQInfo.objects.get(id_test = LOAD_TEST)
+		if response.status_code != 200 or not test.activated_groups.filter(name = LOAD_GROUP).exists():
+			raise CommandError("The test could not be launched (status %d)" % response.status_code)
+		response = client.get(reverse('tests:In Launch Specific DynMcq', kwargs = {'input_id_test': LOAD_TEST}))
+		if response.status_code != 200:
+			raise CommandError("The launched test could not be displayed (status %d)" % response.status_code)
+		return test
+
+	def answers(self, rng):
+		"""Returns the posted answers of a student, in the order of the questions of the pass page"""
+		data = {'form-TOTAL_FORMS': str(max(len(self.mcq_questions), len(self.normal_questions))), 'form-INITIAL_FORMS': '0', 'form-MAX_NUM_FORMS': ''}
+		for i, question in enumerate(self.mcq_questions):
+			choices = self.mcq_answers[question.q_num]
+			if rng.random() < self.right:
+				data['form-%d-r_ans' % i] = str([answer.ans_num for answer in choices if answer.right_ans == 1][0])
+			else:
+				data['form-%d-r_ans' % i] = str(rng.choice(choices).ans_num)
+		for i, question in enumerate(self.normal_questions):
+			data['form-%d-r_answer' % i] = question.r_text if rng.random() < self.right else "wrong"
+		return data
+
+	def request(self, step, send, url, expected):
+		"""Sends a request and records its time, its number of queries and its errors"""
+		error = None
+		with CaptureQueriesContext(connection) as queries:
+			start = time.perf_counter()
+			try:
+				response = send(url)
+				if response.status_code != expected:
+					error = "%s : status %d" % (step, response.status_code)
+			except Exception as exception:
+				error = "%s : %s" % (step, type(exception).__name__)
+			elapsed = time.perf_counter() - start
+		with self.lock:
+			self.latencies[step].append(elapsed)
+			self.queries[step].append(len(queries))
+			if error is not None:
+				self.errors[step].append(error)
+		return error is None
+
+	def student(self, user, rng):
+		"""Cycles of a student : menu of the test (creates the attempt), pass page, submission"""
+		client = Client()
+		client.force_login(user)
+		for attempt in range(1, self.cycles + 1):
+			pass_url = reverse('tests:Pass dynmcqtest', kwargs = {'input_id_test': LOAD_TEST, 'input_id_student': user.username, 'input_attempt': attempt})
+			if not self.request('menu', client.get, reverse('tests:Menu Pass dynmcqtest', kwargs = {'input_id_test': LOAD_TEST}), 200):
+				return
+			time.sleep(self.think)
+			if not self.request('pass page', client.get, pass_url, 200):
+				return
+			time.sleep(self.think)
+			answers = self.answers(rng)
+			#The pass view redirects after a saved submission
+			self.request('submission', lambda url: client.post(url, answers), pass_url, 302)
+			time.sleep(self.think)
+
+	def worker(self, students):
+		try:
+			while True:
+				try:
+					user, rng = students.get_nowait()
+				except queue.Empty:
+					return
+				self.student(user, rng)
+		finally:
+			connection.close()
+
+	def report(self, total, nb_students):
+		self.stdout.write("%d students, %d at a time, %d cycles : %.2f s" % (nb_students, self.concurrency, self.cycles, total))
+		self.stdout.write("%12s %9s %8s %8s %10s %10s %10s %12s %12s" % ("request", "count", "errors", "rate", "p50 (ms)", "p95 (ms)", "p99 (ms)", "queries avg", "queries max"))
+		nb_requests = 0
+		nb_errors = 0
+		for step in STEPS:
+			latencies = np.array(self.latencies[step] or [0]) * 1000
+			queries = np.array(self.queries[step] or [0])
+			count = len(self.latencies[step])
+			nb_requests += count
+			nb_errors += len(self.errors[step])
+			self.stdout.write("%12s %9d %8d %7.1f%% %10.1f %10.1f %10.1f %12.1f %12d" % (step, count, len(self.errors[step]), 100.0 * len(self.errors[step]) / max(count, 1), np.percentile(latencies, 50), np.percentile(latencies, 95), np.percentile(latencies, 99), queries.mean(), queries.max()))
+		self.stdout.write("Throughput : %.1f requests/s, %.1f submissions/s, error rate %.1f%%" % (nb_requests / total, (len(self.latencies['submission']) - len(self.errors['submission'])) / total, 100.0 * nb_errors / max(nb_requests, 1)))
+		for error in sorted(set(error for step in STEPS for error in self.errors[step])):
+			self.stdout.write("    %s" % error)
+		submitted = Pass_DynMCQTest_Info.objects.filter(id_test = LOAD_TEST, time__isnull = False)
+		marks = list(submitted.values_list('mark', flat=True))
+		self.stdout.write("Saved submissions : %d, average mark %.2f / %d" % (len(marks), np.mean(marks) if marks else 0, len(self.mcq_questions) + len(self.normal_questions)))
+
+	def handle(self, *args, **options):
+		if options['students'] < 1 or options['concurrency'] < 1 or options['cycles'] < 1:
+			raise CommandError("--students, --concurrency and --cycles must be positive")
+		self.concurrency = options['concurrency']
+		self.cycles = options['cycles']
+		self.think = options['think']
+		self.right = options['right']
+		self.random_seed = options['seed']
+		self.lock = threading.Lock()
+		self.latencies = {step: [] for step in STEPS}
+		self.queries = {step: [] for step in STEPS}
+		self.errors = {step: [] for step in STEPS}
+		with scratch_database():
+			teacher, students = self.seed(options['students'], options['mcq'], options['normal'])
+			test = self.launch(teacher, options['mcq'] + options['normal'])
+			#The questions in the order of the pass page, to post the answers
+			self.mcq_questions, self.normal_questions, self.mcq_answers = get_test_questions(test)
+			todo = queue.Queue()
+			for i, user in enumerate(students):
+				todo.put((user, random.Random(self.random_seed * 1000003 + i)))
+			threads = [threading.Thread(target = self.worker, args = (todo,)) for i in range(self.concurrency)]
+			start = time.perf_counter()
+			for thread in threads:
+				thread.start()
+			for thread in threads:
+				thread.join()
+			total = time.perf_counter() - start
+			self.report(total, len(students))
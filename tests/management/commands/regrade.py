@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tests.models import DynMCQInfo
+from tests.attempts import ATTEMPTS_CHUNK_SIZE
+from tests.regrading import regrade_test
+
+
+class Command(BaseCommand):
+	help = "Grade again all the submitted attempts of a test with its current answer key"
+
+	def add_arguments(self, parser):
+		parser.add_argument('id_test', help="Id of the test")
+		parser.add_argument('--chunk-size', type=int, default=ATTEMPTS_CHUNK_SIZE, help="Number of attempts read and written at a time")
+		parser.add_argument('--workers', type=int, default=1, help="Number of processes grading the attempts")
+		parser.add_argument('--dry-run', action='store_true', help="Show the changed marks without writing them")
+		parser.add_argument('--show', type=int, default=50, help="Maximal number of changed marks listed")
+
+	def handle(self, *args, **options):
+		DynMCQTestInfo = DynMCQInfo.objects.filter(id_test = options['id_test']).first()
+		if DynMCQTestInfo is None:
+			raise CommandError("The test %s does not exist" % options['id_test'])
+		report = regrade_test(DynMCQTestInfo, max(options['chunk_size'], 1), max(options['workers'], 1), options['dry_run'])
+		self.stdout.write("%d attempt(s) graded in %.2f s (%.0f attempts/s)" % (report.nb_attempts, report.elapsed, report.throughput()))
+		self.stdout.write("%d mark(s) %s" % (len(report.changed), "to change" if options['dry_run'] else "changed"))
+		for id_student, attempt, old_mark, mark in report.changed[:options['show']]:
+			self.stdout.write("  student %s attempt %s : %s -> %s" % (id_student, attempt, old_mark, mark))
+		if len(report.changed) > options['show']:
+			self.stdout.write("  ...")
+		if report.unknown_penalty:
+			self.stdout.write("%d attempt(s) not graded, penalty unknown (submitted before the penalty was recorded)" % len(report.unknown_penalty))
+			for id_student, attempt in report.unknown_penalty[:options['show']]:
+				self.stdout.write("  student %s attempt %s" % (id_student, attempt))
+			if len(report.unknown_penalty) > options['show']:
+				self.stdout.write("  ...")
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class MarkStatistics(object):
+	"""Summary statistics of the marks of a test, computed once from the number of submissions of each mark :
+
+	Attributes :
+
+	counts (numpy array) : counts[mark] is the number of submissions with this mark
+	count (int) : number of submissions
+	total (int) : sum of the marks
+	mean (float) : average mark (None without submission)
+	min, max (int) : lowest and highest marks (None without submission)
+	q1, median, q3 : first quarter, median and third quarter, with the same positions as Q1, Mediane and Q3 in views.py
+
+	Function linked to the class :
+
+	from_histogram : builds the statistics from a dict mark -> number of submissions
+	nth : returns the n-th mark (from 0) of the sorted marks
+	marks : returns the sorted marks
+	frequences : returns the frequences and cumulated frequences of each mark, as Frequences in views.py
+	"""
+	def __init__(self, marks=None, counts=None):
+		"""marks is a sequence of non negative integer marks, counts can be given instead of marks"""
+		if counts is None:
+			marks = np.asarray(marks if marks is not None else [], dtype=np.int64)
+			#Marks are small integers : counting them replaces the sort
+			counts = np.bincount(marks) if marks.size else np.zeros(1, dtype=np.int64)
+		self.counts = np.asarray(counts, dtype=np.int64)
+		self.cumulative = np.cumsum(self.counts)
+		self.count = int(self.cumulative[-1])
+		self.total = int(np.dot(np.arange(len(self.counts)), self.counts))
+		self.mean = self.min = self.max = self.q1 = self.median = self.q3 = None
+		if self.count > 0:
+			n = self.count
+			present = np.flatnonzero(self.counts)
+			self.mean = self.total / n
+			self.min = int(present[0])
+			self.max = int(present[-1])
+			if n%4 == 0:
+				self.q1, self.q3 = self.nth([n//4-1, 3*n//4-1])
+			else:
+				self.q1, self.q3 = self.nth([n//4, 3*n//4])
+			if n%2 == 0:
+				low, high = self.nth([(n-1)//2, n//2])
+				self.median = (low + high) / 2
+			else:
+				self.median = self.nth(n//2)
+
+	@classmethod
+	def from_histogram(cls, histogram):
+		"""histogram is a dict mark -> number of submissions (see Test_Statistics.get_histogram)"""
+		counts = np.zeros(max(histogram) + 1 if histogram else 1, dtype=np.int64)
+		for mark, count in histogram.items():
+			counts[mark] = count
+		return cls(counts=counts)
+
+	def nth(self, n):
+		"""n is a position or a list of positions in the sorted marks"""
+		if np.any(np.asarray(n) >= self.count) or np.any(np.asarray(n) < 0):
+			raise IndexError(n)
+		marks = np.searchsorted(self.cumulative, n, side='right')
+		if np.ndim(marks) == 0:
+			return int(marks)
+		return [int(mark) for mark in marks]
+
+	def marks(self):
+		return np.repeat(np.arange(len(self.counts)), self.counts)
+
+	def frequences(self, nb_marks=None):
+		"""Returns a list of (frequence, cumulated frequence) in % for the marks 0 to nb_marks, formatted as Frequences"""
+		if nb_marks is None:
+			nb_marks = len(self.counts) - 1
+		counts = np.zeros(max(nb_marks + 1, len(self.counts)), dtype=np.int64)
+		counts[:len(self.counts)] = self.counts
+		freq = 100 * counts / self.count
+		cum_freq = np.cumsum(freq)
+		return [("%.2f" % f, "%.2f" % c) for f, c in zip(freq, cum_freq)]
@@ -0,0 +1,71 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:25
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def parse_questions(questions):
+    """Split the old "a[1,5,6]b[1,9,11]" string into the MCQ ids and the normal question ids."""
+    mcq_part, _, normal_part = questions.partition('b')
+    return [int(q_num) for q_num in re.findall(r'\d+', mcq_part)], [int(q_num) for q_num in re.findall(r'\d+', normal_part)]
+
+
+def questions_to_rows(apps, schema_editor):
+    DynMCQInfo = apps.get_model('tests', 'DynMCQInfo')
+    DynMCQTest_Question = apps.get_model('tests', 'DynMCQTest_Question')
+    rows = []
+    for test in DynMCQInfo.objects.exclude(questions=''):
+        mcq_questions, normal_questions = parse_questions(test.questions)
+        position = 0
+        for q_type, q_nums in (('a', mcq_questions), ('b', normal_questions)):
+            for q_num in q_nums:
+                rows.append(DynMCQTest_Question(test=test, q_type=q_type, q_num=q_num, position=position))
+                position += 1
+    DynMCQTest_Question.objects.bulk_create(rows)
+
+
+def rows_to_questions(apps, schema_editor):
+    DynMCQInfo = apps.get_model('tests', 'DynMCQInfo')
+    DynMCQTest_Question = apps.get_model('tests', 'DynMCQTest_Question')
+    for test in DynMCQInfo.objects.all():
+        rows = DynMCQTest_Question.objects.filter(test=test).order_by('position')
+        mcq_questions = [str(row.q_num) for row in rows if row.q_type == 'a']
+        normal_questions = [str(row.q_num) for row in rows if row.q_type == 'b']
+        if mcq_questions or normal_questions:
+            test.questions = 'a' + (str(mcq_questions) if mcq_questions else '') + 'b' + (str(normal_questions) if normal_questions else '')
+            test.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0008_auto_20200318_1701'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DynMCQTest_Question',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('q_type', models.CharField(choices=[('a', 'MCQ question'), ('b', 'Normal question')], max_length=1)),
+                ('q_num', models.IntegerField()),
+                ('position', models.IntegerField()),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_questions', to='tests.DynMCQInfo')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='dynmcqtest_question',
+            index=models.Index(fields=['q_type', 'q_num'], name='tests_testq_question_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dynmcqtest_question',
+            unique_together={('test', 'position')},
+        ),
+        migrations.RunPython(questions_to_rows, rows_to_questions),
+        migrations.RemoveField(
+            model_name='dynmcqinfo',
+            name='questions',
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0009_dynmcqtest_question'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Grading_Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('id_test', models.CharField(max_length=10)),
+                ('id_student', models.CharField(max_length=10)),
+                ('attempt', models.IntegerField()),
+                ('penalty', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done')], default='pending', max_length=10)),
+                ('submitted', models.DateTimeField(auto_now_add=True)),
+                ('graded', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='grading_job',
+            index=models.Index(fields=['status', 'id'], name='tests_gradingjob_status_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='grading_job',
+            unique_together={('id_test', 'id_student', 'attempt')},
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0010_grading_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Test_Statistics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('id_test', models.CharField(max_length=10, unique=True)),
+                ('nb_attempts', models.IntegerField(default=0)),
+                ('marks_sum', models.IntegerField(default=0)),
+                ('marks_histogram', models.TextField(default='{}')),
+                ('version', models.CharField(blank=True, max_length=20, null=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Question_Statistics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('id_test', models.CharField(max_length=10)),
+                ('q_type', models.CharField(choices=[('a', 'MCQ question'), ('b', 'Normal question')], max_length=1)),
+                ('q_num', models.IntegerField()),
+                ('nb_right', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('id_test', 'q_type', 'q_num')},
+            },
+        ),
+    ]
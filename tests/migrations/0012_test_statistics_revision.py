@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0011_test_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test_statistics',
+            name='revision',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0012_test_statistics_revision'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dynmcqanswer',
+            index=models.Index(fields=['q_num', 'right_ans'], name='tests_dynmcqans_right_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pass_dynmcqtest_info',
+            index=models.Index(fields=['id_student', 'id_test'], name='tests_passinfo_student_idx'),
+        ),
+    ]
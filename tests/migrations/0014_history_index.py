@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0013_attempt_answer_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pass_dynmcqtest_info',
+            name='tests_passinfo_student_idx',
+        ),
+        migrations.AddIndex(
+            model_name='pass_dynmcqtest_info',
+            index=models.Index(fields=['id_student', 'id'], name='tests_passinfo_student_idx'),
+        ),
+    ]
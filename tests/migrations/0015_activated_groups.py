@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:36
+
+from django.db import migrations, models
+
+
+def parse_groups(activated_for):
+    """Split the "['esilv_IF1', 'esilv_IF2']" string saved by the launch form into group names."""
+    names = activated_for.replace("'", "").replace("[", "").replace("]", "").split(',')
+    return [name.strip() for name in names if name.strip()]
+
+
+def groups_to_relation(apps, schema_editor):
+    DynMCQInfo = apps.get_model('tests', 'DynMCQInfo')
+    Group = apps.get_model('auth', 'Group')
+    for test in DynMCQInfo.objects.exclude(activated_for=''):
+        test.activated_groups.set(Group.objects.filter(name__in=parse_groups(test.activated_for)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('tests', '0014_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dynmcqinfo',
+            name='activated_groups',
+            field=models.ManyToManyField(blank=True, related_name='activated_tests', to='auth.Group'),
+        ),
+        migrations.RunPython(groups_to_relation, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:38
+
+import datetime
+import re
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def parse_release_time(release_time):
+    """Read the release_time saved by the launched test page, str(datetime.today()) cut to 15 characters ("2020-11-25 23:5").
+
+    Only the tens of the minutes are kept : the latest possible time is taken, so that no student of a running test
+    gets a penalty because of the conversion. datetime.today() gave the time of the server, in the TIME_ZONE of the settings.
+    """
+    match = re.match(r'^(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d)', release_time.strip())
+    if match is None:
+        return None
+    year, month, day, hour, minute_tens = [int(part) for part in match.groups()]
+    try:
+        naive = datetime.datetime(year, month, day, hour, minute_tens * 10) + datetime.timedelta(minutes=9, seconds=59)
+    except ValueError:
+        return None
+    return timezone.make_aware(naive, timezone.get_default_timezone())
+
+
+def parse_duration(time):
+    """Read the "min:sec" or "h:min:sec" time of a test in seconds, None if it is not valid."""
+    parts = time.strip().split(':')
+    if len(parts) > 3 or not all(part.isdigit() for part in parts):
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def convert_release_time(apps, schema_editor):
+    """Keep the clock of the running tests. A test whose release time or time cannot be read gets no clock :
+    it starts again when the launched test is displayed (see exam_clock.open_test)."""
+    DynMCQInfo = apps.get_model('tests', 'DynMCQInfo')
+    for test in DynMCQInfo.objects.using(schema_editor.connection.alias).exclude(release_time=''):
+        release_at = parse_release_time(test.release_time)
+        seconds = parse_duration(test.time)
+        if release_at is None or seconds is None:
+            continue
+        test.release_at = release_at
+        test.deadline_at = release_at + datetime.timedelta(seconds=seconds)
+        test.save(update_fields=['release_at', 'deadline_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0015_activated_groups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dynmcqinfo',
+            name='deadline_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dynmcqinfo',
+            name='release_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pass_dynmcqtest_info',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(convert_release_time, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='dynmcqinfo',
+            name='release_time',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0016_exam_clock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pass_dynmcqtest_info',
+            name='penalty',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
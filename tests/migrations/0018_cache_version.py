@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0017_attempt_penalty'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cache_Version',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('version', models.BigIntegerField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0018_cache_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='grading_job',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
@@ -1,7 +1,10 @@
-from django.db import models
+import json
+
+from django.db import models, transaction
 from django.urls import reverse
 from django.contrib.auth.models import Permission, Group
 from django.contrib.contenttypes.models import ContentType
+from .caches import bump_version,invalidate_test
 
 ## Standard tests ##
 			
@@ -13,10 +16,12 @@ class DynMCQInfo(models.Model):
 
 	id_test (string) : id of the test, primary_key
 	title (string) : title of the test
-	questions (string) : list of id questions of the test (a[1,4,6]b[8,1,2] => a is for QCM questions and b for normal questions)
+	test_questions (DynMCQTest_Question) : questions of the test in their order (see DynMCQTest_Question)
 	time (string) : time for pass the test (5:30 => 5 min 30 sec)
-	activated_for (string) : list of groups that can pass the test 
-	release_time (string) : date of the release time of the test
+	activated_for (string) : list of groups that can pass the test, as filled in the launch form
+	activated_groups (Group) : groups that can pass the test (read by the list of the tests of the students)
+	release_at (datetime) : release time of the test, set when the test is launched (see exam_clock.py)
+	deadline_at (datetime) : end of the test (release_at + time)
 
 	Function linked to the model :
 
@@ -29,15 +34,19 @@ class DynMCQInfo(models.Model):
 	get_launch : render the page to launch the test
 	get_in_launch : render the page when the test is launch
 	stop_launch : render the page to stop the test
+	get_question_ids : returns the ids of the MCQ questions and of the normal questions of the test
+	set_questions : replaces the questions of the test
+	set_activated_groups : replaces the groups that can pass the test
 	"""			
 	
 	id_test = models.CharField(max_length=10, primary_key=True)
 	title = models.TextField()
 	print_test = models.BooleanField(default=False)
-	questions = models.TextField(default="")
 	time = models.CharField(max_length=10,default="")
 	activated_for = models.TextField(default="")
-	release_time = models.CharField(max_length=15, default="")
+	activated_groups = models.ManyToManyField(Group, blank=True, related_name='activated_tests')
+	release_at = models.DateTimeField(null=True, blank=True)
+	deadline_at = models.DateTimeField(null=True, blank=True)
 
 	def get_absolute_url(self):
 		return reverse('tests:Create DynMCQTest', kwargs={'input_id_test': self.id_test})
@@ -67,6 +76,63 @@ class DynMCQInfo(models.Model):
 	def stop_launch(self):
 		return reverse('tests:Stop mcq launch', kwargs={'input_id_test': self.id_test})
 		
+	def get_question_ids(self):
+		mcq_questions = []
+		normal_questions = []
+		for q_type, q_num in self.test_questions.order_by('position').values_list('q_type', 'q_num'):
+			if q_type == DynMCQTest_Question.MCQ:
+				mcq_questions.append(q_num)
+			else:
+				normal_questions.append(q_num)
+		return mcq_questions, normal_questions
+		
+	def set_questions(self, mcq_questions, normal_questions):
+		#MCQ questions are placed before the normal questions, as on the pages of the test
+		rows = []
+		for q_num in mcq_questions:
+			rows.append(DynMCQTest_Question(test=self, q_type=DynMCQTest_Question.MCQ, q_num=int(q_num), position=len(rows)))
+		for q_num in normal_questions:
+			rows.append(DynMCQTest_Question(test=self, q_type=DynMCQTest_Question.NORMAL, q_num=int(q_num), position=len(rows)))
+		with transaction.atomic():
+			self.test_questions.all().delete()
+			DynMCQTest_Question.objects.bulk_create(rows)
+		invalidate_test(self.id_test)
+		
+	def set_activated_groups(self, group_names):
+		#The lists of available tests cached for each set of groups are invalidated (see availability.py)
+		with transaction.atomic():
+			self.activated_groups.set(Group.objects.filter(name__in = group_names))
+		bump_version('available_tests')
+		
+		
+class DynMCQTest_Question(models.Model):
+	"""Model linking a DynMCQInfo test to its questions, in the order of the test :
+	
+	Attributes :
+	
+	test (DynMCQInfo) : the test
+	q_type (string) : 'a' for a DynMCQquestion question, 'b' for a Dynquestion question
+	q_num (int) : id of the question
+	position (int) : position of the question in the test
+	"""
+	MCQ = 'a'
+	NORMAL = 'b'
+	Q_TYPES = (
+		(MCQ, 'MCQ question'),
+		(NORMAL, 'Normal question'),
+	)
+	
+	test = models.ForeignKey(DynMCQInfo, on_delete=models.CASCADE, related_name='test_questions')
+	q_type = models.CharField(max_length=1, choices=Q_TYPES)
+	q_num = models.IntegerField()
+	position = models.IntegerField()
+	
+	class Meta:
+		unique_together = ('test', 'position')
+		indexes = [
+			models.Index(fields=['q_type', 'q_num'], name='tests_testq_question_idx'),
+		]
+		
 		
 class Dynquestion(models.Model):
 	"""Model of the first type of question, the normal question with text answer :
@@ -172,6 +238,10 @@ class DynMCQanswer(models.Model):
 		
 	class Meta:
 		unique_together = ('q_num', 'ans_num')
+		indexes = [
+			#Right answers of the questions of a test (answer keys)
+			models.Index(fields=['q_num', 'right_ans'], name='tests_dynmcqans_right_idx'),
+		]
 		
 	def get_absolute_url_edit(self):
 		return reverse('tests:Edit DynMCQanswer', kwargs={'input_q_num': self.q_num,'input_ans_num': self.ans_num})
@@ -189,21 +259,31 @@ class Pass_DynMCQTest_Info(models.Model):
 	id_student (string) : id of the student
 	attempt (int) : number of attempt of the user on this test
 	mark (int) : mark of the pass test
+	penalty (int) : late penalty removed from the mark (kept to grade the pass test again), None when it is unknown (attempts submitted before the penalty was recorded)
 	time (string) : released time of the pass test
+	started_at (datetime) : time when the student opened the pass test the first time
 	
 	Function linked to the model :
 
 	get_absolute_url : render the page to pass the test
 	get_absolute_url_display : render the page to display the pass test
+	get_absolute_url_result : render the page waiting for the mark of the pass test
+	get_result : returns the grading state of the pass test (JSON)
 	"""
 	id_test = models.CharField(max_length=10, null=True)
 	id_student = models.CharField(max_length=10, null=True)
 	attempt = models.IntegerField(null = True)
 	mark = models.IntegerField(null = True)
+	penalty = models.IntegerField(null = True, blank = True)
 	time = models.CharField(max_length=15, null=True)
+	started_at = models.DateTimeField(null=True, blank=True)
 	
 	class Meta:
 		unique_together = ('id_test', 'id_student','attempt')
+		indexes = [
+			#Attempts of a student from the newest (history), the unique index only serves the lookups by test
+			models.Index(fields=['id_student', 'id'], name='tests_passinfo_student_idx'),
+		]
 		
 	def get_absolute_url(self):
 		return reverse('tests:Pass dynmcqtest', kwargs={'input_id_test': self.id_test,'input_id_student': self.id_student,'input_attempt':self.attempt})
@@ -211,6 +291,12 @@ class Pass_DynMCQTest_Info(models.Model):
 	def get_absolute_url_display(self):
 		return reverse('tests:Display pass dynmcqtest', kwargs={'input_id_test': self.id_test,'input_id_student': self.id_student,'input_attempt':self.attempt})
 		
+	def get_absolute_url_result(self):
+		return reverse('tests:Submission pending', kwargs={'input_id_test': self.id_test,'input_id_student': self.id_student,'input_attempt':self.attempt})
+		
+	def get_result(self):
+		return reverse('tests:Submission result', kwargs={'input_id_test': self.id_test,'input_id_student': self.id_student,'input_attempt':self.attempt})
+		
 class Pass_DynMCQTest(models.Model):
 	"""Model of question answers of DynMCQquestion : 
 	
@@ -251,4 +337,98 @@ class Pass_DynquestionTest(models.Model):
 	class Meta:
 		unique_together = ('id_test', 'id_student','attempt','q_num')
 
-
+class Grading_Job(models.Model):
+	"""Model of the queue of submissions waiting to be graded by the grade_submissions command
+	(used when settings.TESTS_ASYNC_GRADING is True) :
+	
+	Attributes :
+	
+	id_test (string) : id of the passed test (DynMCQInfo id_test)
+	id_student (string) : id of the student
+	attempt (int) : number of attempt of the user on this test
+	penalty (int) : late penalty to remove from the mark, computed when the answers were sent
+	status (string) : 'pending', 'running', 'done' or 'failed' (an error occurred, put back in the queue by grade_submissions --requeue)
+	submitted (datetime) : time of the submission
+	graded (datetime) : time of the grading
+	"""
+	PENDING = 'pending'
+	RUNNING = 'running'
+	DONE = 'done'
+	FAILED = 'failed'
+	STATUSES = (
+		(PENDING, 'Pending'),
+		(RUNNING, 'Running'),
+		(DONE, 'Done'),
+		(FAILED, 'Failed'),
+	)
+	
+	id_test = models.CharField(max_length=10)
+	id_student = models.CharField(max_length=10)
+	attempt = models.IntegerField()
+	penalty = models.IntegerField(default=0)
+	status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+	submitted = models.DateTimeField(auto_now_add=True)
+	graded = models.DateTimeField(null=True, blank=True)
+	
+	class Meta:
+		unique_together = ('id_test', 'id_student','attempt')
+		indexes = [
+			models.Index(fields=['status', 'id'], name='tests_gradingjob_status_idx'),
+		]
+		
+class Test_Statistics(models.Model):
+	"""Model of the aggregated statistics of a test, updated at each graded submission (see aggregates.py) :
+	
+	Attributes :
+	
+	id_test (string) : id of the test (DynMCQInfo id_test)
+	nb_attempts (int) : number of graded submissions
+	marks_sum (int) : sum of the marks of the graded submissions
+	marks_histogram (string) : JSON object mark -> number of submissions with this mark
+	version (string) : version of the test (caches.get_test_version) when the statistics were built
+	revision (int) : number of updates since the statistics were built (keys the charts, see charts.py)
+	updated (datetime) : time of the last update
+	
+	Function linked to the model :
+	
+	get_histogram : returns the histogram as a dict {mark (int): number of submissions}
+	"""
+	id_test = models.CharField(max_length=10, unique=True)
+	nb_attempts = models.IntegerField(default=0)
+	marks_sum = models.IntegerField(default=0)
+	marks_histogram = models.TextField(default='{}')
+	version = models.CharField(max_length=20, null=True, blank=True)
+	revision = models.IntegerField(default=0)
+	updated = models.DateTimeField(auto_now=True)
+	
+	def get_histogram(self):
+		return {int(mark): count for mark, count in json.loads(self.marks_histogram).items()}
+		
+class Question_Statistics(models.Model):
+	"""Model of the number of right answers to a question of a test, updated with Test_Statistics :
+	
+	Attributes :
+	
+	id_test (string) : id of the test (DynMCQInfo id_test)
+	q_type (string) : 'a' for a DynMCQquestion question, 'b' for a Dynquestion question
+	q_num (int) : id of the question
+	nb_right (int) : number of graded submissions with a right answer to the question
+	"""
+	id_test = models.CharField(max_length=10)
+	q_type = models.CharField(max_length=1, choices=DynMCQTest_Question.Q_TYPES)
+	q_num = models.IntegerField()
+	nb_right = models.IntegerField(default=0)
+	
+	class Meta:
+		unique_together = ('id_test', 'q_type', 'q_num')
+		
+class Cache_Version(models.Model):
+	"""Model of the version of a cached object, shared by all the processes (web workers, grade_submissions) through the database (see caches.py) :
+	
+	Attributes :
+	
+	name (string) : name of the cached object (test:<id_test> for example)
+	version (int) : current version, every cache entry built for a previous version is stale
+	"""
+	name = models.CharField(max_length=100, unique=True)
+	version = models.BigIntegerField()
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.forms import formset_factory
+from django.template.loader import render_to_string
+
+from .forms import Pass_DynMCQTestForm,Pass_DynquestionTestForm
+from .assembly import get_test_questions
+from .caches import LRUCache,get_test_version
+
+#Rendered questions of the last opened tests, for the current process
+PASS_FRAGMENTS = LRUCache(getattr(settings, 'TESTS_PASS_FRAGMENT_CACHE_SIZE', 64))
+
+#Timeout of the rendered questions in the shared Django cache (they are invalidated by version anyway)
+PASS_FRAGMENT_TIMEOUT = getattr(settings, 'TESTS_PASS_FRAGMENT_TIMEOUT', 24 * 3600)
+
+
+def build_pass_forms(DynMCQTestInfo, data=None):
+	"""Function to build the formsets of the answers to the questions of a test
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+		data (QueryDict) : the posted answers, None for empty formsets
+	Return :
+		form_mcq_answers (formset of Pass_DynMCQTestForm) : one form for each MCQ question ([] without MCQ question)
+		form_normal_answers (formset of Pass_DynquestionTestForm) : one form for each normal question ([] without normal question)
+		DynMCQquestionTestList (list) : DynMCQquestion instances in the order of the test
+		DynquestionTestList (list) : Dynquestion instances in the order of the test
+	"""
+	#We get the questions and the answers of the MCQ questions
+	DynMCQquestionTestList, DynquestionTestList, DynMCQanswers = get_test_questions(DynMCQTestInfo)
+	form_mcq_answers = []
+	form_normal_answers = []
+	if DynMCQquestionTestList:
+		#A formset of Pass_DynMCQTestForm, one form for each question
+		PassDynMCQTestSet = formset_factory(Pass_DynMCQTestForm, extra = len(DynMCQquestionTestList))
+		form_mcq_answers = PassDynMCQTestSet(data)
+		#We put the answers of each questions in the choices for checkbox
+		for ans, question in zip(form_mcq_answers, DynMCQquestionTestList):
+			#Filling the choices as list of [ans_num,ans_text]
+			ans.fields['r_ans'].choices = [[answer.ans_num, answer.ans_text] for answer in DynMCQanswers[question.q_num]]
+	if DynquestionTestList:
+		PassDynquestionTestSet = formset_factory(Pass_DynquestionTestForm, extra = len(DynquestionTestList))
+		form_normal_answers = PassDynquestionTestSet(data)
+	return form_mcq_answers, form_normal_answers, DynMCQquestionTestList, DynquestionTestList
+
+def render_questions(form_mcq_answers, form_normal_answers, DynMCQquestionTestList, DynquestionTestList):
+	"""Function to render the questions of the pass page with the forms of the answers (see build_pass_forms)
+	Return :
+		fragment (str) : HTML of the questions, without anything depending on the student
+	"""
+	context = {
+		'form_mcq_answers': form_mcq_answers,
+		'form_normal_answers': form_normal_answers,
+		#Each question with the form of its answer, instead of looking up the forms by index in the template
+		'mcq_blocks': list(zip(DynMCQquestionTestList, form_mcq_answers)),
+		'normal_blocks': list(zip(DynquestionTestList, form_normal_answers)),
+	}
+	return render_to_string('pass_tests/dynMCQtest_questions.html', context)
+
+def fragment_key(id_test, version):
+	return 'pass_fragment:%s:%s' % (id_test, version)
+
+def get_questions_fragment(DynMCQTestInfo):
+	"""Function to get the rendered questions of a test, the same for every student :
+	First from the cache of the process, then from the shared Django cache and finally rendered from the database.
+	The fragment is rendered again when the version of the test changes (see caches.invalidate_test).
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+	Return :
+		fragment (str) : HTML of the questions
+	"""
+	id_test = DynMCQTestInfo.id_test
+	version = get_test_version(id_test)
+	local = PASS_FRAGMENTS.get(id_test)
+	if local is not None and local[0] == version:
+		return local[1]
+	shared_key = fragment_key(id_test, version)
+	fragment = cache.get(shared_key)
+	if fragment is None:
+		fragment = render_questions(*build_pass_forms(DynMCQTestInfo))
+		cache.set(shared_key, fragment, PASS_FRAGMENT_TIMEOUT)
+	PASS_FRAGMENTS.set(id_test, (version, fragment))
+	return fragment
@@ -0,0 +1,274 @@
+import csv
+import io
+import json
+import re
+
+from django.core.exceptions import ValidationError
+from django.db import connection,transaction
+
+from .models import DynMCQanswer,DynMCQquestion,Dynquestion
+from .exports import stream_csv
+from .question_choices import invalidate_question_choices
+
+#Number of themes of the difficulty of a question and levels of each theme (see Add_difficulty_view)
+NB_THEMES = 5
+NB_LEVELS = 5
+
+#Columns of the CSV format : a "mcq" row is followed by its "answer" rows
+CSV_COLUMNS = ['type', 'text', 'expected', 'right', 'difficulty']
+
+#Number of questions read at a time by the export
+EXPORT_CHUNK_SIZE = 500
+
+
+def encode_difficulty(levels):
+	"""Function to get the stored difficulty of a question from its levels
+	Parameter :
+		levels (list) : one level (int) or list of levels for each theme ([4,2,0,1,0] or [[1,2],[0]])
+	Return :
+		difficulty (str) : difficulty as saved by Add_difficulty_view ("['4']['2']['0']['1']['0']")
+	"""
+	if not isinstance(levels, (list, tuple)) or len(levels) > NB_THEMES:
+		raise ValueError("the difficulty must be a list of at most %d themes" % NB_THEMES)
+	difficulty = ""
+	for theme in levels:
+		theme = theme if isinstance(theme, (list, tuple)) else [theme]
+		theme_levels = []
+		for level in theme:
+			if isinstance(level, bool) or not str(level).isdigit() or int(level) >= NB_LEVELS:
+				raise ValueError("the levels of difficulty are between 0 and %d" % (NB_LEVELS - 1))
+			theme_levels.append(str(int(level)))
+		difficulty += str(theme_levels)
+	return difficulty
+
+def decode_difficulty(difficulty):
+	"""Function to get the levels of a stored difficulty, one int for each theme (a list if a theme has several levels)"""
+	levels = []
+	for theme in re.findall(r'\[([^\]]*)\]', difficulty or ""):
+		theme_levels = [int(level) for level in re.findall(r'\d+', theme)]
+		levels.append(theme_levels[0] if len(theme_levels) == 1 else theme_levels)
+	return levels
+
+def parse_bool(value):
+	"""Function to read a right answer flag (true/false, 1/0, yes/no)"""
+	if isinstance(value, bool):
+		return value
+	text = str(value).strip().lower()
+	if text in ('1', 'true', 'yes', 'y', 'x'):
+		return True
+	if text in ('', '0', 'false', 'no', 'n'):
+		return False
+	raise ValueError("%r is not a right answer flag" % value)
+
+def read_json(text):
+	"""Function to read questions in JSON : {"questions": [...]} or a list of questions
+	A question is {"type": "mcq", "text": ..., "answers": [{"text": ..., "right": true}, ...], "difficulty": [4,2,0,1,0]}
+	or {"type": "normal", "text": ..., "answer": ..., "difficulty": [...]}
+	Return :
+		(list) : the questions (dict), not validated
+	"""
+	try:
+		data = json.loads(text)
+	except ValueError as error:
+		raise ValidationError("Invalid JSON file : %s" % error)
+	if isinstance(data, dict):
+		data = data.get('questions')
+	if not isinstance(data, list):
+		raise ValidationError("The JSON file must contain a list of questions")
+	return data
+
+def read_csv(text):
+	"""Function to read questions in CSV, with the columns CSV_COLUMNS :
+	"mcq" rows (text, difficulty) followed by their "answer" rows (text, right),
+	"normal" rows (text, expected answer, difficulty). The difficulty is written "4 2 0 1 0" ("1+2" for several levels).
+	Return :
+		(list) : the questions (dict), not validated
+	"""
+	questions = []
+	reader = csv.DictReader(io.StringIO(text))
+	missing = set(CSV_COLUMNS) - set(reader.fieldnames or [])
+	if missing:
+		raise ValidationError("Missing CSV columns : %s" % ", ".join(sorted(missing)))
+	for line, row in enumerate(reader, 2):
+		row_type = (row['type'] or '').strip().lower()
+		if row_type == 'answer':
+			if not questions or questions[-1]['type'] != 'mcq':
+				raise ValidationError("Line %d : an answer must follow a mcq question" % line)
+			questions[-1]['answers'].append({'text': row['text'], 'right': row['right']})
+			continue
+		question = {'type': row_type, 'text': row['text'], 'line': line}
+		if row['difficulty'] and row['difficulty'].strip():
+			question['difficulty'] = [theme.split('+') for theme in row['difficulty'].split()]
+		if row_type == 'mcq':
+			question['answers'] = []
+		else:
+			question['answer'] = row['expected']
+		questions.append(question)
+	return questions
+
+def read_questions(text, file_format):
+	"""Function to read a question bank file
+	Parameter :
+		text (str) : content of the file
+		file_format (str) : 'json' or 'csv'
+	Return :
+		(list) : the questions (dict), not validated
+	"""
+	if file_format == 'json':
+		return read_json(text)
+	if file_format == 'csv':
+		return read_csv(text)
+	raise ValidationError("Unknown format %s (json or csv)" % file_format)
+
+def clean_question(question):
+	"""Function to check a question read from a file
+	Return :
+		(dict) : type, text, answer or answers (list of (text, right)), difficulty (stored format) and activated
+	"""
+	if not isinstance(question, dict):
+		raise ValueError("a question must be an object")
+	q_type = str(question.get('type', '')).strip().lower()
+	text = str(question.get('text') or '').strip()
+	if q_type not in ('mcq', 'normal'):
+		raise ValueError("the type must be mcq or normal")
+	if not text:
+		raise ValueError("the text is empty")
+	cleaned = {
+		'type': q_type,
+		'text': text,
+		'difficulty': encode_difficulty(question['difficulty']) if question.get('difficulty') not in (None, '') else "",
+		'activated': 1 if parse_bool(question.get('activated', True)) else 0,
+	}
+	if q_type == 'normal':
+		answer = str(question.get('answer') or '').strip()
+		if not answer:
+			raise ValueError("the expected answer is empty")
+		cleaned['answer'] = answer
+		return cleaned
+	answers = question.get('answers')
+	if not isinstance(answers, list) or len(answers) < 2:
+		raise ValueError("a mcq question needs at least 2 answers")
+	cleaned['answers'] = []
+	for answer in answers:
+		if not isinstance(answer, dict) or not str(answer.get('text') or '').strip():
+			raise ValueError("an answer has no text")
+		cleaned['answers'].append((str(answer['text']).strip(), parse_bool(answer.get('right', False))))
+	if not any(right for text, right in cleaned['answers']):
+		raise ValueError("a mcq question needs a right answer")
+	return cleaned
+
+def validate_questions(questions):
+	"""Function to check all the questions of a file before any insertion
+	Parameter :
+		questions (list) : the questions read by read_questions
+	Return :
+		(list) : the cleaned questions (see clean_question)
+	Raise :
+		ValidationError : with a message for each invalid question
+	"""
+	cleaned = []
+	errors = []
+	for position, question in enumerate(questions, 1):
+		try:
+			cleaned.append(clean_question(question))
+		except ValueError as error:
+			where = "Line %d" % question['line'] if isinstance(question, dict) and 'line' in question else "Question %d" % position
+			errors.append("%s : %s" % (where, error))
+	if errors:
+		raise ValidationError(errors)
+	if not cleaned:
+		raise ValidationError("The file contains no question")
+	return cleaned
+
+def create_questions(model, objs):
+	"""Function to insert questions in the current transaction and get their q_num
+	The databases returning the ids of a bulk insert (PostgreSQL) set them on the objects. With the others (SQLite, MySQL)
+	the questions are inserted one by one, each insert gives its own id whatever the other processes insert meanwhile.
+	Parameter :
+		model (class) : DynMCQquestion or Dynquestion
+		objs (list) : the questions to insert
+	Return :
+		q_nums (list) : q_num of each question, in the order of objs
+	"""
+	if connection.features.can_return_ids_from_bulk_insert:
+		objs = model.objects.bulk_create(objs)
+	else:
+		for obj in objs:
+			obj.save(force_insert = True)
+	return [obj.q_num for obj in objs]
+
+def import_questions(questions):
+	"""Function to insert a question bank in a single transaction : nothing is inserted if a question is invalid
+	Parameter :
+		questions (list) : the questions read by read_questions
+	Return :
+		nb_mcq (int) : number of inserted DynMCQquestion questions
+		nb_normal (int) : number of inserted Dynquestion questions
+		nb_answers (int) : number of inserted DynMCQanswer answers
+	"""
+	cleaned = validate_questions(questions)
+	mcq = [question for question in cleaned if question['type'] == 'mcq']
+	normal = [question for question in cleaned if question['type'] == 'normal']
+	with transaction.atomic():
+		q_nums = create_questions(DynMCQquestion, [DynMCQquestion(q_text = question['text'], nb_ans = str(len(question['answers'])), activated = question['activated'], difficulty = question['difficulty']) for question in mcq])
+		answers = []
+		for question, q_num in zip(mcq, q_nums):
+			for ans_num, (text, right) in enumerate(question['answers'], 1):
+				answers.append(DynMCQanswer(q_num = q_num, ans_num = ans_num, ans_text = text, right_ans = 1 if right else 0))
+		DynMCQanswer.objects.bulk_create(answers)
+		Dynquestion.objects.bulk_create([Dynquestion(q_text = question['text'], r_text = question['answer'], activated = question['activated'], difficulty = question['difficulty']) for question in normal])
+		#After the commit, so that the choices are not read again before the new questions are visible
+		transaction.on_commit(invalidate_question_choices)
+	return len(mcq), len(normal), len(answers)
+
+def iter_questions(chunk_size=EXPORT_CHUNK_SIZE):
+	"""Function to read the whole question bank, a chunk at a time
+	The MCQ questions and their answers are read by two queries ordered by q_num, and merged.
+	Return :
+		(generator) : questions in the format of read_json
+	"""
+	answers = DynMCQanswer.objects.order_by('q_num', 'ans_num').values_list('q_num', 'ans_text', 'right_ans').iterator(chunk_size = chunk_size)
+	answer = next(answers, None)
+	for q_num, q_text, activated, difficulty in DynMCQquestion.objects.order_by('q_num').values_list('q_num', 'q_text', 'activated', 'difficulty').iterator(chunk_size = chunk_size):
+		question_answers = []
+		#Answers of deleted questions are skipped
+		while answer is not None and (answer[0] is None or answer[0] <= q_num):
+			if answer[0] == q_num:
+				question_answers.append({'text': answer[1], 'right': answer[2] == 1})
+			answer = next(answers, None)
+		yield {'type': 'mcq', 'text': q_text, 'answers': question_answers, 'difficulty': decode_difficulty(difficulty), 'activated': activated != 0}
+	for q_text, r_text, activated, difficulty in Dynquestion.objects.order_by('q_num').values_list('q_text', 'r_text', 'activated', 'difficulty').iterator(chunk_size = chunk_size):
+		yield {'type': 'normal', 'text': q_text, 'answer': r_text, 'difficulty': decode_difficulty(difficulty), 'activated': activated != 0}
+
+def stream_json(questions):
+	"""Function to write questions in JSON, one question at a time"""
+	yield '{"questions": [\n'
+	separator = ''
+	for question in questions:
+		yield separator + json.dumps(question)
+		separator = ',\n'
+	yield '\n]}\n'
+
+def csv_rows(questions):
+	"""Function to get the rows of questions in the CSV format (see read_csv)"""
+	yield CSV_COLUMNS
+	for question in questions:
+		difficulty = ' '.join('+'.join(str(level) for level in theme) if isinstance(theme, list) else str(theme) for theme in question['difficulty'])
+		if question['type'] == 'mcq':
+			yield ['mcq', question['text'], '', '', difficulty]
+			for answer in question['answers']:
+				yield ['answer', answer['text'], '', 1 if answer['right'] else 0, '']
+		else:
+			yield ['normal', question['text'], question['answer'], '', difficulty]
+
+def export_questions(file_format, chunk_size=EXPORT_CHUNK_SIZE):
+	"""Function to export the question bank
+	Parameter :
+		file_format (str) : 'json' or 'csv'
+		chunk_size (int) : number of questions read at a time
+	Return :
+		(generator) : the parts of the file, read by read_questions
+	"""
+	if file_format == 'json':
+		return stream_json(iter_questions(chunk_size))
+	return stream_csv(csv_rows(iter_questions(chunk_size)))
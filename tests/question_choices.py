@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import DynMCQTest_Question,DynMCQquestion,Dynquestion
+from .caches import LRUCache,get_version,bump_version
+
+#Choices of the last versions of the question bank, for the current process
+QUESTION_CHOICES = LRUCache(4)
+
+#Timeout of the choices in the shared Django cache (they are invalidated by version anyway)
+QUESTION_CHOICES_TIMEOUT = getattr(settings, 'TESTS_QUESTION_CHOICES_TIMEOUT', 24 * 3600)
+
+#Maximal number of questions displayed in the forms composing a test, the others are found with the search
+QUESTION_CHOICES_LIMIT = getattr(settings, 'TESTS_QUESTION_CHOICES_LIMIT', 500)
+
+
+def invalidate_question_choices():
+	"""Function to invalidate the cached choices when a question is created, edited or deleted"""
+	bump_version('question_choices')
+
+def get_question_choices(q_type):
+	"""Function to get the choices [q_num, q_text] of all the questions of a type, ordered by q_num :
+	First from the cache of the process, then from the shared Django cache and finally from the database.
+	The version of the choices is read from the database, a question created by another process is always in the choices.
+	Parameter :
+		q_type (str) : DynMCQTest_Question.MCQ or DynMCQTest_Question.NORMAL
+	Return :
+		choices (list) : [q_num, q_text] of each question (the list must not be modified)
+	"""
+	version = get_version('question_choices')
+	local = QUESTION_CHOICES.get(q_type)
+	if local is not None and local[0] == version:
+		return local[1]
+	shared_key = 'question_choices:%s:%s' % (q_type, version)
+	choices = cache.get(shared_key)
+	if choices is None:
+		model = DynMCQquestion if q_type == DynMCQTest_Question.MCQ else Dynquestion
+		choices = [[q_num, q_text] for q_num, q_text in model.objects.order_by('q_num').values_list('q_num', 'q_text')]
+		cache.set(shared_key, choices, QUESTION_CHOICES_TIMEOUT)
+	QUESTION_CHOICES.set(q_type, (version, choices))
+	return choices
+
+def search_question_choices(q_type, search='', selected=(), limit=None):
+	"""Function to get the choices displayed in the form composing a test
+	Parameter :
+		q_type (str) : DynMCQTest_Question.MCQ or DynMCQTest_Question.NORMAL
+		search (str) : text searched in the questions, empty for all the questions
+		selected (list) : q_num of the questions displayed whatever the search (questions of the test)
+		limit (int) : maximal number of displayed questions (besides the selected ones), QUESTION_CHOICES_LIMIT by default
+	Return :
+		choices (list) : [q_num, q_text] of the displayed questions
+		truncated (bool) : True if some questions matching the search are not displayed
+	"""
+	limit = QUESTION_CHOICES_LIMIT if limit is None else limit
+	search = search.strip().lower()
+	selected = {int(q_num) for q_num in selected}
+	choices = []
+	nb_found = 0
+	truncated = False
+	for choice in get_question_choices(q_type):
+		if choice[0] in selected:
+			choices.append(choice)
+		elif search in choice[1].lower():
+			if nb_found < limit:
+				choices.append(choice)
+				nb_found += 1
+			else:
+				truncated = True
+	return choices, truncated
+
+def set_question_choices(formset, search='', selected=((), ())):
+	"""Function to fill the choices of the formset DynMCQTestInfoForm_questions (MCQ questions then normal questions)
+	A bound formset gets all the questions, so that any question can be chosen.
+	Parameter :
+		formset (formset of DynMCQTestInfoForm_questions) : the 2 forms
+		search (str) : text searched in the questions of an unbound formset
+		selected (tuple) : q_num of the MCQ and normal questions displayed whatever the search
+	Return :
+		truncated (bool) : True if some questions matching the search are not displayed
+	"""
+	truncated = False
+	for form, q_type, q_nums in zip(formset, (DynMCQTest_Question.MCQ, DynMCQTest_Question.NORMAL), selected):
+		if formset.is_bound:
+			form.fields['questions'].choices = get_question_choices(q_type)
+		else:
+			form.fields['questions'].choices, form_truncated = search_question_choices(q_type, search, q_nums)
+			truncated = truncated or form_truncated
+	return truncated
@@ -0,0 +1,103 @@
+import multiprocessing
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import transaction
+
+from .models import Grading_Job,Pass_DynMCQTest_Info
+from .answer_keys import compile_answer_key
+from .aggregates import rebuild_statistics
+from .attempts import ATTEMPTS_CHUNK_SIZE,iter_attempts
+from . import grading_worker
+
+
+class RegradeReport(object):
+	"""Result of the grading of a whole test again :
+
+	Attributes :
+
+	nb_attempts (int) : number of graded attempts
+	changed (list) : (id_student, attempt, old mark, new mark) of each changed mark
+	unknown_penalty (list) : (id_student, attempt) of the submitted attempts not graded because their penalty is unknown
+	elapsed (float) : duration of the grading in seconds
+	"""
+	def __init__(self):
+		self.nb_attempts = 0
+		self.changed = []
+		self.unknown_penalty = []
+		self.elapsed = 0.0
+
+	def throughput(self):
+		"""Returns the number of graded attempts per second"""
+		return self.nb_attempts / self.elapsed if self.elapsed else 0.0
+
+def split(items, nb_parts):
+	"""Function to split a list in nb_parts lists of close sizes"""
+	size = -(-len(items) // nb_parts)
+	return [items[i:i+size] for i in range(0, len(items), size)]
+
+def regrade_test(DynMCQTestInfo, chunk_size=ATTEMPTS_CHUNK_SIZE, workers=1, dry_run=False):
+	"""Function to grade again all the submitted attempts of a test with its current answer key
+	The attempts are read by chunks (see attempts.iter_attempts), graded in the process or in a pool of workers processes,
+	and the changed marks of a chunk are written with one bulk_update. The late penalty of each attempt is kept :
+	the attempts submitted before the penalty was recorded (penalty None) are not graded, they are listed in the report.
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the test
+		chunk_size (int) : number of attempts read and written at a time
+		workers (int) : number of processes grading the attempts, 1 grades in the current process
+		dry_run (bool) : if True, the marks are not written
+	Return :
+		report (RegradeReport) : graded attempts and changed marks
+	"""
+	report = RegradeReport()
+	start = time.perf_counter()
+	id_test = DynMCQTestInfo.id_test
+	#The answer key is read from the database : the cached one may be out of date
+	answer_key = compile_answer_key(DynMCQTestInfo)
+	#Submissions still waiting in the grading queue are graded by grade_submissions
+	pending = set(Grading_Job.objects.filter(id_test = id_test).exclude(status = Grading_Job.DONE).values_list('id_student', 'attempt'))
+
+	pool = None
+	if workers > 1:
+		#fork is cheaper than spawn where it is available, init_worker handles both
+		context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+		pool = ProcessPoolExecutor(workers, mp_context = context, initializer = grading_worker.init_worker, initargs = (pickle.dumps(answer_key),))
+	try:
+		for chunk in iter_attempts(id_test, chunk_size):
+			infos = {}
+			attempts = []
+			for info, mcq_answers, normal_answers in chunk:
+				#Only the attempts with answers have been submitted
+				if info.mark is None or (info.id_student, info.attempt) in pending or not (mcq_answers or normal_answers):
+					continue
+				if info.penalty is None:
+					report.unknown_penalty.append((info.id_student, info.attempt))
+					continue
+				infos[info.pk] = info
+				attempts.append((info.pk, mcq_answers, normal_answers))
+			if not attempts:
+				continue
+			if pool is None:
+				results = [(pk, len(answer_key.right_questions(mcq_answers, normal_answers))) for pk, mcq_answers, normal_answers in attempts]
+			else:
+				results = [result for part in pool.map(grading_worker.grade_attempts, split(attempts, workers)) for result in part]
+			updated = []
+			for pk, nb_right in results:
+				info = infos[pk]
+				mark = max(nb_right - info.penalty, 0)
+				if mark != info.mark:
+					report.changed.append((info.id_student, info.attempt, info.mark, mark))
+					info.mark = mark
+					updated.append(info)
+			report.nb_attempts += len(attempts)
+			if updated and not dry_run:
+				with transaction.atomic():
+					Pass_DynMCQTest_Info.objects.bulk_update(updated, ['mark'])
+	finally:
+		if pool is not None:
+			pool.shutdown()
+	if report.changed and not dry_run:
+		rebuild_statistics(DynMCQTestInfo)
+	report.elapsed = time.perf_counter() - start
+	return report
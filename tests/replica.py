@@ -0,0 +1,108 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+#Seconds during which the reads of a user stay on the default database after a write, longer than the lag of the replica
+PIN_SECONDS = 10
+
+#State of the request served by the current thread
+_state = threading.local()
+
+
+def get_reporting_database():
+	"""Function to get the alias of the replica read by the reporting views, None when there is no replica"""
+	alias = getattr(settings, 'TESTS_REPORTING_DATABASE', None)
+	if alias is None or alias not in settings.DATABASES:
+		return None
+	return alias
+
+#Key of the session holding the end of the pin (timestamp)
+PIN_SESSION_KEY = 'replica_pin'
+
+
+def pin_session(request):
+	"""Function to keep the reads of a user on the default database for getattr(settings, 'TESTS_REPLICA_PIN_SECONDS', PIN_SECONDS) seconds,
+	so that the user sees what they just wrote while the replica is behind (read-your-writes)
+	The pin is stored in the session of the user, it is seen by every process of the server.
+	"""
+	request.session[PIN_SESSION_KEY] = time.time() + getattr(settings, 'TESTS_REPLICA_PIN_SECONDS', PIN_SECONDS)
+
+def is_pinned(request):
+	"""Function to know if the user of a request has written recently (see pin_session)"""
+	return request.session.get(PIN_SESSION_KEY, 0) > time.time()
+
+@contextmanager
+def read_primary():
+	"""Context manager reading from the default database, even in a reporting view :
+	used to build what is written or cached (statistics, answer keys), which must not be built from a late replica.
+	"""
+	_state.primary = getattr(_state, 'primary', 0) + 1
+	try:
+		yield
+	finally:
+		_state.primary -= 1
+
+def reporting_view(view):
+	"""Decorator of the read-only reporting views : their queries are sent to the replica (see ReportingRouter),
+	unless the user has written recently (see pin_session). Must be the last decorator, the user and their permissions are read from the default database.
+	"""
+	@wraps(view)
+	def wrapper(request, *args, **kwargs):
+		if get_reporting_database() is None or is_pinned(request):
+			return view(request, *args, **kwargs)
+		_state.reporting = True
+		try:
+			return view(request, *args, **kwargs)
+		finally:
+			_state.reporting = False
+	return wrapper
+
+
+class ReportingRouter(object):
+	"""Database router sending the reads of the reporting views to the replica (settings.TESTS_REPORTING_DATABASE) :
+	The writes never go to the replica. After a write, the reads of the request go to the default database too.
+	"""
+	def db_for_read(self, model, **hints):
+		if not getattr(_state, 'reporting', False) or getattr(_state, 'wrote', False) or getattr(_state, 'primary', 0):
+			return None
+		return get_reporting_database()
+
+	def db_for_write(self, model, **hints):
+		_state.wrote = True
+		#An object read from the replica is saved in the default database, the other writes are not routed (migrations of each database)
+		instance = hints.get('instance')
+		if instance is not None and instance._state.db is not None and instance._state.db == get_reporting_database():
+			return DEFAULT_DB_ALIAS
+		return None
+
+	def allow_migrate(self, db, app_label, model_name=None, **hints):
+		#The data migrations (no model_name) only run on the default database, the rows of a replica come from the replication
+		if db != DEFAULT_DB_ALIAS and model_name is None:
+			return False
+		return None
+
+	def allow_relation(self, obj1, obj2, **hints):
+		#The replica holds the same rows as the default database
+		databases = {DEFAULT_DB_ALIAS, get_reporting_database()}
+		if obj1._state.db in databases and obj2._state.db in databases:
+			return True
+		return None
+
+
+class ReadYourWritesMiddleware(object):
+	"""Middleware pinning to the default database the users who write during a request (a submission for example)
+	Must be after SessionMiddleware : the pin is saved with the session.
+	"""
+	def __init__(self, get_response):
+		self.get_response = get_response
+
+	def __call__(self, request):
+		_state.wrote = False
+		response = self.get_response(request)
+		if _state.wrote and get_reporting_database() is not None:
+			pin_session(request)
+		return response
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+#Script run in a new interpreter : starts Django as a worker does and resolves a URL (importing the views)
+STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import resolve
+resolve(sys.argv[1])
+print(time.perf_counter() - start)
+print(' '.join(sorted(sys.modules)))
+"""
+
+
+def measure_startup(url='/tests/manage/statistics/1/'):
+	"""Function to measure the start of a new process : django.setup() and the resolution of a URL, with python -X importtime
+	Parameter :
+		url (str) : URL resolved after the setup
+	Return :
+		wall_time (float) : time of the start in seconds
+		imports (list) : (self time in µs, cumulative time in µs, module) of each imported module
+		modules (set) : names of the modules loaded at the end of the start
+	"""
+	env = dict(os.environ)
+	env['DJANGO_SETTINGS_MODULE'] = os.environ.get('DJANGO_SETTINGS_MODULE', 'project_esilv.settings')
+	process = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT, url], cwd=settings.BASE_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+	imports = []
+	for line in process.stderr.splitlines():
+		#Format of the lines : "import time:  self | cumulative | module"
+		if not line.startswith('import time:') or 'self [us]' in line:
+			continue
+		self_time, cumulative_time, module = line[len('import time:'):].split('|')
+		imports.append((int(self_time), int(cumulative_time), module.strip()))
+	wall_time, modules = process.stdout.splitlines()[-2:]
+	return float(wall_time), imports, set(modules.split())
@@ -0,0 +1,114 @@
+import logging
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import DynMCQInfo,Pass_DynMCQTest,Pass_DynMCQTest_Info,Pass_DynquestionTest,Grading_Job
+from .answer_keys import get_answer_key
+from .aggregates import record_submission
+from .exam_clock import mark_submitted
+
+logger = logging.getLogger(__name__)
+
+
+def save_submission(Pass_DynMCQInfo, mcq_answers, normal_answers, mark, time, right_questions=(), penalty=0):
+	"""Function to save the answers of a submission and its mark in a single transaction :
+	Each type of answers is written with one bulk insert, the pass test is updated once and the submission is added to the statistics of the test.
+	Parameter :
+		Pass_DynMCQInfo (Pass_DynMCQTest_Info instance) : the pass test (attempt) of the student
+		mcq_answers (list) : unsaved Pass_DynMCQTest instances
+		normal_answers (list) : unsaved Pass_DynquestionTest instances
+		mark (int) : mark of the submission
+		time (datetime) : time of the submission
+		right_questions (list) : (q_type, q_num) of the questions rightly answered (see AnswerKey.right_questions)
+		penalty (int) : late penalty already removed from the mark
+	Return :
+		saved (Bool) : False if the attempt had already been submitted, then nothing is written
+	"""
+	try:
+		with transaction.atomic():
+			Pass_DynMCQTest.objects.bulk_create(mcq_answers)
+			Pass_DynquestionTest.objects.bulk_create(normal_answers)
+			Pass_DynMCQTest_Info.objects.filter(pk = Pass_DynMCQInfo.pk).update(mark = mark, penalty = penalty, time = str(time))
+			record_submission(Pass_DynMCQInfo.id_test, mark, right_questions)
+	except IntegrityError:
+		#The answers of this attempt are already saved (the form has been sent twice)
+		return False
+	Pass_DynMCQInfo.mark = mark
+	Pass_DynMCQInfo.penalty = penalty
+	Pass_DynMCQInfo.time = str(time)
+	mark_submitted(Pass_DynMCQInfo)
+	return True
+
+def enqueue_submission(Pass_DynMCQInfo, mcq_answers, normal_answers, penalty, time):
+	"""Function to save the answers of a submission without grading them :
+	The answers and a Grading_Job are written in a single transaction, the mark is computed later by grade_job.
+	Parameter :
+		Pass_DynMCQInfo (Pass_DynMCQTest_Info instance) : the pass test (attempt) of the student
+		mcq_answers (list) : unsaved Pass_DynMCQTest instances
+		normal_answers (list) : unsaved Pass_DynquestionTest instances
+		penalty (int) : late penalty of the submission
+		time (datetime) : time of the submission
+	Return :
+		saved (Bool) : False if the attempt had already been submitted, then nothing is written
+	"""
+	try:
+		with transaction.atomic():
+			Pass_DynMCQTest.objects.bulk_create(mcq_answers)
+			Pass_DynquestionTest.objects.bulk_create(normal_answers)
+			Pass_DynMCQTest_Info.objects.filter(pk = Pass_DynMCQInfo.pk).update(time = str(time))
+			Grading_Job.objects.create(id_test = Pass_DynMCQInfo.id_test, id_student = Pass_DynMCQInfo.id_student, attempt = Pass_DynMCQInfo.attempt, penalty = penalty)
+	except IntegrityError:
+		return False
+	mark_submitted(Pass_DynMCQInfo)
+	return True
+
+def grade_job(job):
+	"""Function to grade a queued submission and to write its mark
+	Parameter :
+		job (Grading_Job instance) : the job, claimed by the caller (status running)
+	Return :
+		mark (int) : mark of the submission, None if the test does not exist anymore
+	"""
+	mark = None
+	right_questions = []
+	DynMCQTestInfo = DynMCQInfo.objects.filter(id_test = job.id_test).first()
+	if DynMCQTestInfo is not None:
+		answer_key = get_answer_key(DynMCQTestInfo)
+		mcq_answers = Pass_DynMCQTest.objects.filter(id_test = job.id_test, id_student = job.id_student, attempt = job.attempt).values_list('q_num', 'r_ans')
+		normal_answers = Pass_DynquestionTest.objects.filter(id_test = job.id_test, id_student = job.id_student, attempt = job.attempt).values_list('q_num', 'r_answer')
+		right_questions = answer_key.right_questions(mcq_answers, normal_answers)
+		mark = max(len(right_questions) - job.penalty, 0)
+	with transaction.atomic():
+		if mark is not None:
+			Pass_DynMCQTest_Info.objects.filter(id_test = job.id_test, id_student = job.id_student, attempt = job.attempt).update(mark = mark, penalty = job.penalty)
+			record_submission(job.id_test, mark, right_questions)
+		Grading_Job.objects.filter(pk = job.pk).update(status = Grading_Job.DONE, graded = timezone.now())
+	return mark
+
+def drain_queue(batch_size=100):
+	"""Function to grade the pending submissions, the oldest first
+	Several workers can run together : a job is claimed before being graded.
+	A job which cannot be graded is marked failed and the next jobs are graded.
+	Parameter :
+		batch_size (int) : maximal number of jobs to grade
+	Return :
+		nb_graded (int) : number of graded jobs
+		nb_failed (int) : number of jobs marked failed
+	"""
+	nb_graded = 0
+	nb_failed = 0
+	for job in Grading_Job.objects.filter(status = Grading_Job.PENDING).order_by('id')[:batch_size]:
+		#Another worker may have claimed the job meanwhile
+		if Grading_Job.objects.filter(pk = job.pk, status = Grading_Job.PENDING).update(status = Grading_Job.RUNNING) == 0:
+			continue
+		try:
+			grade_job(job)
+		except Exception:
+			#The job is not left running : it is put back in the queue by grade_submissions --requeue once the error is fixed
+			logger.exception("The submission %s of %s (attempt %s) could not be graded", job.id_test, job.id_student, job.attempt)
+			Grading_Job.objects.filter(pk = job.pk).update(status = Grading_Job.FAILED)
+			nb_failed += 1
+			continue
+		nb_graded += 1
+	return nb_graded, nb_failed
@@ -2,7 +2,7 @@ from django.test import TestCase, Client
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.contrib.contenttypes.models import ContentType
-from .models import DynMCQInfo,DynMCQquestion,DynMCQanswer,Pass_DynMCQTest,Pass_DynMCQTest_Info,Dynquestion,Pass_DynquestionTest
+from .models import DynMCQInfo,DynMCQTest_Question,DynMCQquestion,DynMCQanswer,Pass_DynMCQTest,Pass_DynMCQTest_Info,Dynquestion,Pass_DynquestionTest
 from django.test.utils import setup_test_environment
 from django.contrib.auth.models import User,Group,Permission
 import datetime
@@ -59,14 +59,47 @@ from tests.views import (
 	Mediane,
 	Frequences,
 	Statistique_question,
-	get_questions,
+	Pourcentage_stats_question,
 	check_answer,
-	get_time,
-	get_date,
-	add_time,
-	compare_date,
 	
 )
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection,connections
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .models import Cache_Version,Grading_Job,Question_Statistics
+from tests.aggregates import get_statistics
+from tests.answer_keys import get_answer_key,ANSWER_KEYS
+from tests.assembly import load_test_questions,get_questions_answers_list,TEST_QUESTIONS
+from tests.backend_code import AnswerGrader,compare_input_wt_expected
+from tests.caches import VERSIONS
+from tests.charts import CHARTS
+from tests.db_tuning import sqlite_pragmas
+from tests.exam_clock import parse_duration,open_test,seconds_remaining,late_penalty
+from tests.exports import results_rows,stream_csv
+from tests.mark_statistics import MarkStatistics
+from tests.pass_page import PASS_FRAGMENTS
+from tests.question_bank import read_questions,import_questions
+from tests.question_choices import get_question_choices,search_question_choices,QUESTION_CHOICES
+from tests.replica import PIN_SESSION_KEY
+from tests.startup import measure_startup
+from tests.views import QUESTION_TEXT_PREVIEW
 
 # Create your tests here.
 
@@ -100,8 +133,7 @@ def login_user(c):
 def launch_a_test(c,id):
 	response = c.post('/tests/manage/launch/mcqdyn/'+id+'/', {'activated_for': 'esilv_IF1', 'time': '5:30'})
 	test = DynMCQInfo.objects.get(id_test = id)
-	test.release_time = datetime.datetime.today()
-	test.save()
+	open_test(test)
 
 def setUp_marks():
 	marks_list = [2,4,1,6,8,7,6,6,0,4,5]
@@ -109,8 +141,8 @@ def setUp_marks():
 	
 def setUp_test():
 	#Création du test
-	test1 = DynMCQInfo(id_test = "1", title = "Test 1", questions = "a[1,2,3]b")
-	test2 = DynMCQInfo(id_test = "2", title = "Test 2", questions = "a[1,2,3]b[1,2]")
+	test1 = DynMCQInfo(id_test = "1", title = "Test 1")
+	test2 = DynMCQInfo(id_test = "2", title = "Test 2")
 		
 	mcq1 = DynMCQquestion(q_num = 1, q_text = "Q1", nb_ans = "2")
 	r11 = DynMCQanswer(q_num = 1, ans_num = 1, ans_text = "r11", right_ans = 1)
@@ -147,7 +179,9 @@ def setUp_test():
 	#Saving
 		
 	test1.save()
+	test1.set_questions([1,2,3],[])
 	test2.save()
+	test2.set_questions([1,2,3],[1,2])
 	mcq1.save()
 	r11.save()
 	r12.save()
@@ -174,8 +208,58 @@ def setUp_test():
 	p_test33.save()
 	
 
+def table_scans(queryset):
+	#Lines of the SQLite query plan reading a whole table or index (SCAN) instead of searching an index (SEARCH)
+	return [line for line in queryset.explain().splitlines() if ' SCAN ' in line]
+	
+
+#The tests use their own cache directory, shared by the processes of the run like the cache of the server, removed by tearDownModule
+TEST_CACHE_DIRECTORY = tempfile.mkdtemp(prefix = 'tests_cache_')
+TEST_CACHES = {
+	'default': {
+		'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+		'LOCATION': TEST_CACHE_DIRECTORY,
+	}
+}
+
+def tearDownModule():
+	shutil.rmtree(TEST_CACHE_DIRECTORY, ignore_errors = True)
+
+#Stand-in replica of the tests of the routing : a second SQLite database in memory, only declared for ReplicaRoutingTests
+REPLICA_DATABASE = {
+	'ENGINE': 'django.db.backends.sqlite3',
+	'NAME': ':memory:',
+}
+
+#Script run in a new process : reads the version of a test on a scratch database, bumps it from a second process and reads it again
+VERSION_SCRIPT = """
+import os, subprocess, sys
+import django
+django.setup()
+from tests.caches import get_test_version,VERSIONS
+from tests.db_tuning import scratch_database
+with scratch_database() as name:
+    before = get_test_version('1')
+    subprocess.run([sys.executable, '-c', 'import django; django.setup(); from tests.caches import invalidate_test; invalidate_test(\\'1\\')'], env=dict(os.environ, DATABASE_NAME=name), check=True)
+    #The version kept by this process has expired
+    VERSIONS.clear()
+    print(before, get_test_version('1'))
+"""
+	
+
+@override_settings(CACHES = TEST_CACHES)
 class DumbModelTests(TestCase):
 
+	def setUp(self):
+		#The caches are not rolled back with the database between the tests
+		cache.clear()
+		ANSWER_KEYS.clear()
+		CHARTS.clear()
+		QUESTION_CHOICES.clear()
+		PASS_FRAGMENTS.clear()
+		TEST_QUESTIONS.clear()
+		VERSIONS.clear()
+
 	def test_register(self):
 		setUp_group_permissions()
 		c = Client()
@@ -226,6 +310,20 @@ class DumbModelTests(TestCase):
 			i += 1
 		self.assertEqual(total_freq,test_freq)
 		
+	def test_MarkStatistics(self):
+		marks_list = setUp_marks()
+		marks_stats = MarkStatistics(marks_list)
+		self.assertEqual("%.2f" % marks_stats.mean,Moyenne(marks_list))
+		self.assertEqual((marks_stats.min,marks_stats.max),(0,8))
+		self.assertEqual((marks_stats.q1,marks_stats.median,marks_stats.q3),(Q1(marks_list),Mediane(marks_list),Q3(marks_list)))
+		self.assertEqual(marks_stats.frequences(),Frequences([1,1,1,0,2,1,3,1,1],marks_list))
+		#The marks are not sorted in place
+		self.assertEqual(marks_list,setUp_marks())
+		histogram_stats = MarkStatistics.from_histogram({0:1,1:1,2:1,4:2,5:1,6:3,7:1,8:1})
+		self.assertEqual((histogram_stats.q1,histogram_stats.median,histogram_stats.q3,histogram_stats.total),(2,5,6,49))
+		self.assertEqual(len(histogram_stats.frequences(10)),11)
+		self.assertIsNone(MarkStatistics([]).median)
+		
 	def test_Statistique_question(self):
 		setUp_test()
 		theDynMCQtestInfo = get_object_or_404(DynMCQInfo, id_test = "1")
@@ -234,6 +332,9 @@ class DumbModelTests(TestCase):
 		test_stats_question = [3,2,1]
 		
 		self.assertEqual(stats_question,test_stats_question)
+		#The percentages are divided by the number of attempts, with no attempt they are 0
+		self.assertEqual(Pourcentage_stats_question(stats_question,4),['75.00','50.00','25.00'])
+		self.assertEqual(Pourcentage_stats_question(stats_question,0),['0.00','0.00','0.00'])
 	
 	def test_tests_list_teacher_view(self):
 		setUp_group_permissions()
@@ -310,34 +411,109 @@ class DumbModelTests(TestCase):
 
 		self.assertEqual([MCQquestions_list,Dynquestions_list],[DynMCQquestions_all_list,Dynquestions_all_list])
 		
-	def test_get_questions(self):
-		questions = get_questions("a[1,6,5]b[4,8]")
-		questions2 = get_questions("ab[4,8,78]")
-		questions3 = get_questions("a[1,2,7,8]b")
-		self.assertEqual([questions,questions2,questions3],[[['1','6','5'],['4','8']],[[],['4','8','78']],[['1','2','7','8'],[]]])
+	@override_settings(TESTS_QUESTIONS_PAGE_SIZE=2)
+	def test_Manage_questions_pages(self):
+		setUp_test()
+		DynMCQquestion.objects.create(q_text = 'Long ' + 'x' * 500, nb_ans = '0')
+		c = Client()
+		response = c.get(reverse('tests:Manage Questions'))
+		self.assertEqual([question.q_num for question in response.context['DynMCQquestions']],[1,2])
+		#Only the beginning of the texts is read
+		self.assertNotIn('q_text', response.context['DynMCQquestions'][0].__dict__)
+		response = c.get(response.context['mcq_next'])
+		self.assertEqual([question.q_num for question in response.context['DynMCQquestions']],[3,4])
+		self.assertEqual(len(response.context['DynMCQquestions'][1].short_text),QUESTION_TEXT_PREVIEW)
+		self.assertIsNone(response.context['mcq_next'])
+		response = c.get(reverse('tests:Manage Questions'), {'search': 'long'})
+		self.assertEqual([question.q_num for question in response.context['DynMCQquestions']],[4])
+		#The changes redirect to a page instead of listing the questions
+		response = c.get(reverse('tests:Delete DynMCQquestion', kwargs={'input_q_num': 4}))
+		self.assertRedirects(response, reverse('tests:Manage Questions'))
+		response = c.get(reverse('tests:AddQuestion Dynquestion'))
+		self.assertRedirects(response, Dynquestion.objects.latest('q_num').get_absolute_url_question())
+		
+	def test_set_questions(self):
+		setUp_test()
+		test = DynMCQInfo.objects.get(id_test = "2")
+		test.set_questions(['5','4'],['9'])
+		self.assertEqual(test.get_question_ids(),([5,4],[9]))
+		self.assertEqual(list(DynMCQTest_Question.objects.filter(q_type = DynMCQTest_Question.MCQ, q_num = 1).values_list('test_id', flat=True)),["1"])
+		
+	def test_load_test_questions(self):
+		setUp_test()
+		theDynMCQtestInfo = DynMCQInfo.objects.get(id_test = "2")
+		theDynMCQtestInfo.set_questions(['3','1','2'],['2','1'])
+		with self.assertNumQueries(4):
+			mcq_list, normal_list, answers = load_test_questions(theDynMCQtestInfo)
+		self.assertEqual([q.q_num for q in mcq_list],[3,1,2])
+		self.assertEqual([q.q_num for q in normal_list],[2,1])
+		self.assertEqual([a.ans_num for a in answers[2]],[1,2,3])
+		questions_answers = get_questions_answers_list(mcq_list, answers)
+		self.assertEqual([instance.q_text if isinstance(instance, DynMCQquestion) else instance.ans_text for instance in questions_answers],['Q3','r31','r32','Q1','r11','r12','Q2','r21','r22','r23'])
+		
+	def test_answer_key(self):
+		setUp_group_permissions()
+		setUp_test()
+		c = Client()
+		register_user(c)
+		login_user(c)
+		test = DynMCQInfo.objects.get(id_test = "2")
+		answer_key = get_answer_key(test)
+		#A warm grade is done in memory, the version of the test is kept by the process
+		with self.assertNumQueries(0):
+			answer_key = get_answer_key(test)
+			mark = answer_key.grade([(1,"['1']"),(2,"['3']"),(3,"['1']")],[(1,"Question1"),(2,"wrong")])
+		self.assertEqual(mark,3)
+		#Editing an answer invalidates the answer key of the tests using the question
+		c.post('/tests/manage/edit/dynmcqtestanswer/3/1',{'ans_text': 'r31', 'right_ans': 1})
+		self.assertEqual(get_answer_key(test).mcq[3],frozenset([1,2]))
+		
+	def test_compare_input_wt_expected(self):
+		#A longer answer than expected is compared (no IndexError), the words are aligned
+		self.assertEqual(compare_input_wt_expected("For i = 1 to 10", "For i = 1 to 10 Next i"),2)
+		self.assertEqual(compare_input_wt_expected("For i = 1 to 10", "For i = 1 10"),1)
+		
+	def test_AnswerGrader(self):
+		grader = AnswerGrader("For i = 1 to 11 print i Next i", keywords_categories = {'exact': ['For', '=', 'to', 'Next'], 'variable': ['i']}, keywords_constraints = ['i'])
+		#A variable can be renamed, the same way along the answer
+		self.assertEqual(grader.diff("For j = 1 to 11 print j Next j"),0)
+		self.assertEqual(grader.diff("For j = 1 to 11 print k Next j"),1)
+		#An exact keyword cannot
+		self.assertEqual(grader.diff("Loop j = 1 to 11 print j Next j"),1)
+		bonus_grader = AnswerGrader("if x :  y", keywords_categories = {'bonus': [' ']})
+		self.assertLess(bonus_grader.diff("if x :  y"),bonus_grader.diff("if x : y"))
+		#A whole class is graded in one call
+		grader = AnswerGrader("Question1", case_sensitive = False)
+		self.assertEqual(grader.grade_many(["question1", " QUESTION1", "question2", "question1"]),[0,0,1,0])
 		
 	def test_check_answers(self):
 		check_ans1 = check_answer("[1],[2]",[2,1])
 		check_ans2 = check_answer("[1]",[2,1])
 		self.assertEqual([check_ans1,check_ans2],[True,False])
 		
-	def test_get_time(self):
-		time = get_time("5:30")
-		self.assertEqual(time,'5.5')
+	def test_parse_duration(self):
+		self.assertEqual([parse_duration("5:30"),parse_duration("1:05:00")],[330,3900])
+		for time in ["", "abc", "5:-1", "1:2:3:4"]:
+			with self.assertRaises(ValueError):
+				parse_duration(time)
 		
-	def test_get_date(self):
-		time = get_date("2009-01-06 15:08:24.789150")
-		self.assertEqual(time,[15,8,24])
-		
-	def test_add_time(self):
-		time1 = add_time([15,56,30],"10:30")
-		time2 = add_time([23,57,30],"5:20")
-		self.assertEqual([time1,time2],[[16,7,0],[0,2,50]])
-		
-	def test_compare_date(self):
-		delta_time1 = compare_date([15,56,30],[16,7,0])
-		delta_time2 = compare_date([23,59,0],[23,57,30])
-		self.assertEqual([delta_time1,delta_time2],[10.5,-1.5])
+	def test_exam_clock(self):
+		setUp_test()
+		test = DynMCQInfo.objects.get(id_test = "1")
+		test.time = "10:30"
+		#A test released before midnight ends the next day
+		release = datetime.datetime(2020, 11, 25, 23, 55, tzinfo=datetime.timezone.utc)
+		open_test(test, release)
+		test = DynMCQInfo.objects.get(id_test = "1")
+		self.assertEqual(test.deadline_at,datetime.datetime(2020, 11, 26, 0, 5, 30, tzinfo=datetime.timezone.utc))
+		self.assertEqual(seconds_remaining(test, release + datetime.timedelta(minutes=10)),30)
+		#No penalty in the 30 first seconds of delay, then 1 point every full minute
+		self.assertEqual(late_penalty(test, test.deadline_at + datetime.timedelta(seconds=30)),0)
+		self.assertEqual(late_penalty(test, test.deadline_at + datetime.timedelta(seconds=45)),0)
+		self.assertEqual(late_penalty(test, test.deadline_at + datetime.timedelta(seconds=150)),2)
+		c = Client()
+		response = c.get(reverse('tests:Exam clock', kwargs={'input_id_test': '1'}))
+		self.assertEqual(response.json()['deadline_at'],'2020-11-26T00:05:30+00:00')
 		
 	def test_DynMCQquestion_select_menu_view(self) :
 		setUp_group_permissions()
@@ -366,13 +542,46 @@ class DumbModelTests(TestCase):
 
 		self.assertEqual([MCQquestions_list,Dynquestions_list],[DynMCQquestions_all_list,Dynquestions_all_list])
 		
+	def test_question_choices(self):
+		setUp_test()
+		test = DynMCQInfo.objects.create(id_test = "3", title = "Premier Test")
+		test.set_questions([3],[])
+		self.assertEqual(get_question_choices(DynMCQTest_Question.MCQ),[[1,'Q1'],[2,'Q2'],[3,'Q3']])
+		#The choices and their version are read from the cache of the process
+		with self.assertNumQueries(0):
+			get_question_choices(DynMCQTest_Question.MCQ)
+		c = Client()
+		url = reverse('tests:Question_reallocation',kwargs={'input_id_test': '3'})
+		response = c.get(url)
+		self.assertEqual(response.context['form'][0].fields['questions'].choices,[[1,'Q1'],[2,'Q2'],[3,'Q3']])
+		self.assertEqual(response.context['form'][0].fields['questions'].initial,[3])
+		#A change of a question invalidates the choices
+		c.post(reverse('tests:Edit DynMCQquestion',kwargs={'input_q_num': 1}),{'q_text': 'Bond', 'activated': 1})
+		self.assertEqual(get_question_choices(DynMCQTest_Question.MCQ)[0],[1,'Bond'])
+		#The search keeps the questions of the test
+		self.assertEqual(search_question_choices(DynMCQTest_Question.MCQ, 'bond', [3]),([[1,'Bond'],[3,'Q3']],False))
+		self.assertEqual(search_question_choices(DynMCQTest_Question.MCQ, 'q', limit = 1),([[2,'Q2']],True))
+		response = c.get(url, {'search': 'bond'})
+		self.assertEqual(response.context['form'][0].fields['questions'].choices,[[1,'Bond'],[3,'Q3']])
+		#Any question can be posted whatever the search
+		c.post(url + '?search=bond',{'form-TOTAL_FORMS': '2','form-INITIAL_FORMS': '0','form-MAX_NUM_FORMS': '','form-0-questions': [2], 'form-1-questions': [1]})
+		self.assertEqual(DynMCQInfo.objects.get(id_test = "3").get_question_ids(),([2],[1]))
+		#A question created by another process (web worker) bumps the version in the database, it can be chosen at once here
+		question = DynMCQquestion.objects.create(q_text = 'Q4')
+		Cache_Version.objects.filter(name = 'question_choices').update(version = F('version') + 1)
+		#The version kept by this process has expired
+		VERSIONS.clear()
+		c.post(url,{'form-TOTAL_FORMS': '2','form-INITIAL_FORMS': '0','form-MAX_NUM_FORMS': '','form-0-questions': [question.q_num], 'form-1-questions': [1]})
+		self.assertEqual(DynMCQInfo.objects.get(id_test = "3").get_question_ids(),([question.q_num],[1]))
+		
 	def test_Question_reallocation_view(self) :
 		setUp_group_permissions()
 		setUp_test()
 		c = Client()
 		register_user(c)
 		login_user(c)
-		test = DynMCQInfo.objects.create(id_test = "3", title = "Premier Test", questions= "a[1,2,3]b[1,2]")
+		test = DynMCQInfo.objects.create(id_test = "3", title = "Premier Test")
+		test.set_questions([1,2,3],[1,2])
 		response = c.post('/tests/manage/create/question_reallocation/3/',{'form-TOTAL_FORMS': '2','form-INITIAL_FORMS': '0','form-MAX_NUM_FORMS': '','form-0-questions': [1,2], 'form-1-questions': [1,2]})
 		test = DynMCQInfo.objects.get(id_test = "3")
 		response = c.get(reverse('tests:Question_reallocation',kwargs={'input_id_test': '3'}))
@@ -460,6 +669,11 @@ class DumbModelTests(TestCase):
 		launch_a_test(c,'2')
 		test = DynMCQInfo.objects.get(id_test = '2')
 		self.assertEqual(test.time,"5:30")
+		#A time which cannot be read is rejected, the test keeps its time
+		for time in ['', 'abc', '5:x', '0:00']:
+			response = c.post('/tests/manage/launch/mcqdyn/2/', {'activated_for': 'esilv_IF1', 'time': time})
+			self.assertTrue(response.context['form'].errors['time'])
+		self.assertEqual(DynMCQInfo.objects.get(id_test = '2').time,"5:30")
 		
 	def test_DynMCQtest_pass_view(self):
 		setUp_group_permissions()
@@ -474,6 +688,457 @@ class DumbModelTests(TestCase):
 		pass_test = Pass_DynMCQTest_Info.objects.get(id_test="2", id_student = "client1", attempt = 1)
 		self.assertEqual(pass_test.mark,4)
 		
+	def test_pass_page_fragment(self):
+		setUp_group_permissions()
+		setUp_test()
+		c = Client()
+		register_user(c)
+		login_user(c)
+		launch_a_test(c,'2')
+		Pass_DynMCQTest_Info(id_test = "2", id_student = "client1", attempt = 1).save()
+		Pass_DynMCQTest_Info(id_test = "2", id_student = "client2", attempt = 1).save()
+		response = c.get('/tests/pass/dynmcqtest/2/client1/1')
+		self.assertContains(response, 'Question : Q2')
+		self.assertContains(response, 'r21')
+		#The questions are rendered once for all the students
+		with CaptureQueriesContext(connection) as queries:
+			response = c.get('/tests/pass/dynmcqtest/2/client2/1')
+		self.assertContains(response, 'Id Student : client2')
+		self.assertContains(response, 'r21')
+		self.assertFalse([query for query in queries if 'tests_dynmcqanswer' in query['sql'] or 'tests_dynmcqquestion' in query['sql']])
+		#A change of a question of the test renders them again
+		c.post(reverse('tests:Edit DynMCQquestion',kwargs={'input_q_num': 2}),{'q_text': 'Bond', 'activated': 1})
+		self.assertContains(c.get('/tests/pass/dynmcqtest/2/client2/1'), 'Question : Bond')
+		#An invalid submission displays the questions again
+		response = c.post('/tests/pass/dynmcqtest/2/client2/1',{'form-TOTAL_FORMS': '3','form-INITIAL_FORMS': '0','form-MAX_NUM_FORMS': '','form-0-r_ans': '9'})
+		self.assertContains(response, 'Question : Bond')
+		self.assertFalse(Pass_DynMCQTest.objects.filter(id_test = "2", id_student = "client2").exists())
 		
-	
+	def test_warm_test(self):
+		setUp_group_permissions()
+		setUp_test()
+		c = Client()
+		register_user(c)
+		login_user(c)
+		User.objects.get(username = 'client1').groups.add(*Group.objects.filter(name__in = ['Student','esilv_IF1']))
+		c.post('/tests/manage/launch/mcqdyn/2/', {'activated_for': 'esilv_IF1', 'time': '5:30'})
+		response = c.get(reverse('tests:In Launch Specific DynMcq', kwargs={'input_id_test': '2'}))
+		warmup = response.context['warmup']
+		self.assertEqual([name for name, seconds, size in warmup.items][:4],['questions','answer key','pass page','groups of the students'])
+		self.assertEqual(len(warmup.items),5)
+		self.assertTrue(warmup.total_size() > 0)
+		#The first requests of the students are cache hits, in another process too (its local caches are empty)
+		Pass_DynMCQTest_Info(id_test = "2", id_student = "client1", attempt = 1).save()
+		ANSWER_KEYS.clear()
+		PASS_FRAGMENTS.clear()
+		TEST_QUESTIONS.clear()
+		with CaptureQueriesContext(connection) as queries:
+			self.assertContains(c.get(reverse('tests:List tests student')), 'Test 2')
+			c.get('/tests/pass/dynmcqtest/2/client1/1')
+		tables = ('tests_dynmcqanswer', 'tests_dynmcqquestion', 'tests_dynquestion', 'tests_dynmcqtest_question', 'tests_dynmcqinfo_activated_groups')
+		self.assertFalse([query['sql'] for query in queries if any(table in query['sql'] for table in tables)])
+		
+	def test_sqlite_pragmas(self):
+		#The pragmas of the settings are applied to each new connection
+		self.assertEqual(sqlite_pragmas(connection)['busy_timeout'],dict(settings.TESTS_SQLITE_PRAGMAS)['busy_timeout'])
+		with override_settings(TESTS_SQLITE_PRAGMAS = [('busy_timeout', 1234), ('synchronous', 'OFF')]):
+			new_connection = connection.copy()
+			try:
+				self.assertEqual(sqlite_pragmas(new_connection, ('synchronous', 'busy_timeout')),{'synchronous': 0, 'busy_timeout': 1234})
+			finally:
+				new_connection.close()
+		
+	def test_loadtest_command(self):
+		#The load test runs in a new process, on its own scratch database
+		process = subprocess.run([sys.executable, 'manage.py', 'loadtest', '--students', '4', '--concurrency', '2', '--mcq', '2', '--normal', '1'], cwd=settings.BASE_DIR, stdout=subprocess.PIPE, universal_newlines=True, check=True)
+		self.assertIn('error rate 0.0%', process.stdout)
+		self.assertIn('Saved submissions : 4', process.stdout)
+		for step in ('menu', 'pass page', 'submission'):
+			self.assertIn(step, process.stdout)
+		
+	def test_version_shared_between_processes(self):
+		#A test changed by a process (another web worker) is seen by the others
+		env = dict(os.environ, DJANGO_SETTINGS_MODULE = 'project_esilv.settings')
+		process = subprocess.run([sys.executable, '-c', VERSION_SCRIPT], cwd=settings.BASE_DIR, env=env, stdout=subprocess.PIPE, universal_newlines=True, check=True)
+		before, after = [int(version) for version in process.stdout.split()]
+		self.assertEqual(after, before + 1)
+		
+	def test_DynMCQtest_pass_view_single_submission(self):
+		setUp_group_permissions()
+		setUp_test()
+		c = Client()
+		register_user(c)
+		login_user(c)
+		launch_a_test(c,'2')
+		pass_test = Pass_DynMCQTest_Info(id_test = "2", id_student = "client1", attempt = 1, mark = 0)
+		pass_test.save()
+		answers = {'form-TOTAL_FORMS': '3','form-INITIAL_FORMS': '0','form-MAX_NUM_FORMS': '','form-0-r_ans': '1', 'form-1-r_ans': '3','form-2-r_ans': '1','form-0-r_answer': 'question1' , 'form-1-r_answer': 'question2'}
+		c.post('/tests/pass/dynmcqtest/2/client1/1',answers)
+		#The form sent a second time does not change the saved submission
+		answers['form-2-r_ans'] = '2'
+		c.post('/tests/pass/dynmcqtest/2/client1/1',answers)
+		pass_test = Pass_DynMCQTest_Info.objects.get(id_test="2", id_student = "client1", attempt = 1)
+		self.assertEqual(pass_test.mark,4)
+		self.assertEqual(Pass_DynMCQTest.objects.filter(id_test = "2", id_student = "client1", attempt = 1).count(),3)
+		self.assertEqual(Pass_DynquestionTest.objects.filter(id_test = "2", id_student = "client1", attempt = 1).count(),2)
+		
+	@override_settings(TESTS_ASYNC_GRADING=True)
+	def test_DynMCQtest_pass_view_async_grading(self):
+		setUp_group_permissions()
+		setUp_test()
+		c = Client()
+		register_user(c)
+		login_user(c)
+		launch_a_test(c,'2')
+		pass_test = Pass_DynMCQTest_Info(id_test = "2", id_student = "client1", attempt = 1, mark = 0)
+		pass_test.save()
+		response = c.post('/tests/pass/dynmcqtest/2/client1/1',{'form-TOTAL_FORMS': '3','form-INITIAL_FORMS': '0','form-MAX_NUM_FORMS': '','form-0-r_ans': '1', 'form-1-r_ans': '3','form-2-r_ans': '2','form-0-r_answer': 'question1' , 'form-1-r_answer': 'question3'})
+		self.assertRedirects(response, pass_test.get_absolute_url_result())
+		#The answers are recorded but not graded yet
+		self.assertEqual(Grading_Job.objects.get(id_test = "2", id_student = "client1", attempt = 1).status, Grading_Job.PENDING)
+		self.assertEqual(c.get(pass_test.get_result()).json(), {'submitted': True, 'graded': False, 'mark': None})
+		call_command('grade_submissions', '--once', stdout=open(os.devnull, 'w'))
+		self.assertEqual(c.get(pass_test.get_result()).json(), {'submitted': True, 'graded': True, 'mark': 4})
+		
+	def test_statistics_not_rebuilt_by_other_processes(self):
+		setUp_test()
+		Pass_DynMCQTest_Info.objects.filter(id_test = "1").update(mark = 1)
+		test = DynMCQInfo.objects.get(id_test = "1")
+		stats, stats_question = get_statistics(test)
+		#Another process, with empty caches, reads the statistics built here
+		cache.clear()
+		ANSWER_KEYS.clear()
+		with mock.patch('tests.aggregates.rebuild_statistics') as rebuild:
+			self.assertEqual(get_statistics(test)[0].nb_attempts, 3)
+		rebuild.assert_not_called()
+		
+	def test_grading_job_error(self):
+		setUp_test()
+		Grading_Job.objects.create(id_test = "1", id_student = "1", attempt = 1)
+		Grading_Job.objects.create(id_test = "1", id_student = "2", attempt = 1)
+		#The grading of the first job fails, the second one is graded anyway
+		answer_keys = [RuntimeError("broken answer key"), get_answer_key(DynMCQInfo.objects.get(id_test = "1"))]
+		with mock.patch('tests.submissions.get_answer_key', side_effect = answer_keys), self.assertLogs('tests.submissions', 'ERROR'):
+			call_command('grade_submissions', '--once', stdout = open(os.devnull, 'w'), stderr = open(os.devnull, 'w'))
+		self.assertEqual(Grading_Job.objects.get(id_student = "1").status, Grading_Job.FAILED)
+		self.assertEqual(Grading_Job.objects.get(id_student = "2").status, Grading_Job.DONE)
+		self.assertEqual(Pass_DynMCQTest_Info.objects.get(id_test = "1", id_student = "2").mark, 3)
+		#The failed job is graded again once put back in the queue
+		call_command('grade_submissions', '--once', '--requeue', stdout = open(os.devnull, 'w'))
+		self.assertEqual(Grading_Job.objects.get(id_student = "1").status, Grading_Job.DONE)
+		self.assertEqual(Pass_DynMCQTest_Info.objects.get(id_test = "1", id_student = "1").mark, 1)
+		
+	def test_statistics_aggregates(self):
+		setUp_group_permissions()
+		setUp_test()
+		Pass_DynMCQTest_Info.objects.filter(id_test = "1", id_student = "1").update(mark = 1)
+		Pass_DynMCQTest_Info.objects.filter(id_test = "1", id_student = "2").update(mark = 3)
+		Pass_DynMCQTest_Info.objects.filter(id_test = "1", id_student = "3").update(mark = 2)
+		theDynMCQtestInfo = get_object_or_404(DynMCQInfo, id_test = "1")
+		#The statistics are built from the stored submissions the first time
+		stats, stats_question = get_statistics(theDynMCQtestInfo)
+		self.assertEqual((stats.nb_attempts,stats.marks_sum,stats.get_histogram()),(3,6,{1:1,2:1,3:1}))
+		self.assertEqual(stats_question,[3,2,1])
+		#Then updated by each graded submission
+		c = Client()
+		register_user(c)
+		login_user(c)
+		launch_a_test(c,'1')
+		pass_test = Pass_DynMCQTest_Info(id_test = "1", id_student = "client1", attempt = 1, mark = 0)
+		pass_test.save()
+		c.post('/tests/pass/dynmcqtest/1/client1/1',{'form-TOTAL_FORMS': '3','form-INITIAL_FORMS': '0','form-MAX_NUM_FORMS': '','form-0-r_ans': '1', 'form-1-r_ans': '3','form-2-r_ans': '1'})
+		stats, stats_question = get_statistics(theDynMCQtestInfo)
+		self.assertEqual((stats.nb_attempts,stats.marks_sum,stats.get_histogram()),(4,8,{1:1,2:2,3:1}))
+		self.assertEqual(stats_question,[4,3,1])
+		#A change of the answer key rebuilds the statistics
+		DynMCQanswer.objects.filter(q_num = 3).update(right_ans = 1)
+		theDynMCQtestInfo.set_questions([1,2,3],[])
+		stats, stats_question = get_statistics(theDynMCQtestInfo)
+		self.assertEqual(stats_question,[4,3,0])
+		response = c.get(reverse('tests:Statistics', kwargs={'input_id_test': '1'}))
+		self.assertEqual(response.context['q1'],1)
+		self.assertEqual(response.context['mediane'],2)
+		self.assertEqual(response.context['moyenne_mcqtest'],"2.00")
+		
+	def test_regrade_command(self):
+		setUp_test()
+		Pass_DynMCQTest_Info.objects.filter(id_test = "1").update(mark = 0, penalty = 0)
+		Pass_DynMCQTest_Info.objects.filter(id_test = "1", id_student = "2").update(penalty = 1)
+		theDynMCQtestInfo = get_object_or_404(DynMCQInfo, id_test = "1")
+		get_statistics(theDynMCQtestInfo)
+		#A dry run writes nothing
+		out = StringIO()
+		call_command('regrade', '1', '--dry-run', stdout = out)
+		self.assertIn("3 attempt(s) graded", out.getvalue())
+		self.assertEqual(list(Pass_DynMCQTest_Info.objects.filter(id_test = "1").values_list('mark', flat=True)),[0,0,0])
+		#The marks are written by chunks, the penalty is kept
+		out = StringIO()
+		call_command('regrade', '1', '--chunk-size', '2', stdout = out)
+		self.assertIn("student 2 attempt 1 : 0 -> 2", out.getvalue())
+		self.assertEqual(list(Pass_DynMCQTest_Info.objects.filter(id_test = "1").order_by('id_student').values_list('mark', flat=True)),[1,2,2])
+		#The statistics are built again
+		stats, stats_question = get_statistics(theDynMCQtestInfo)
+		self.assertEqual((stats.nb_attempts,stats.marks_sum),(3,5))
+		out = StringIO()
+		call_command('regrade', '1', stdout = out)
+		self.assertIn("0 mark(s) changed", out.getvalue())
+		#An attempt submitted before the penalty was recorded keeps its mark, it is listed
+		Pass_DynMCQTest_Info.objects.filter(id_test = "1", id_student = "2").update(mark = 0, penalty = None)
+		out = StringIO()
+		call_command('regrade', '1', stdout = out)
+		self.assertIn("2 attempt(s) graded", out.getvalue())
+		self.assertIn("1 attempt(s) not graded, penalty unknown", out.getvalue())
+		self.assertIn("  student 2 attempt 1\n", out.getvalue())
+		self.assertEqual(Pass_DynMCQTest_Info.objects.get(id_test = "1", id_student = "2").mark,0)
+
+	def test_results_export_view(self):
+		setUp_group_permissions()
+		setUp_test()
+		Pass_DynMCQTest_Info.objects.filter(id_test = "1", id_student = "2").update(mark = 3, penalty = 0, time = "10:00:00")
+		Pass_DynMCQTest_Info(id_test = "1", id_student = "4", attempt = 1).save()
+		c = Client()
+		url = reverse('tests:Results export', kwargs={'input_id_test': '1'})
+		self.assertEqual(c.get(url).status_code,302)
+		register_user(c)
+		login_user(c)
+		#Only the teachers see the results
+		self.assertEqual(c.get(url).status_code,403)
+		User.objects.get(username = 'client1').groups.add(Group.objects.get(name = 'Teacher'))
+		response = c.get(url)
+		self.assertTrue(response.streaming)
+		self.assertEqual(response['Content-Type'],'text/csv')
+		rows = b''.join(response.streaming_content).decode().splitlines()
+		self.assertEqual(rows[0],'id_student,attempt,time,mark,penalty,q1 (mcq 1),q2 (mcq 2),q3 (mcq 3)')
+		#One row per attempt, whatever the size of the chunks (an unknown penalty is empty)
+		self.assertEqual(rows[1:],['1,1,,,,1,0,0','2,1,10:00:00,3,0,1,1,1','3,1,,,,1,1,0','4,1,,,,,,'])
+		self.assertEqual(list(stream_csv(results_rows(get_object_or_404(DynMCQInfo, id_test = "1"), chunk_size = 1)))[1:],[row + '\r\n' for row in rows[1:]])
+
+	def test_import_questions(self):
+		setUp_group_permissions()
+		c = Client()
+		register_user(c)
+		login_user(c)
+		User.objects.get(username = 'client1').groups.add(Group.objects.get(name = 'Teacher'))
+		bank = {'questions': [
+			{'type': 'mcq', 'text': 'Capital ?', 'difficulty': [4,2,0,1,0], 'answers': [{'text': 'Paris', 'right': True}, {'text': 'Lyon'}]},
+			{'type': 'normal', 'text': 'Name ?', 'answer': 'Bond', 'difficulty': [[1,2]]},
+		]}
+		response = c.post(reverse('tests:Import Questions'), {'questions_file': SimpleUploadedFile('bank.json', json.dumps(bank).encode())})
+		self.assertRedirects(response, reverse('tests:Manage Questions'))
+		question = DynMCQquestion.objects.get(q_text = 'Capital ?')
+		self.assertEqual((question.nb_ans,question.difficulty,question.activated),('2',"['4']['2']['0']['1']['0']",1))
+		self.assertEqual(list(DynMCQanswer.objects.filter(q_num = question.q_num).order_by('ans_num').values_list('ans_text','right_ans')),[('Paris',1),('Lyon',0)])
+		self.assertEqual(Dynquestion.objects.get(q_text = 'Name ?').difficulty,"['1', '2']")
+		#An invalid question cancels the whole import
+		bank['questions'].append({'type': 'mcq', 'text': 'No right answer', 'answers': [{'text': 'a'}, {'text': 'b'}]})
+		response = c.post(reverse('tests:Import Questions'), {'questions_file': SimpleUploadedFile('bank.json', json.dumps(bank).encode())})
+		self.assertEqual(response.context['errors'],['Question 3 : a mcq question needs a right answer'])
+		self.assertEqual((DynMCQquestion.objects.count(),Dynquestion.objects.count()),(1,1))
+		#The export is read back by the import
+		response = c.get(reverse('tests:Export Questions', kwargs={'file_format': 'csv'}))
+		exported = b''.join(response.streaming_content).decode()
+		self.assertEqual(exported.splitlines()[:3],['type,text,expected,right,difficulty','mcq,Capital ?,,,4 2 0 1 0','answer,Paris,,1,'])
+		self.assertEqual(import_questions(read_questions(exported, 'csv')),(1,1,2))
+		response = c.get(reverse('tests:Export Questions', kwargs={'file_format': 'json'}))
+		exported = json.loads(b''.join(response.streaming_content).decode())
+		self.assertEqual(len(exported['questions']),4)
+		self.assertEqual(exported['questions'][0]['difficulty'],[4,2,0,1,0])
+		out = StringIO()
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'questions.json')
+			with open(path, 'w') as questions_file:
+				json.dump(exported, questions_file)
+			call_command('import_questions', path, stdout = out)
+		self.assertIn("2 MCQ question(s) (4 answers) and 2 question(s) imported", out.getvalue())
+		#The answers are linked to the id of their own question
+		for question in DynMCQquestion.objects.filter(q_text = 'Capital ?'):
+			self.assertEqual(list(DynMCQanswer.objects.filter(q_num = question.q_num).order_by('ans_num').values_list('ans_text', flat=True)),['Paris','Lyon'])
+
+	def test_statistics_chart_view(self):
+		setUp_test()
+		Pass_DynMCQTest_Info.objects.filter(id_test = "1").update(mark = 2)
+		c = Client()
+		url = reverse('tests:Statistics chart', kwargs={'input_id_test': '1', 'chart': 'boxplot'})
+		response = c.get(url)
+		self.assertEqual(response['Content-Type'],'image/png')
+		self.assertEqual(len(CHARTS),1)
+		#The browser gets a 304 response while the statistics do not change
+		response = c.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+		self.assertEqual(response.status_code,304)
+		self.assertEqual(c.get(reverse('tests:Statistics chart', kwargs={'input_id_test': '1', 'chart': 'pie'})).status_code,404)
+		self.assertEqual(c.get(reverse('tests:Statistics chart', kwargs={'input_id_test': '2', 'chart': 'marks'})).status_code,404)
+		
+	def test_startup_imports(self):
+		#matplotlib is only imported to draw a chart
+		wall_time, imports, modules = measure_startup()
+		self.assertIn('tests.views',modules)
+		self.assertEqual([module for module in modules if module.split('.')[0] == 'matplotlib'],[])
+		
+	def test_hot_queries_use_indexes(self):
+		if connection.vendor != 'sqlite':
+			self.skipTest("The query plans are checked on SQLite")
+		setUp_test()
+		hot_queries = [
+			Pass_DynMCQTest_Info.objects.filter(id_test = "1", id_student = "1"),
+			Pass_DynMCQTest_Info.objects.filter(id_student = "1", id__lt = 10).order_by('-id'),
+			Pass_DynMCQTest.objects.filter(id_test = "1", id_student = "1", attempt = 1),
+			Pass_DynquestionTest.objects.filter(id_test = "2", id_student = "1", attempt = 1),
+			Pass_DynMCQTest.objects.filter(id_test = "1"),
+			Pass_DynquestionTest.objects.filter(id_test = "2"),
+			DynMCQanswer.objects.filter(q_num__in = [1,2,3], right_ans = 1),
+			DynMCQanswer.objects.filter(q_num__in = [1,2,3]).order_by('q_num','ans_num'),
+			DynMCQTest_Question.objects.filter(test = "2").order_by('position'),
+			DynMCQTest_Question.objects.filter(q_type = DynMCQTest_Question.MCQ, q_num = 1),
+			Grading_Job.objects.filter(status = Grading_Job.PENDING).order_by('id'),
+			Grading_Job.objects.filter(id_test = "1", id_student = "1", attempt = 1),
+			Question_Statistics.objects.filter(id_test = "1"),
+		]
+		for queryset in hot_queries:
+			self.assertEqual(table_scans(queryset),[],str(queryset.query))
+		
+	@override_settings(TESTS_HISTORY_PAGE_SIZE=2)
+	def test_tests_history_view(self):
+		setUp_group_permissions()
+		setUp_test()
+		c = Client()
+		register_user(c)
+		login_user(c)
+		for attempt in [1,2,3]:
+			Pass_DynMCQTest_Info(id_test = "1", id_student = "client1", attempt = attempt, mark = attempt).save()
+		Pass_DynMCQTest_Info(id_test = "2", id_student = "client1", attempt = 1, mark = 4).save()
+		#The newest attempts of the student only, with the title of the test
+		response = c.get(reverse('tests:Tests history'))
+		history = response.context['pass_dynMCQtest_user']
+		self.assertEqual([(instance.id_test, instance.attempt, instance.title) for instance in history],[("2",1,"Test 2"),("1",3,"Test 1")])
+		response = c.get(reverse('tests:Tests history'), {'before': response.context['next_before']})
+		history = response.context['pass_dynMCQtest_user']
+		self.assertEqual([(instance.id_test, instance.attempt, instance.mark) for instance in history],[("1",2,2),("1",1,1)])
+		self.assertIsNone(response.context['next_before'])
+		
+	def test_tests_list_student_view(self):
+		setUp_group_permissions()
+		setUp_test()
+		c = Client()
+		c.post('/tests/register/', {'last_name': 'L', 'first_name': 'Student', 'email': 'student@live.fr', 'username' : 'student1', 'password': '123', 'function' : 'Student', 'group1' : 'esilv_IF1', 'group2' : 'esilv_IF2'})
+		c.post('/tests/login/', {'username': 'student1', 'password': '123'})
+		c.post('/tests/manage/launch/mcqdyn/1/', {'activated_for': ['esilv_IF1','esilv_IF2'], 'time': '5:30'})
+		c.post('/tests/manage/launch/mcqdyn/2/', {'activated_for': ['esilv_IF2'], 'time': '5:30'})
+		#A test activated for both groups of the student is listed once
+		response = c.get(reverse('tests:List tests student'))
+		self.assertEqual([test.id_test for test in response.context['testlist_dynmcqtestinfo_user']],["1","2"])
+		#The cached list is invalidated when a test is stopped
+		c.get(reverse('tests:Stop mcq launch', kwargs={'input_id_test': '1'}))
+		response = c.get(reverse('tests:List tests student'))
+		self.assertEqual([test.id_test for test in response.context['testlist_dynmcqtestinfo_user']],["2"])
+		#A test launched by another process (web worker) bumps the version in the database, the list of this process is rebuilt
+		DynMCQInfo.objects.get(id_test = "1").activated_groups.add(Group.objects.get(name = 'esilv_IF1'))
+		Cache_Version.objects.filter(name = 'available_tests').update(version = F('version') + 1)
+		VERSIONS.clear()
+		response = c.get(reverse('tests:List tests student'))
+		self.assertEqual([test.id_test for test in response.context['testlist_dynmcqtestinfo_user']],["1","2"])
 		
+	def test_attempt_status_view(self):
+		setUp_group_permissions()
+		setUp_test()
+		c = Client()
+		register_user(c)
+		login_user(c)
+		launch_a_test(c,'2')
+		Pass_DynMCQTest_Info(id_test = "2", id_student = "client1", attempt = 1, mark = 0).save()
+		url = reverse('tests:Attempt status', kwargs={'input_id_test': '2', 'input_id_student': 'client1', 'input_attempt': 1})
+		status = c.get(url).json()
+		self.assertEqual((status['open'],status['submitted']),(True,False))
+		self.assertTrue(0 < status['remaining'] <= 330)
+		c.post('/tests/pass/dynmcqtest/2/client1/1',{'form-TOTAL_FORMS': '3','form-INITIAL_FORMS': '0','form-MAX_NUM_FORMS': '','form-0-r_ans': '1', 'form-1-r_ans': '3','form-2-r_ans': '2','form-0-r_answer': 'question1' , 'form-1-r_answer': 'question3'})
+		#The clock is read from the database and the submission from the cache, without any query on the questions
+		with self.assertNumQueries(3):
+			status = c.get(url).json()
+		self.assertEqual(status['submitted'],True)
+		c.get(reverse('tests:Stop mcq launch', kwargs={'input_id_test': '2'}))
+		self.assertEqual(c.get(url).json(),{'open': False, 'remaining': None, 'submitted': True})
+		self.assertEqual(c.get(reverse('tests:Attempt status', kwargs={'input_id_test': '2', 'input_id_student': 'other', 'input_attempt': 1})).status_code,404)
+
+
+@override_settings(TESTS_REPORTING_DATABASE = 'replica', CACHES = TEST_CACHES, DATABASES = dict(settings.DATABASES, replica = REPLICA_DATABASE))
+class ReplicaRoutingTests(TestCase):
+	#The replica is a second SQLite database (REPLICA_DATABASE), filled by replicate
+	databases = {'default', 'replica'}
+
+	@classmethod
+	def setUpClass(cls):
+		#The test runner only creates the databases of the settings : the replica is added to the connections and created
+		#before the transactions of the class, then removed with them
+		connections.databases['replica'] = dict(REPLICA_DATABASE)
+		connections['replica'].creation.create_test_db(verbosity = 0, autoclobber = True, serialize = False)
+		#The connections are handled here, the overridden DATABASES setting is only read by get_reporting_database
+		with warnings.catch_warnings():
+			warnings.filterwarnings('ignore', 'Overriding setting DATABASES', UserWarning)
+			super().setUpClass()
+
+	@classmethod
+	def tearDownClass(cls):
+		try:
+			with warnings.catch_warnings():
+				warnings.filterwarnings('ignore', 'Overriding setting DATABASES', UserWarning)
+				super().tearDownClass()
+		finally:
+			connections['replica'].creation.destroy_test_db(REPLICA_DATABASE['NAME'], verbosity = 0)
+			del connections['replica']
+			del connections.databases['replica']
+
+	def setUp(self):
+		cache.clear()
+		VERSIONS.clear()
+
+	def replicate(self, *models):
+		"""Copies the rows of models to the replica, as the replication would do"""
+		for model in models:
+			model.objects.using('replica').all().delete()
+			model.objects.using('replica').bulk_create(list(model.objects.using('default').all()))
+
+	def unpin(self, c):
+		"""Removes the pin set by the writes of the client (login, registration), as if it was over"""
+		session = c.session
+		session.pop(PIN_SESSION_KEY, None)
+		session.save()
+
+	def test_reporting_views_read_the_replica(self):
+		setUp_group_permissions()
+		setUp_test()
+		c = Client()
+		register_user(c)
+		login_user(c)
+		user = User.objects.get(username = 'client1')
+		user.groups.add(Group.objects.get(name = 'Teacher'))
+		self.unpin(c)
+		#The replica is behind : the tests are not listed yet
+		with CaptureQueriesContext(connections['replica']) as queries:
+			self.assertNotContains(c.get(reverse('tests:List tests teacher')), 'Test 1')
+		self.assertTrue(queries)
+		self.replicate(DynMCQInfo)
+		self.assertContains(c.get(reverse('tests:List tests teacher')), 'Test 1')
+		#The pages which are not reporting views read the default database
+		with CaptureQueriesContext(connections['replica']) as queries:
+			c.get(reverse('tests:Manage Questions'))
+		self.assertFalse(queries)
+
+	def test_read_your_writes(self):
+		setUp_group_permissions()
+		setUp_test()
+		c = Client()
+		register_user(c)
+		login_user(c)
+		launch_a_test(c,'2')
+		Pass_DynMCQTest_Info(id_test = "2", id_student = "client1", attempt = 1).save()
+		self.replicate(DynMCQInfo)
+		self.unpin(c)
+		self.assertNotContains(c.get(reverse('tests:Tests history')), 'Test 2')
+		#After the submission, the student sees their attempt although the replica is behind
+		answers = {'form-TOTAL_FORMS': '3','form-INITIAL_FORMS': '0','form-MAX_NUM_FORMS': '','form-0-r_ans': '1', 'form-1-r_ans': '3','form-2-r_ans': '1','form-0-r_answer': 'question1' , 'form-1-r_answer': 'question2'}
+		c.post('/tests/pass/dynmcqtest/2/client1/1',answers)
+		self.assertTrue(c.session[PIN_SESSION_KEY] > time.time())
+		with CaptureQueriesContext(connections['replica']) as queries:
+			self.assertContains(c.get(reverse('tests:Tests history')), 'Test 2')
+		self.assertFalse(queries)
+		self.unpin(c)
+		self.assertNotContains(c.get(reverse('tests:Tests history')), 'Test 2')
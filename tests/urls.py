@@ -14,6 +14,8 @@ from tests.views import (
 	DynMCQanswer_create_view,
 	
 	Manage_questions_view,
+	Import_questions_view,
+	Export_questions_view,
 	Question_reallocation_view,
 	Add_difficulty_view,
 	Add_difficulty_question_view,
@@ -34,12 +36,18 @@ from tests.views import (
 	pass_testslist_teacher_view,
 	DynMCQtest_pass_view,
 	DynMCQTest_pass_menu_view,
+	submission_pending_view,
+	submission_result_view,
+	exam_clock_view,
+	attempt_status_view,
 	
 	tests_list_teacher_view,
 	tests_list_student_view,
 	tests_history_view,
 	dashboard_view,
 	statistics_view,
+	statistics_chart_view,
+	results_export_view,
 	
 	launch_view,
 	launch_specific_dynmcq_view,
@@ -63,6 +71,8 @@ urlpatterns = [
 	path('manage/create/dynmcqtestanswer/<str:input_q_num>/', DynMCQanswer_create_view, name='Create DynMCQanswers'),
 
 	path('manage/create/managequestions', Manage_questions_view, name='Manage Questions'),
+	path('manage/create/importquestions', Import_questions_view, name='Import Questions'),
+	path('manage/create/exportquestions.<str:file_format>', Export_questions_view, name='Export Questions'),
 	path('manage/create/question_reallocation/<str:input_id_test>/', Question_reallocation_view, name='Question_reallocation'),
 	path('manage/create/add_difficulty/<str:input_q_num>/', Add_difficulty_view, name='Add Difficulty'),
 	path('manage/create/add_difficulty_question/<str:input_q_num>/', Add_difficulty_question_view, name='Add Difficulty question'),
@@ -84,6 +94,8 @@ urlpatterns = [
 	path('manage/list/pass_test', pass_testslist_teacher_view, name='List pass tests teacher'),
 	path('manage/dashboard/', dashboard_view, name='Dashboard'),
 	path('manage/statistics/<str:input_id_test>/', statistics_view, name='Statistics'),
+	path('manage/statistics/<str:input_id_test>/<str:chart>.png', statistics_chart_view, name='Statistics chart'),
+	path('manage/results/<str:input_id_test>.csv', results_export_view, name='Results export'),
 	
 	path('manage/launch/', launch_view, name='Launch'),
 	path('manage/launch/mcqdyn/<str:input_id_test>/', launch_specific_dynmcq_view, name='Launch Specific McqDyn'),
@@ -93,6 +105,10 @@ urlpatterns = [
 	# Student
 	path('pass/dynmcqtest/<str:input_id_test>/<str:input_id_student>/<int:input_attempt>', DynMCQtest_pass_view, name='Pass dynmcqtest'),
 	path('pass/menudynmcqtest/<str:input_id_test>', DynMCQTest_pass_menu_view, name='Menu Pass dynmcqtest'),
+	path('pass/submitted/<str:input_id_test>/<str:input_id_student>/<int:input_attempt>', submission_pending_view, name='Submission pending'),
+	path('pass/result/<str:input_id_test>/<str:input_id_student>/<int:input_attempt>', submission_result_view, name='Submission result'),
+	path('pass/clock/<str:input_id_test>', exam_clock_view, name='Exam clock'),
+	path('pass/status/<str:input_id_test>/<str:input_id_student>/<int:input_attempt>', attempt_status_view, name='Attempt status'),
 	path('pass/list/', tests_list_student_view, name='List tests student'),
 	path('pass/history/', tests_history_view, name='Tests history'),
 ]
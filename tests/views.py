@@ -1,17 +1,36 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.forms import formset_factory
-from .forms import DynMCQTestInfoForm,DynMCQquestionForm,DynMCQanswerForm,Pass_DynMCQTestForm,DynMCQquestionForm_question,DynMCQTestInfoForm,DynMCQTestInfoForm_questions,Question_difficulty_form,MCQQuestion_difficulty_form,DynMCQTestInfoForm_launch,DynquestionForm,Pass_DynquestionTestForm
-from .models import DynMCQInfo,DynMCQquestion,DynMCQanswer,Pass_DynMCQTest,Pass_DynMCQTest_Info,Dynquestion,Pass_DynquestionTest
-import matplotlib.pyplot as plt
-import numpy as np
+from .forms import DynMCQTestInfoForm,DynMCQquestionForm,DynMCQanswerForm,Pass_DynMCQTestForm,DynMCQquestionForm_question,DynMCQTestInfoForm,DynMCQTestInfoForm_questions,Question_difficulty_form,MCQQuestion_difficulty_form,DynMCQTestInfoForm_launch,DynquestionForm,Pass_DynquestionTestForm,Question_import_form
+from .models import DynMCQInfo,DynMCQTest_Question,DynMCQquestion,DynMCQanswer,Pass_DynMCQTest,Pass_DynMCQTest_Info,Dynquestion,Pass_DynquestionTest,Grading_Job
+from .assembly import load_test_questions,get_test_questions,get_questions_answers_list,invalidate_question
+from .answer_keys import get_answer_key
+from .submissions import save_submission,enqueue_submission
+from .aggregates import get_statistics
+from .mark_statistics import MarkStatistics
+from .availability import get_available_tests
+from .exam_clock import open_test,close_test,start_attempt,seconds_remaining,late_penalty,clock,get_test_clock,attempt_status
+from .charts import CHART_NAMES,get_chart,get_etag,chart_etag,chart_last_modified
+from .exports import results_rows,stream_csv
+from .question_bank import read_questions,import_questions,export_questions
+from .question_choices import set_question_choices,invalidate_question_choices
+from .pass_page import build_pass_forms,render_questions,get_questions_fragment
+from .warmup import warm_test
+from .replica import reporting_view
+from django.core.exceptions import ValidationError
 import datetime
 import time as tm
-from matplotlib.backends.backend_agg import FigureCanvasAgg
 from django.contrib.auth.decorators import login_required,permission_required
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.contrib.auth.models import User,Group,Permission
 from django.urls import reverse
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Substr
+from django.http import HttpResponse, JsonResponse, Http404, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, quote_etag, urlencode
+from django.views.decorators.http import condition
 
 
 def register_view(request):
@@ -126,42 +145,127 @@ def DynMCQTest_menu_view(request):
 	}
 	return render(request, 'manage_tests/menu_dynmcqtest.html',context)
 	
+#Number of characters of the question texts displayed in the lists of questions
+QUESTION_TEXT_PREVIEW = 120
+
+def questions_page(queryset, search, after, page_size):
+	"""Function to get a page of a list of questions, from the question after the q_num after
+	Only q_num, activated, difficulty and the beginning of q_text (short_text) are read.
+	Parameter :
+		queryset (QuerySet) : DynMCQquestion or Dynquestion questions
+		search (str) : text searched in the questions, empty for all the questions
+		after (str) : q_num of the last question of the previous page, None for the first page
+		page_size (int) : number of questions by page
+	Return :
+		questions (list) : the questions of the page
+		next_after (int) : q_num to get the next page, None for the last page
+	"""
+	queryset = queryset.only('q_num', 'activated', 'difficulty').annotate(short_text = Substr('q_text', 1, QUESTION_TEXT_PREVIEW)).order_by('q_num')
+	if search:
+		queryset = queryset.filter(q_text__icontains = search)
+	if after is not None:
+		try:
+			queryset = queryset.filter(q_num__gt = int(after))
+		except ValueError:
+			raise Http404
+	#One more question is read to know if there is a next page
+	questions = list(queryset[:page_size + 1])
+	next_after = None
+	if len(questions) > page_size:
+		questions = questions[:page_size]
+		next_after = questions[-1].q_num
+	return questions, next_after
+
 def Manage_questions_view(request):
 	"""Function to manage the questions (DynMCQquestion and Dynquestion)
 	Render the the manage page for questions
+	
+	The questions containing ?search=<text> are displayed by pages of settings.TESTS_QUESTIONS_PAGE_SIZE questions,
+	the next pages are selected by the q_num of the last displayed question (?mcq_after=<q_num> and ?after=<q_num>).
 	"""
+	page_size = getattr(settings, 'TESTS_QUESTIONS_PAGE_SIZE', 50)
+	search = request.GET.get('search', '').strip()
 	#Get the questions
-	DynMCQquestions = DynMCQquestion.objects.all()
-	Dynquestions = Dynquestion.objects.all()
+	DynMCQquestions, mcq_after = questions_page(DynMCQquestion.objects.all(), search, request.GET.get('mcq_after'), page_size)
+	Dynquestions, after = questions_page(Dynquestion.objects.all(), search, request.GET.get('after'), page_size)
+	
+	#Links to the next pages, keeping the search and the page of the other list
+	mcq_next = None
+	if mcq_after is not None:
+		mcq_next = reverse('tests:Manage Questions') + '?' + urlencode([(key, value) for key, value in (('search', search), ('mcq_after', mcq_after), ('after', request.GET.get('after'))) if value])
+	normal_next = None
+	if after is not None:
+		normal_next = reverse('tests:Manage Questions') + '?' + urlencode([(key, value) for key, value in (('search', search), ('mcq_after', request.GET.get('mcq_after')), ('after', after)) if value])
 			
 	context = {
 		'DynMCQquestions' : DynMCQquestions,
 		'Dynquestions' : Dynquestions,
+		'search' : search,
+		'mcq_next' : mcq_next,
+		'normal_next' : normal_next,
+		'first_page' : request.GET.get('mcq_after') is None and request.GET.get('after') is None,
 	}
 	return render(request, 'manage_tests/manage_questions.html',context)
 	
+@login_required
+@permission_required('tests.can_create_test', raise_exception=True)
+def Import_questions_view(request):
+	"""Function to import a question bank (JSON or CSV file)
+	The questions and their answers are inserted together, nothing is inserted if a question is invalid
+	Returns the page to upload the file
+	"""
+	form = Question_import_form()
+	errors = []
+	if request.method == 'POST':
+		form = Question_import_form(request.POST, request.FILES)
+		if form.is_valid():
+			questions_file = form.cleaned_data['questions_file']
+			file_format = questions_file.name.lower().rsplit('.', 1)[-1]
+			try:
+				questions = read_questions(questions_file.read().decode('utf-8-sig'), file_format)
+				nb_mcq, nb_normal, nb_answers = import_questions(questions)
+			except UnicodeDecodeError:
+				errors = ["The file must be encoded in UTF-8"]
+			except ValidationError as error:
+				errors = error.messages
+			else:
+				messages.success(request, "%d MCQ questions (%d answers) and %d questions imported" % (nb_mcq, nb_answers, nb_normal))
+				return redirect('tests:Manage Questions')
+	
+	context = {
+		'form': form,
+		'errors': errors,
+	}
+	return render(request, 'manage_tests/import_questions.html', context)
+	
+@login_required
+@permission_required('tests.can_create_test', raise_exception=True)
+def Export_questions_view(request, file_format):
+	"""Function to export the question bank
+	Returns the JSON or CSV file, streamed while the questions are read (see question_bank.py)
+	"""
+	if file_format not in ('json', 'csv'):
+		raise Http404
+	content_type = 'application/json' if file_format == 'json' else 'text/csv'
+	response = StreamingHttpResponse(export_questions(file_format), content_type=content_type)
+	response['Content-Disposition'] = 'attachment; filename="questions.%s"' % file_format
+	return response
+	
 def DynMCQquestion_select_menu_view(request, input_id_test):
 	"""Function to put questions in the test if there are not questions in the test
 	Returns the page to manage the test
+	
+	The questions containing ?search=<text> are proposed, settings.TESTS_QUESTION_CHOICES_LIMIT at most (see question_choices.py).
 	"""
 	#Get the test informations
 	DynMCQTestInfo = get_object_or_404(DynMCQInfo, id_test=input_id_test)
+	search = request.GET.get('search', '')
+	truncated = False
 	empty = False
 	DynMCQquestionTestList = []
 	DynquestionTestList = []
-	#If there are questions in the test
-	if(DynMCQTestInfo.questions != ""):
-		num_questions = get_questions(DynMCQTestInfo.questions)#Get id number of the questions
-
-		mcq_questions = num_questions[0]
-		normal_questions = num_questions[1]
-		#We get the question instances for both type of question in two list
-		for i in range(len(mcq_questions)):
-			DynMCQQuestion = DynMCQquestion.objects.get(q_num = mcq_questions[i])
-			DynMCQquestionTestList.append(DynMCQQuestion)
-		for i in range(len(normal_questions)):
-			DynQuestion = Dynquestion.objects.get(q_num = normal_questions[i])
-			DynquestionTestList.append(DynQuestion)
+	#If there are questions in the test, we get the question instances for both type of question in two list
+	DynMCQquestionTestList, DynquestionTestList, _ = load_test_questions(DynMCQTestInfo)
 
 	form = []
 	#If there are not questions in the test, we display the form to put questions in the test
@@ -175,65 +279,21 @@ def DynMCQquestion_select_menu_view(request, input_id_test):
 			'form-MAX_NUM_FORMS': '',
 		}
 	
-		form = QuestionsSet()#Formset
-		choices = []#Choice for DynMCQquestion
-		choices2 = []#Choice for Dynquestion
-		DynMCQquestions = DynMCQquestion.objects.all()
-		Dynquestions = Dynquestion.objects.all()
-		#Filling the choice for DynMCQquestion with [q_num,q_text] for each questions (q_text is displayed and q_num is the returned value)
-		for question in DynMCQquestions:
-			list = []
-			list.append(int(question.q_num))
-			list.append(question.q_text)
-			choices.append(list)
-		form[0].fields['questions'].choices = choices
-		#Same for Dynquestion
-		for question in Dynquestions:
-			list = []
-			list.append(int(question.q_num))
-			list.append(question.q_text)
-			choices2.append(list)
-		form[1].fields['questions'].choices = choices2
-		
+		#The choices [q_num,q_text] of the questions are cached (q_text is displayed and q_num is the returned value)
 		if request.method == 'POST':
-			#Same code for method POST to put the data in the app
-			form = QuestionsSet(request.POST)
-			choices = []
-			choices2 = []
-			DynMCQquestions = DynMCQquestion.objects.all()
-			Dynquestions = Dynquestion.objects.all()
-			for question in DynMCQquestions:
-				list = []
-				list.append(int(question.q_num))
-				list.append(question.q_text)
-				choices.append(list)
-			form[0].fields['questions'].choices = choices
-			for question in Dynquestions:
-				list = []
-				list.append(int(question.q_num))
-				list.append(question.q_text)
-				choices2.append(list)
-			form[1].fields['questions'].choices = choices2
+			form = QuestionsSet(request.POST)#Formset with the data of the app
+			set_question_choices(form)
 		
 			#If form is valid, we save the questions in the test
 			if form.is_valid():
-				test = form[0].save(commit = False)
-				test2 = form[1].save(commit = False)
-				DynMCQTestInfo.questions = "a" + test.questions + "b" + test2.questions #Save the questions as "a[MCQ_ids,...]b[Normal_question_ids,...]" in the test
-				DynMCQTestInfo.save()
+				DynMCQTestInfo.set_questions(form[0].cleaned_data['questions'], form[1].cleaned_data['questions']) #Save the questions in the order of the test
 				
 				empty = False
 				#Then get the questions to display it on the page
-				num_questions = get_questions(DynMCQTestInfo.questions)
-
-				mcq_questions = num_questions[0]
-				normal_questions = num_questions[1]
-				for i in range(len(mcq_questions)):
-					DynMCQQuestion = DynMCQquestion.objects.get(q_num = mcq_questions[i])
-					DynMCQquestionTestList.append(DynMCQQuestion)
-				for i in range(len(normal_questions)):
-					DynQuestion = Dynquestion.objects.get(q_num = normal_questions[i])
-					DynquestionTestList.append(DynQuestion)
+				DynMCQquestionTestList, DynquestionTestList, _ = load_test_questions(DynMCQTestInfo)
+		else:
+			form = QuestionsSet()#Formset
+			truncated = set_question_choices(form, search)
 			
 	context = {
 		'DynMCQquestionTestList': DynMCQquestionTestList,
@@ -241,6 +301,8 @@ def DynMCQquestion_select_menu_view(request, input_id_test):
 		'DynMCQTestInfo': DynMCQTestInfo,
 		'form': form,
 		'empty':empty,
+		'search': search,
+		'truncated': truncated,
 	}
 	return render(request, 'manage_tests/selectmenu_dynmcqtest.html',context)
 	
@@ -248,26 +310,16 @@ def Question_reallocation_view(request, input_id_test):
 	"""Function to reallocate the questions in the test.
 	Display the form for filling the questions in the test.
 	Returns the page for reallocate questions
+	
+	The questions containing ?search=<text> are proposed, settings.TESTS_QUESTION_CHOICES_LIMIT at most (see question_choices.py).
 	"""
 	#Get the test info
 	DynMCQTestInfo = get_object_or_404(DynMCQInfo, id_test=input_id_test)
+	search = request.GET.get('search', '')
 	
-	#Get the actual questions
-	num_questions = get_questions(DynMCQTestInfo.questions)
+	#Get the actual questions in a list
+	DynMCQquestionTestList, DynquestionTestList, _ = load_test_questions(DynMCQTestInfo)
 	empty = True
-
-	DynMCQquestionTestList = []
-	DynquestionTestList = []
-	
-	mcq_questions = num_questions[0]
-	normal_questions = num_questions[1]
-	#We put the questions in a list
-	for i in range(len(mcq_questions)):
-		DynMCQQuestion = DynMCQquestion.objects.get(q_num = mcq_questions[i])
-		DynMCQquestionTestList.append(DynMCQQuestion)
-	for i in range(len(normal_questions)):
-		DynQuestion = Dynquestion.objects.get(q_num = normal_questions[i])
-		DynquestionTestList.append(DynQuestion)
 				
 	QuestionsSet = formset_factory(DynMCQTestInfoForm_questions, extra = 2)
 	#Three mandatory properties for formset 
@@ -277,67 +329,26 @@ def Question_reallocation_view(request, input_id_test):
 		'form-MAX_NUM_FORMS': '',
 	}
 	
-	form = QuestionsSet()#Formset
-	choices = []#Choice for DynMCQquestion
-	choices2 = []#Choice for Dynquestion
-	DynMCQquestions = DynMCQquestion.objects.all()
-	Dynquestions = Dynquestion.objects.all()
-	#Filling the choice for DynMCQquestion with [q_num,q_text] for each questions (q_text is displayed and q_num is the returned value)
-	for question in DynMCQquestions:
-		list = []
-		list.append(int(question.q_num))
-		list.append(question.q_text)
-		choices.append(list)
-	form[0].fields['questions'].choices = choices
-	#Same for Dynquestion
-	for question in Dynquestions:
-		list = []
-		list.append(int(question.q_num))
-		list.append(question.q_text)
-		choices2.append(list)
-	form[1].fields['questions'].choices = choices2
-	
+	truncated = False
+	#The choices [q_num,q_text] of the questions are cached
 	if request.method == 'POST':
-		#Same code for method POST to put the data in the app
-		form = QuestionsSet(request.POST)
-		choices = []
-		choices2 = []
-		DynMCQquestions = DynMCQquestion.objects.all()
-		Dynquestions = Dynquestion.objects.all()
-		for question in DynMCQquestions:
-			list = []
-			list.append(int(question.q_num))
-			list.append(question.q_text)
-			choices.append(list)
-		form[0].fields['questions'].choices = choices
-		for question in Dynquestions:
-			list = []
-			list.append(int(question.q_num))
-			list.append(question.q_text)
-			choices2.append(list)
-		form[1].fields['questions'].choices = choices2
+		form = QuestionsSet(request.POST)#Formset with the data of the app
+		set_question_choices(form)
 		
 		#If form is valid, we save the questions in the test
 		if form.is_valid():
-			test = form[0].save(commit = False)
-			test2 = form[1].save(commit = False)
-			DynMCQTestInfo.questions = "a" + test.questions + "b" + test2.questions #Save the questions as "a[MCQ_ids,...]b[Normal_question_ids,...]" in the test
-			DynMCQTestInfo.save()
+			DynMCQTestInfo.set_questions(form[0].cleaned_data['questions'], form[1].cleaned_data['questions']) #Save the questions in the order of the test
 			
 			empty = False
-			num_questions = get_questions(DynMCQTestInfo.questions)
-
 			#Then get the questions to display it on the page
-			mcq_questions = num_questions[0]
-			normal_questions = num_questions[1]
-			DynMCQquestionTestList = []
-			DynquestionTestList = []
-			for i in range(len(mcq_questions)):
-				DynMCQQuestion = DynMCQquestion.objects.get(q_num = mcq_questions[i])
-				DynMCQquestionTestList.append(DynMCQQuestion)
-			for i in range(len(normal_questions)):
-				DynQuestion = Dynquestion.objects.get(q_num = normal_questions[i])
-				DynquestionTestList.append(DynQuestion)
+			DynMCQquestionTestList, DynquestionTestList, _ = load_test_questions(DynMCQTestInfo)
+	else:
+		form = QuestionsSet()#Formset
+		#The actual questions are checked and always displayed
+		selected = DynMCQTestInfo.get_question_ids()
+		truncated = set_question_choices(form, search, selected)
+		for question, q_nums in zip(form, selected):
+			question.fields['questions'].initial = q_nums
 			
 	context = {
 		'DynMCQquestionTestList': DynMCQquestionTestList,
@@ -345,48 +356,11 @@ def Question_reallocation_view(request, input_id_test):
 		'DynMCQTestInfo': DynMCQTestInfo,
 		'form': form,
 		'empty':empty,
+		'search': search,
+		'truncated': truncated,
 	}
 	return render(request, 'manage_tests/question_reallocation.html',context)
 
-def get_questions(questions):
-	"""Function the extract the question ids of the test
-	Parameter : 
-		questions (str) : questions of the test for example : a[1,5,6]b[1,9,11] or a[4,5]b or ab[4,9,7]
-	Returns :
-		num_questions (list) : list of two list, num_questions[0] contains id_questions for MCQquestions and num_questions[1] contains id_questions for Normal questions
-	"""
-	num_questions = []
-	#Case where there are both MCQ and normal questions in the test so questions as a[1,5,6]b[1,9,11]
-	if "]b[" in questions:
-		num_questions = questions.split("]b[")
-		num_questions[0] = num_questions[0].replace("a","")
-		num_questions[1] = num_questions[1].replace("b","")
-		num_questions[0] = num_questions[0].replace("[","")
-		num_questions[1] = num_questions[1].replace("]","")
-		num_questions[0] = num_questions[0].replace("'","")
-		num_questions[1] = num_questions[1].replace("'","")
-		num_questions[0] = num_questions[0].split(",")
-		num_questions[1] = num_questions[1].split(",")
-	else:
-		posA = questions.find("a")
-		str = questions
-		str = str.replace("a","")
-		str = str.replace("b","")
-		str = str.replace("[","")
-		str = str.replace("]","")
-		str = str.replace("'","")
-		listquestions = str.split(",")
-		list = []
-		#Case where there are only normal questions in the test so questions as ab[4,9,7]
-		if(questions[posA+1] == "b"):
-			num_questions.append(list)
-			num_questions.append(listquestions)
-		#Case where there are only MCQ questions in the test so questions as a[4,5]b
-		else :
-			num_questions.append(listquestions)
-			num_questions.append(list)
-	return num_questions	#Returns [[1,5,6],[1,9,11]], [[],[4,9,7]], [[4,5],[]] in each different cases
-	
 def DynMCQquestion_create_view(request, input_q_num):
 	"""Function to create a DynMCQquestion
 	Return the page to create a DynMCQquestion
@@ -404,6 +378,7 @@ def DynMCQquestion_create_view(request, input_q_num):
 		form = DynMCQquestionForm(request.POST, instance = DynMCQquestionTest)
 		if form.is_valid():
 			form.save()
+			invalidate_question_choices()
 			form = DynMCQquestionForm()
 			empty_question = False
 	#If the question is filled, we check if there are answers in the questions to display it
@@ -436,6 +411,8 @@ def Dynquestion_create_view(request, input_q_num):
 		form = DynquestionForm(request.POST, instance = DynquestionTest)
 		if form.is_valid():
 			form.save()
+			invalidate_question(DynMCQTest_Question.NORMAL, input_q_num)
+			invalidate_question_choices()
 			form = DynquestionForm()
 			empty_question = False
 	else:
@@ -610,6 +587,7 @@ def DynMCQanswer_create_view(request, input_q_num):
 					answer_count += 1
 					dynMCQanswer.save()
 					empty_answer = False
+					invalidate_question(DynMCQTest_Question.MCQ, input_q_num)
 					#We get the answers to display it
 					DynMCQanswerTest = DynMCQanswer.objects.filter(q_num = input_q_num)
 					DynMCQanswerTest_List = []
@@ -685,178 +663,99 @@ def DynMCQtest_pass_view(request,input_id_test, input_id_student, input_attempt)
 	DynMCQTestInfo = get_object_or_404(DynMCQInfo, id_test=input_id_test)
 	#Get the pass_test
 	Pass_DynMCQInfo = get_object_or_404(Pass_DynMCQTest_Info, id_test=input_id_test, id_student = input_id_student, attempt = input_attempt)
-	#Get the number of the questions
-	num_questions = get_questions(DynMCQTestInfo.questions)
-	
-	#Computing less time to complete the tests
-	release_time = get_date(DynMCQTestInfo.release_time)
-	limit_time = add_time(release_time,DynMCQTestInfo.time)
-	now = get_date(str(datetime.datetime.today()))
-	delta = compare_date(now,limit_time)
-	
-	DynMCQquestionTestList = []
-	DynquestionTestList = []
-	
-	mcq_questions = num_questions[0]
-	normal_questions = num_questions[1]
-	
-	#We get the questions
-	for i in range(len(mcq_questions)):
-		DynMCQQuestion = DynMCQquestion.objects.get(q_num = mcq_questions[i])
-		DynMCQquestionTestList.append(DynMCQQuestion)
-	for i in range(len(normal_questions)):
-		DynQuestion = Dynquestion.objects.get(q_num = normal_questions[i])
-		DynquestionTestList.append(DynQuestion)
 	
-	nb_mcq_questions = len(mcq_questions)
-	nb_normal_questions = len(normal_questions)
+	#Recording the first opening of the attempt
+	start_attempt(Pass_DynMCQInfo)
 	
-	double_type_question = False
-	if nb_mcq_questions > 0 and nb_normal_questions > 0:
-		double_type_question = True
-	
-	form_mcq_answers = []
-	form_normal_answers = []
-	
-	#For MCQ questions 
-	if(nb_mcq_questions > 0):
-		#We create a formset of nb_mcq_questions of Pass_DynMCQTestForm
-		PassDynMCQTestSet = formset_factory(Pass_DynMCQTestForm, extra = int(nb_mcq_questions))
-		#Three mandatory properties for formset
-		data = {
-			'form-TOTAL_FORMS': int(nb_mcq_questions),
-			'form-INITIAL_FORMS': '0',
-			'form-MAX_NUM_FORMS': '',
-		}
-		
-		form_mcq_answers = PassDynMCQTestSet()#Formset
-		#We get the answers of each questions and we put them in the choices for checkbox
-		i = 0
-		for ans in form_mcq_answers:
-			choices = []
-			DynMCQanswers = DynMCQanswer.objects.filter(q_num = mcq_questions[i])
-			#Get the answers in list ('returned value','displayed text') for each answers
-			for answer in DynMCQanswers:
-				list = []
-				list.append(answer.ans_num)
-				list.append(answer.ans_text)
-				choices.append(list)
-			ans.fields['r_ans'].choices = choices #Filling the choices as list of [ans_num,ans_text]
-			i += 1
+	if request.method == 'POST':
+		#The posted answers are checked against the choices of the questions
+		form_mcq_answers, form_normal_answers, DynMCQquestionTestList, DynquestionTestList = build_pass_forms(DynMCQTestInfo, request.POST)
+		mcq_valid = len(DynMCQquestionTestList) == 0 or form_mcq_answers.is_valid()
+		normal_valid = len(DynquestionTestList) == 0 or form_normal_answers.is_valid()
+		if (DynMCQquestionTestList or DynquestionTestList) and mcq_valid and normal_valid:
+			#Filling automaticaly fields, nothing is written before the whole submission is ready
+			mcq_answers = []
+			for instance, question in zip(form_mcq_answers, DynMCQquestionTestList):
+				pass_dynMCQtest = instance.save(commit=False)
+				pass_dynMCQtest.id_test = input_id_test
+				pass_dynMCQtest.id_student = input_id_student
+				pass_dynMCQtest.q_num = str(question.q_num)
+				pass_dynMCQtest.attempt = input_attempt
+				mcq_answers.append(pass_dynMCQtest)
+			normal_answers = []
+			for instance, question in zip(form_normal_answers, DynquestionTestList):
+				pass_dynquestiontest = instance.save(commit=False)
+				pass_dynquestiontest.id_test = input_id_test
+				pass_dynquestiontest.id_student = input_id_student
+				pass_dynquestiontest.q_num = str(question.q_num)
+				pass_dynquestiontest.attempt = input_attempt
+				normal_answers.append(pass_dynquestiontest)
 			
-		#Same code for method POST
-		if request.method == 'POST':
-			form_mcq_answers = PassDynMCQTestSet(request.POST)
-			i = 0
-			for ans in form_mcq_answers:
-				choices = []
-				DynMCQanswers = DynMCQanswer.objects.filter(q_num = mcq_questions[i])
-				for answer in DynMCQanswers:
-					list = []
-					list.append(answer.ans_num)
-					list.append(answer.ans_text)
-					choices.append(list)
-				ans.fields['r_ans'].choices = choices
-				i += 1
-		
-			if form_mcq_answers.is_valid():
-				question_count = 0
-				Pass_DynMCQInfo.time = datetime.datetime.today()
-				#Filling automaticaly fields
-				for instance in form_mcq_answers:
-					pass_dynMCQtest = instance.save(commit=False)
-					pass_dynMCQtest.id_test = input_id_test
-					pass_dynMCQtest.id_student = input_id_student
-					pass_dynMCQtest.q_num = mcq_questions[question_count]
-					pass_dynMCQtest.attempt = input_attempt
-					#We get the right answers of the question
-					right_answers = DynMCQanswer.objects.filter(q_num = mcq_questions[question_count], right_ans = 1)
-					num_right_answers = []
-					for ans in right_answers:
-						num_right_answers.append(ans.ans_num)
-					#We check if the answer is right
-					if check_answer(pass_dynMCQtest.r_ans,num_right_answers):
-						Pass_DynMCQInfo.mark += 1
-					Pass_DynMCQInfo.save()
-					question_count += 1
-					pass_dynMCQtest.save()
-					
-				if double_type_question is False:
-					#Compare limit time with released time
-					time_left = compare_date(get_date(str(datetime.datetime.today())),limit_time)
-					#If time left > 30 sec we put a penalty of 1 point every minute
-					if time_left < -0.5:
-						min_left = str(time_left).split(".")
-						Pass_DynMCQInfo.mark += int(min_left[0])
-						if(Pass_DynMCQInfo.mark < 0):
-							Pass_DynMCQInfo.mark = 0
-						Pass_DynMCQInfo.save()
-					return redirect('/')
-	
-	#For normal questions
-	if(nb_normal_questions > 0):
-		#We create a formset of nb_normal_questions of Pass_DynquestionTestForm
-		PassDynquestionTestSet = formset_factory(Pass_DynquestionTestForm, extra = int(nb_normal_questions))
-		#Three mandatory properties for formset
-		data = {
-			'form-TOTAL_FORMS': int(nb_normal_questions),
-			'form-INITIAL_FORMS': '0',
-			'form-MAX_NUM_FORMS': '',
-		}
-		
-		form_normal_answers = PassDynquestionTestSet()
+			#If the submission is more than 30 sec late we put a penalty of 1 point every minute
+			penalty = late_penalty(DynMCQTestInfo)
 			
-		if request.method == 'POST':
-			form_normal_answers = PassDynquestionTestSet(request.POST)
-		
-			if form_normal_answers.is_valid():
-				question_count = 0
-				Pass_DynMCQInfo.time = datetime.datetime.today()
-				#Filling automaticaly fields
-				for instance in form_normal_answers:
-					if question_count < len(normal_questions):
-						pass_dynMCQtest = instance.save(commit=False)
-						pass_dynMCQtest.id_test = input_id_test
-						pass_dynMCQtest.id_student = input_id_student
-						pass_dynMCQtest.q_num = normal_questions[question_count]
-						pass_dynMCQtest.attempt = input_attempt
-						#We get the right answer of the question
-						question = Dynquestion.objects.get(q_num = normal_questions[question_count])
-						right_ans = str(question.r_text)
-						student_ans = str(pass_dynMCQtest.r_answer)
-						#We check if the answer is right
-						if student_ans.lower() == right_ans.lower():
-							Pass_DynMCQInfo.mark += 1
-						Pass_DynMCQInfo.save()
-						question_count += 1
-						pass_dynMCQtest.save()
-						
-				#Compare limit time with released time
-				time_left = compare_date(get_date(str(datetime.datetime.today())),limit_time)
-				#If time left > 30 sec we put a penalty of 1 point every minute
-				if time_left < -0.5:
-					min_left = str(time_left).split(".")
-					Pass_DynMCQInfo.mark += int(min_left[0])
-					if(Pass_DynMCQInfo.mark < 0):
-						Pass_DynMCQInfo.mark = 0
-					Pass_DynMCQInfo.save()
-				return redirect('/')
+			#The answers are only recorded, the grade_submissions command computes the mark
+			if getattr(settings, 'TESTS_ASYNC_GRADING', False):
+				enqueue_submission(Pass_DynMCQInfo, mcq_answers, normal_answers, penalty, datetime.datetime.today())
+				return redirect(Pass_DynMCQInfo.get_absolute_url_result())
+			
+			#We check the answers with the answer key of the test
+			answer_key = get_answer_key(DynMCQTestInfo)
+			right_questions = answer_key.right_questions([(answer.q_num, answer.r_ans) for answer in mcq_answers],[(answer.q_num, answer.r_answer) for answer in normal_answers])
+			mark = max(len(right_questions) - penalty, 0)
+			
+			save_submission(Pass_DynMCQInfo, mcq_answers, normal_answers, mark, datetime.datetime.today(), right_questions, penalty)
+			return redirect('/')
+				
+		#The questions are rendered again with the errors of the answers
+		questions_fragment = render_questions(form_mcq_answers, form_normal_answers, DynMCQquestionTestList, DynquestionTestList)
+	else:
+		#Only the attempt, the CSRF token and the remaining time depend on the request
+		questions_fragment = get_questions_fragment(DynMCQTestInfo)
 				
 	context = {
 		'Pass_DynMCQInfo' : Pass_DynMCQInfo,
 		'DynMCQTestInfo':DynMCQTestInfo,
-		'form_mcq_answers': form_mcq_answers,
-		'form_normal_answers':form_normal_answers,
-		'DynMCQquestionTestList':DynMCQquestionTestList,
-		'DynquestionTestList' : DynquestionTestList,
-		'nb_normal_questions':nb_normal_questions,
-		'nb_mcq_questions':nb_mcq_questions,
-		'release_time':release_time,
-		'limit_time':limit_time,
-		'delta':delta,
+		'questions_fragment':questions_fragment,
+		'remaining':seconds_remaining(DynMCQTestInfo),
+		'sync_url':reverse('tests:Attempt status', kwargs={'input_id_test': input_id_test, 'input_id_student': input_id_student, 'input_attempt': input_attempt}),
 	}
 	return render(request, 'pass_tests/dynMCQtest_pass.html', context)
 
+@login_required
+def submission_pending_view(request, input_id_test, input_id_student, input_attempt):
+	"""Function to display the page waiting for the mark of a submission graded by the grade_submissions command
+	Returns the waiting page, which polls submission_result_view
+	"""
+	Pass_DynMCQInfo = get_object_or_404(Pass_DynMCQTest_Info, id_test=input_id_test, id_student = input_id_student, attempt = input_attempt)
+	context = {
+		'Pass_DynMCQInfo' : Pass_DynMCQInfo,
+	}
+	return render(request, 'pass_tests/submission_pending.html', context)
+
+@login_required
+def submission_result_view(request, input_id_test, input_id_student, input_attempt):
+	"""Function to get the grading state of a submission
+	Returns a JSON object : {'submitted': bool, 'graded': bool, 'mark': int or null}
+	"""
+	#A student can only see his own results
+	if request.user.username != input_id_student and not request.user.has_perm('tests.can_see_test'):
+		raise Http404
+	Pass_DynMCQInfo = get_object_or_404(Pass_DynMCQTest_Info, id_test=input_id_test, id_student = input_id_student, attempt = input_attempt)
+	job = Grading_Job.objects.filter(id_test = input_id_test, id_student = input_id_student, attempt = input_attempt).values_list('status', flat=True).first()
+	if job is not None:
+		submitted = True
+		graded = job == Grading_Job.DONE
+	else:
+		#Submissions graded during the request have no job
+		submitted = Pass_DynMCQTest.objects.filter(id_test = input_id_test, id_student = input_id_student, attempt = input_attempt).exists() or Pass_DynquestionTest.objects.filter(id_test = input_id_test, id_student = input_id_student, attempt = input_attempt).exists()
+		graded = submitted
+	return JsonResponse({
+		'submitted': submitted,
+		'graded': graded,
+		'mark': Pass_DynMCQInfo.mark if graded else None,
+	})
+
 def check_answer(stu_answer,num_right_answers):
 	'''Funtion to check if the answer of the user is right or not
 	Parameter :
@@ -898,8 +797,7 @@ def pass_dynMCQtest_display_view(request,input_id_test,input_id_student,input_at
 	Pass_DynMCQtest = Pass_DynMCQTest.objects.filter(id_test = input_id_test, id_student = input_id_student,attempt = input_attempt)
 	Pass_Dynquestiontest = Pass_DynquestionTest.objects.filter(id_test = input_id_test, id_student = input_id_student,attempt = input_attempt)
 	#Get the questions of the test
-	num_questions = get_questions(DynMCQTestInfo.questions)
-	nb_questions = len(num_questions[0]) + len(num_questions[1])
+	nb_questions = DynMCQTestInfo.test_questions.count()
 	Pass_DynMCQtest_List = []
 	Pass_Dynquestiontest_List = []
 	for instance in Pass_DynMCQtest:
@@ -921,35 +819,11 @@ def DynMCQtest_display_view(request, input_id_test):
 	"""
 	#Get the info
 	DynMCQTestInfo = get_object_or_404(DynMCQInfo, id_test=input_id_test)
-	num_questions = get_questions(DynMCQTestInfo.questions)
-	mcq_questions = num_questions[0]
-	normal_questions = num_questions[1]
-	
-	DynMCQquestions_List = []
-	Dynquestions_List = []
-	#Get the questions
-	for i in range(len(normal_questions)):
-		DynQuestion = Dynquestion.objects.get(q_num = normal_questions[i])
-		Dynquestions_List.append(DynQuestion)
-	
-	for i in range(len(mcq_questions)):
-		DynMCQQuestion = DynMCQquestion.objects.get(q_num = mcq_questions[i])
-		DynMCQquestions_List.append(DynMCQQuestion)
-	
-	#Get the answers for mcq questions
-	DynMCQanswers = []
-	for i in range(len(mcq_questions)):
-		theDynMCQanswers = DynMCQanswer.objects.filter(q_num = int(mcq_questions[i]))
-		for ans in theDynMCQanswers:
-			DynMCQanswers.append(ans)
+	#Get the questions and the answers for mcq questions
+	DynMCQquestions_List, Dynquestions_List, DynMCQanswers = load_test_questions(DynMCQTestInfo)
 		
 	#We order the questions and the answers in a same list to properly display it
-	Questions_Answers_List = []
-	for question in DynMCQquestions_List:
-		Questions_Answers_List.append(question)
-		DynMCQanswers = DynMCQanswer.objects.filter(q_num = question.q_num)
-		for answer in DynMCQanswers:
-			Questions_Answers_List.append(answer)
+	Questions_Answers_List = get_questions_answers_list(DynMCQquestions_List, DynMCQanswers)
 			
 	context = {
 		'DynMCQquestions_List':DynMCQquestions_List,
@@ -970,6 +844,9 @@ def Edit_DynMCQquestion_view(request,input_q_num):
 	form = DynMCQquestionForm_question(request.POST, instance = DynMCQquestionTest)
 	if form.is_valid():
 		form.save()
+		#The text of the question is cached with the tests using it
+		invalidate_question(DynMCQTest_Question.MCQ, input_q_num)
+		invalidate_question_choices()
 		form = DynMCQquestionForm_question(instance = DynMCQquestionTest)
 			
 	context = {
@@ -989,6 +866,9 @@ def Edit_Dynquestion_view(request,input_q_num):
 	form = DynquestionForm(request.POST, instance = DynquestionTest)
 	if form.is_valid():
 		form.save()
+		#The expected answer may have changed
+		invalidate_question(DynMCQTest_Question.NORMAL, input_q_num)
+		invalidate_question_choices()
 		form = DynquestionForm(instance = DynquestionTest)
 			
 	context = {
@@ -1009,6 +889,8 @@ def Edit_DynMCQanswer_view(request,input_q_num,input_ans_num):
 	form = DynMCQanswerForm(request.POST, instance = DynMCQanswerTest)
 	if form.is_valid():
 		form.save()
+		#The right answers may have changed
+		invalidate_question(DynMCQTest_Question.MCQ, input_q_num)
 		form = DynMCQanswerForm(instance = DynMCQanswerTest)
 			
 	context = {
@@ -1020,51 +902,36 @@ def Edit_DynMCQanswer_view(request,input_q_num,input_ans_num):
 	
 def Delete_DynMCQquestion_view(request,input_q_num):
 	"""Function to delete a DynMCQquestion question
-	Return the page of managing questions
+	Redirects to the page of managing questions
 	"""
 	#Get the question
 	DynMCQquestionTest = get_object_or_404(DynMCQquestion, q_num = input_q_num)
 	
-	#Delete the question
+	#Delete the question and remove it from the tests
 	DynMCQquestionTest.delete()
+	invalidate_question(DynMCQTest_Question.MCQ, input_q_num)
+	invalidate_question_choices()
+	DynMCQTest_Question.objects.filter(q_type = DynMCQTest_Question.MCQ, q_num = input_q_num).delete()
 	
-	#Get the question answers and delete each answers
-	answers = DynMCQanswer.objects.filter(q_num = input_q_num)
-	answers_list = []
-	for instance in answers :
-			answers_list.append(instance)
-	for instance in answers_list :
-		instance.delete()
-			
-	#Get the questions to display it
-	DynMCQquestions = DynMCQquestion.objects.all()		
-	Dynquestions = Dynquestion.objects.all()	
+	#Delete the answers of the question
+	DynMCQanswer.objects.filter(q_num = input_q_num).delete()
 	
-	context = {
-		'Dynquestions': Dynquestions,
-		'DynMCQquestions': DynMCQquestions,
-	}
-	return render(request, 'manage_tests/manage_questions.html', context)
+	return redirect('tests:Manage Questions')
 	
 def Delete_Dynquestion_view(request,input_q_num):
 	"""Function to delete a Dynquestion question
-	Return the page of managing questions
+	Redirects to the page of managing questions
 	"""
 	#Get the question
 	DynquestionTest = get_object_or_404(Dynquestion, q_num = input_q_num)
 	
-	#Delete the question
+	#Delete the question and remove it from the tests
 	DynquestionTest.delete()
-			
-	#Get the questions to display it
-	DynMCQquestions = DynMCQquestion.objects.all()
-	Dynquestions = Dynquestion.objects.all()		
+	invalidate_question(DynMCQTest_Question.NORMAL, input_q_num)
+	invalidate_question_choices()
+	DynMCQTest_Question.objects.filter(q_type = DynMCQTest_Question.NORMAL, q_num = input_q_num).delete()
 	
-	context = {
-		'DynMCQquestions': DynMCQquestions,
-		'Dynquestions': Dynquestions,
-	}
-	return render(request, 'manage_tests/manage_questions.html', context)
+	return redirect('tests:Manage Questions')
 	
 def Delete_DynMCQanswer_view(request,input_q_num,input_ans_num):
 	"""Function to delete a DynMCQanswer answer
@@ -1092,6 +959,7 @@ def Delete_DynMCQanswer_view(request,input_q_num,input_ans_num):
 		tmp_answer.ans_num -= 1
 		tmp_answer.save()
 		answer_num += 1
+	invalidate_question(DynMCQTest_Question.MCQ, input_q_num)
 	
 	#We get the answers to display them
 	the_DynMCQanswer = DynMCQanswer.objects.filter(q_num = input_q_num)
@@ -1111,41 +979,25 @@ def Delete_DynMCQanswer_view(request,input_q_num,input_ans_num):
 	
 def Add_DynMCQquestion_view(request):	
 	"""Function to add a DynMCQquestion question
-	Returns the page to manage questions
+	Redirects to the page to fill the new question
 	"""
 	#Creating the new question
 	DynamicMCQquestion = DynMCQquestion.objects.create()
-	DynamicMCQquestion.save()
-	
-	#Get all the questions to display it
-	DynMCQquestions = DynMCQquestion.objects.all()
-	Dynquestions = Dynquestion.objects.all()
+	invalidate_question_choices()
 	
-	context = {
-		'DynMCQquestions' : DynMCQquestions,
-		'Dynquestions' : Dynquestions,
-	}
-
-	return render(request, 'manage_tests/manage_questions.html',context)
+	#The question is filled on its page
+	return redirect(DynamicMCQquestion.get_absolute_url_question())
 	
 def Add_Dynquestion_view(request):
 	"""Function to add a Dynquestion question
-	Returns the page to manage questions
+	Redirects to the page to fill the new question
 	"""
 	#Creating the new question
 	Dynamicquestion = Dynquestion.objects.create()
-	Dynamicquestion.save()
+	invalidate_question_choices()
 	
-	#Get all the questions to display it
-	DynMCQquestions = DynMCQquestion.objects.all()
-	Dynquestions = Dynquestion.objects.all()
-	
-	context = {
-		'DynMCQquestions' : DynMCQquestions,
-		'Dynquestions' : Dynquestions,
-	}
-
-	return render(request, 'manage_tests/manage_questions.html',context)
+	#The question is filled on its page
+	return redirect(Dynamicquestion.get_absolute_url_question())
 	
 def Add_DynMCQanswer_view(request,input_q_num):
 	"""Function to add a DynMCQanswer answer
@@ -1169,6 +1021,7 @@ def Add_DynMCQanswer_view(request,input_q_num):
 		#We change the number of answers
 		DynMCQquestionTest.nb_ans = int(nb_answers)
 		DynMCQquestionTest.save()
+		invalidate_question(DynMCQTest_Question.MCQ, input_q_num)
 		add_answer = True
 			
 	context = {
@@ -1181,6 +1034,7 @@ def Add_DynMCQanswer_view(request,input_q_num):
 
 @login_required
 @permission_required('tests.can_see_test', raise_exception=True)
+@reporting_view
 def pass_testslist_teacher_view(request):
 	"""Function to display all the pass_test
 	Returns the page with displayed pass_test
@@ -1194,6 +1048,7 @@ def pass_testslist_teacher_view(request):
 
 @login_required
 @permission_required('tests.can_see_test', raise_exception=True)
+@reporting_view
 def tests_list_teacher_view(request):
 	"""Function to display all the test
 	Returns the page with displayed test
@@ -1211,23 +1066,8 @@ def tests_list_student_view(request):
 	"""Function to display the available test to pass
 	Returns the page of available test to pass
 	"""
-	#Get the tests
-	testlist_dynmcqtestinfo_all = DynMCQInfo.objects.all()
-	testlist_dynmcqtestinfo_user = []
-	
-	#We compare the groups of each test with the groups of the user to check if the user can pass the test
-	user_groups = request.user.groups.all()
-	test_groups = ""
-	for test in testlist_dynmcqtestinfo_all:
-		test_groups = test.activated_for
-		test_groups = test_groups.replace("'","")
-		test_groups = test_groups.replace("[","")
-		test_groups = test_groups.replace("]","")
-		test_groups = test_groups.split(',')
-		for test_group in test_groups:
-			for user_group in user_groups:
-				if(str(test_group) == str(user_group)):
-					testlist_dynmcqtestinfo_user.append(test)
+	#Get the launched tests of the groups of the user
+	testlist_dynmcqtestinfo_user = get_available_tests(request.user)
 
 	context = {
 		'testlist_dynmcqtestinfo_user' : testlist_dynmcqtestinfo_user,
@@ -1235,25 +1075,44 @@ def tests_list_student_view(request):
 	return render(request, 'pass_tests/tests_list_student.html', context)
 
 
+@login_required
+@reporting_view
 def tests_history_view(request):
 	"""Function to display the pass test of the user
 	Returns the page of displayed pass test of the users
+	
+	The attempts are displayed from the newest, settings.TESTS_HISTORY_PAGE_SIZE by page.
+	The next pages are selected by the id of the last displayed attempt (?before=<id>) :
+	each page is read from the index on (id_student, id) whatever the number of attempts.
 	"""
-	#Get all pass_test
-	pass_dynMCQtest_all = Pass_DynMCQTest_Info.objects.all()
-	pass_dynMCQtest_user = []
-	for test in pass_dynMCQtest_all:
-		#Get all pass_test of the user
-		if test.id_student == request.user.username:
-			pass_dynMCQtest_user.append(test)
+	page_size = getattr(settings, 'TESTS_HISTORY_PAGE_SIZE', 50)
+	#Get the pass_test of the user with the title of their test
+	pass_dynMCQtest_user = Pass_DynMCQTest_Info.objects.filter(id_student = request.user.username).annotate(
+		title = Subquery(DynMCQInfo.objects.filter(id_test = OuterRef('id_test')).values('title')[:1])
+	).only('id_test', 'id_student', 'attempt', 'mark').order_by('-id')
+	before = request.GET.get('before')
+	if before is not None:
+		try:
+			pass_dynMCQtest_user = pass_dynMCQtest_user.filter(id__lt = int(before))
+		except ValueError:
+			raise Http404
+	#One more attempt is read to know if there is a next page
+	pass_dynMCQtest_user = list(pass_dynMCQtest_user[:page_size + 1])
+	next_before = None
+	if len(pass_dynMCQtest_user) > page_size:
+		pass_dynMCQtest_user = pass_dynMCQtest_user[:page_size]
+		next_before = pass_dynMCQtest_user[-1].id
 	context = {
 		'pass_dynMCQtest_user': pass_dynMCQtest_user,
+		'next_before': next_before,
+		'first_page': before is None,
 	}
 	return render(request, 'pass_tests/tests_history.html', context)
 
 
 @login_required
 @permission_required('tests.can_see_stats', raise_exception=True)
+@reporting_view
 def dashboard_view(request):
 	"""Function to display all available test to get statistics on them
 	Returns the page of displayed available test to get statistics
@@ -1284,40 +1143,15 @@ def launch_specific_dynmcq_view(request, input_id_test):
 	#Get the test
 	DynMCQTestInfo = get_object_or_404(DynMCQInfo, id_test=input_id_test)
 	empty = True
-	#Get the question ids
-	num_questions = get_questions(DynMCQTestInfo.questions)
 	
 	if DynMCQTestInfo.activated_for != "":
 		empty = False
 	
-	mcq_questions = num_questions[0]
-	normal_questions = num_questions[1]
-	
-	DynMCQquestions_List = []
-	Dynquestions_List = []
-	#Get the questions
-	for i in range(len(normal_questions)):
-		DynQuestion = Dynquestion.objects.get(q_num = normal_questions[i])
-		Dynquestions_List.append(DynQuestion)
-	
-	for i in range(len(mcq_questions)):
-		DynMCQQuestion = DynMCQquestion.objects.get(q_num = mcq_questions[i])
-		DynMCQquestions_List.append(DynMCQQuestion)
-		
-	#Get the answers
-	DynMCQanswers = []
-	for i in range(len(mcq_questions)):
-		theDynMCQanswers = DynMCQanswer.objects.filter(q_num = int(mcq_questions[i]))
-		for ans in theDynMCQanswers:
-			DynMCQanswers.append(ans)
+	#Get the questions and the answers
+	DynMCQquestions_List, Dynquestions_List, DynMCQanswers = load_test_questions(DynMCQTestInfo)
 		
 	#We order the questions and the answers in a same list to display it properly
-	Questions_Answers_List = []
-	for question in DynMCQquestions_List:
-		Questions_Answers_List.append(question)
-		DynMCQanswers = DynMCQanswer.objects.filter(q_num = question.q_num)
-		for answer in DynMCQanswers:
-			Questions_Answers_List.append(answer)
+	Questions_Answers_List = get_questions_answers_list(DynMCQquestions_List, DynMCQanswers)
 	
 	#We get all existing groups
 	group_names = []
@@ -1348,7 +1182,10 @@ def launch_specific_dynmcq_view(request, input_id_test):
 		form.fields['activated_for'].choices = choices
 	
 		if form.is_valid():
+			#The clock starts when the launched test is displayed
+			close_test(DynMCQTestInfo)
 			form.save()
+			DynMCQTestInfo.set_activated_groups(form.cleaned_data['activated_for'])
 			empty = False
 			form = DynMCQTestInfoForm_launch()
 			
@@ -1369,49 +1206,26 @@ def in_launch_specific_dynmcq_view(request, input_id_test):
 	#Get the test
 	DynMCQTestInfo = get_object_or_404(DynMCQInfo, id_test=input_id_test)
 	
-	#Saving release time
-	DynMCQTestInfo.release_time = datetime.datetime.today()
-	DynMCQTestInfo.save()
-	
-	num_questions = get_questions(DynMCQTestInfo.questions)
-	
-	time = get_time(DynMCQTestInfo.time)
-	
-	mcq_questions = num_questions[0]
-	normal_questions = num_questions[1]
-	
-	DynMCQquestions_List = []
-	Dynquestions_List = []
-	#Get questions
-	for i in range(len(normal_questions)):
-		DynQuestion = Dynquestion.objects.get(q_num = normal_questions[i])
-		Dynquestions_List.append(DynQuestion)
+	#Saving release time and deadline, the first time the page is displayed after the launch
+	open_test(DynMCQTestInfo)
 	
-	for i in range(len(mcq_questions)):
-		DynMCQQuestion = DynMCQquestion.objects.get(q_num = mcq_questions[i])
-		DynMCQquestions_List.append(DynMCQQuestion)
+	#Everything the students need is cached before their first request (see warmup.py)
+	warmup = warm_test(DynMCQTestInfo)
 	
-	#Get answers
-	DynMCQanswers = []
-	for i in range(len(mcq_questions)):
-		theDynMCQanswers = DynMCQanswer.objects.filter(q_num = int(mcq_questions[i]))
-		for ans in theDynMCQanswers:
-			DynMCQanswers.append(ans)
+	#Get questions and answers
+	DynMCQquestions_List, Dynquestions_List, DynMCQanswers = get_test_questions(DynMCQTestInfo)
 		
 	#We order the questions and the answers in a same list to display it properly
-	Questions_Answers_List = []
-	for question in DynMCQquestions_List:
-		Questions_Answers_List.append(question)
-		DynMCQanswers = DynMCQanswer.objects.filter(q_num = question.q_num)
-		for answer in DynMCQanswers:
-			Questions_Answers_List.append(answer)
+	Questions_Answers_List = get_questions_answers_list(DynMCQquestions_List, DynMCQanswers)
 		
 	context = {
 		'DynMCQquestions_List':DynMCQquestions_List,
 		'DynMCQTestInfo':DynMCQTestInfo,
 		'Questions_Answers_List': Questions_Answers_List,
 		'Dynquestions_List':Dynquestions_List,
-		'time' : time,
+		'remaining' : seconds_remaining(DynMCQTestInfo),
+		'sync_url' : reverse('tests:Exam clock', kwargs={'input_id_test': input_id_test}),
+		'warmup' : warmup,
 	}
 	return render(request, 'manage_tests/in_launch_specific_dynmcq_test.html', context)
 	
@@ -1430,154 +1244,118 @@ def stop_mcq_test(DynMCQTestInfo):
 	"""
 	DynMCQTestInfo.activated_for = ""
 	DynMCQTestInfo.time = ""
+	close_test(DynMCQTestInfo)
 	DynMCQTestInfo.save()
+	DynMCQTestInfo.set_activated_groups([])
 	
-def get_time(time):
-	"""Function to extract min and sec from time
-	Parameter :
-		time (string) : time "min:sec" (5:30)
-	Return :
-		the_time (float) : minute expressed 2,5 => 2 min 30 sec
-	""" 
-	timer = time.split(':')
-	min = timer[0]
-	sec = int(timer[1])/60
-	sec = str(sec)
-	sec = sec[1:]
-	the_time = min + sec
-	return the_time
-	
-def get_date(date):
-	"""Function to get the time
-	Parameter :
-		date (str) : expressed like 2009-01-06 15:08:24.789150
-	Return :
-		(list) : [h,min,sec]
+def exam_clock_view(request, input_id_test):
+	"""Function to get the clock of a test, used by the countdowns to stay on the time of the server
+	Returns a JSON object : {'release_at': ISO date or null, 'deadline_at': ISO date or null, 'remaining': seconds or null}
 	"""
-	time_date = date.split(".")
-	time_date = time_date[0].split(" ")
-	time_date = time_date[1].split(":")
-	return [int(time_date[0]),int(time_date[1]),int(time_date[2])]
+	test_clock = get_test_clock(input_id_test)
+	if test_clock is None:
+		raise Http404
+	response = JsonResponse(clock(test_clock))
+	patch_cache_control(response, no_store=True)
+	return response
 	
-def add_time(date,time):
-	"""Function to add a certain time to another time
-	Parameter :
-		date (list) : [h,min,sec]
-		time (str) : "min:sec"
-	Return :
-		(list) : [h,min,sec]
-	"""
-	timer = time.split(":")
-	if(len(timer)==2):
-		h = int(date[0])
-		min = int(timer[0])+int(date[1])
-		sec = int(timer[1])+int(date[2])
-	if(len(timer)==3):
-		h = int(timer[0])+int(date[0])
-		min = int(timer[1])+int(date[1])
-		sec = int(timer[2])+int(date[2])
-	if(sec >= 60):
-		min += 1
-		sec -= 60
-	if(min >= 60):
-		h += 1
-		min -= 60
-		if h >= 24:
-			h -= 24
-	return [h,min,sec]
-	
-def compare_date(date1,date2):
-	"""Function to extract the difference between two time
-	Parameter :
-		date1, date2 (list) : [h,min,sec]
-	Return :
-		min (float) : delta time expressed in minutes
-	"""
-	h = date2[0] - date1[0]
-	min = date2[1] - date1[1]
-	sec = date2[2] - date1[2]
-	h *= 3600
-	min *= 60
-	time = h + min + sec
-	min = time /60
-	return min
+@login_required
+def attempt_status_view(request, input_id_test, input_id_student, input_attempt):
+	"""Function to get the state of an attempt during the test, polled by the pass page
+	Returns a JSON object : {'open': bool, 'remaining': seconds or null, 'submitted': bool}
 	
+	Only the clock of the test (one query) and the attempt (from the cache most of the time) are read, never the questions.
+	"""
+	#A student can only see his own attempts
+	if request.user.username != input_id_student and not request.user.has_perm('tests.can_see_test'):
+		raise Http404
+	status = attempt_status(input_id_test, input_id_student, input_attempt)
+	if status is None:
+		raise Http404
+	response = JsonResponse(status)
+	#The remaining time is computed again by the page between two requests
+	patch_cache_control(response, private=True, max_age=5)
+	return response
+	
+@reporting_view
 def statistics_view(request, input_id_test):
 	"""Function to get the statistics on a specific test
 	Return the page of the statistics
+	
+	The statistics are read from the aggregates updated at each graded submission (see aggregates.py),
+	no submission is graded again here.
 	"""
 	#Get the info
 	DynMCQTestInfo = get_object_or_404(DynMCQInfo, id_test=input_id_test)
-	PassDynMCQInfo = Pass_DynMCQTest_Info.objects.filter(id_test = input_id_test)
-	num_questions = get_questions(DynMCQTestInfo.questions)
-	nb_questions = len(num_questions[0]) + len(num_questions[1])
-	
-	PassDynMCQInfo_List = []
-	for instance in PassDynMCQInfo:
-		PassDynMCQInfo_List.append(instance)
-	marks_list = []
+	stats, stats_question = get_statistics(DynMCQTestInfo)
+	nb_questions = len(stats_question)
+	marks_stats = MarkStatistics.from_histogram(stats.get_histogram())
+	nb_test = marks_stats.count
 	
-	statistiques_notes = []
-	i = 0
-	while i <= int(nb_questions):
-		statistiques_notes.append(0)
-		i += 1
+	moyenne_mcqtest = None
+	total_freq = []
+	total_statistics_question = []
+	if nb_test > 0:
+		#Computing average mark
+		moyenne_mcqtest = "%.2f" % marks_stats.mean
 		
-	for instance in PassDynMCQInfo_List:
-		statistiques_notes[instance.mark] += 1
-		marks_list.append(instance.mark)
-	
-	#Computing min / max marks
-	note_plus_basse = Note_plus_basse(marks_list)
-	note_plus_haute = Note_plus_haute(marks_list)
-
-	#Computing average mark
-	moyenne_mcqtest = Moyenne(marks_list)
-	nb_test = len(PassDynMCQInfo_List)
-	
-	#Computing Q1 and Q3
-	q1 = Q1(marks_list)
-	q3 = Q3(marks_list)
-
-    #Computing median
-	m = Mediane(marks_list)
+		#Computing frequences
+		total_freq = marks_stats.frequences(nb_questions)
 		
-	#Computing frequences
-	total_freq = Frequences(statistiques_notes,PassDynMCQInfo_List)
-	
-	#Computing questions statistics
-	stats_question = Statistique_question(DynMCQTestInfo)
-	
-	#Questions statistics percentages
-	pourcentage_question = Pourcentage_stats_question(stats_question,PassDynMCQInfo_List)
+		#Questions statistics percentages
+		pourcentage_question = Pourcentage_stats_question(stats_question,nb_test)
 		
-	total_statistics_question = []
-	i = 0
-	while i < len(stats_question):
-		total_statistics_question.append((stats_question[i],pourcentage_question[i]))
-		i += 1
-	
-	#Creating graphs
-	GraphsQuestions(stats_question,int(nb_questions))
-	GraphsNote(total_freq,int(nb_questions))
-	GraphsBoxplot(marks_list)
+		i = 0
+		while i < len(stats_question):
+			total_statistics_question.append((stats_question[i],pourcentage_question[i]))
+			i += 1
 
 	context = {
 		'DynMCQTestInfo':DynMCQTestInfo,
-		'PassDynMCQInfo_List': PassDynMCQInfo_List,
 		'moyenne_mcqtest' : moyenne_mcqtest,
 		'nb_test' : nb_test,
-		'note_plus_haute' : note_plus_haute,
-		'note_plus_basse' : note_plus_basse,
-		'q1' : q1,
-		'q3' : q3,
-		'mediane' : m,
+		'note_plus_haute' : marks_stats.max,
+		'note_plus_basse' : marks_stats.min,
+		'q1' : marks_stats.q1,
+		'q3' : marks_stats.q3,
+		'mediane' : marks_stats.median,
 		'total_statistics_question' : total_statistics_question,
 		'total_freq' : total_freq,
 		'nb_questions':nb_questions,
 	}
 	return render(request, 'manage_tests/statistics.html', context)
 	
+@condition(etag_func=lambda request, input_id_test, chart: chart_etag(input_id_test, chart), last_modified_func=lambda request, input_id_test, chart: chart_last_modified(input_id_test))
+def statistics_chart_view(request, input_id_test, chart):
+	"""Function to get a chart of the statistics on a specific test
+	Returns the PNG image, rendered again only when the statistics change (see charts.py)
+	"""
+	if chart not in CHART_NAMES:
+		raise Http404
+	DynMCQTestInfo = get_object_or_404(DynMCQInfo, id_test=input_id_test)
+	png, stats = get_chart(DynMCQTestInfo, chart)
+	if png is None:
+		raise Http404
+	response = HttpResponse(png, content_type='image/png')
+	#The statistics may have been built by get_chart, after the conditional headers were computed
+	response['ETag'] = quote_etag(get_etag(stats, chart))
+	response['Last-Modified'] = http_date(stats.updated.timestamp())
+	#The browser asks again each time, and gets a 304 response while the statistics do not change
+	patch_cache_control(response, private=True, no_cache=True)
+	return response
+	
+@login_required
+@permission_required('tests.can_see_stats', raise_exception=True)
+def results_export_view(request, input_id_test):
+	"""Function to export the results of a specific test
+	Returns a CSV file with a row for each attempt and the correctness of each question,
+	streamed while the attempts are read (see exports.py)
+	"""
+	DynMCQTestInfo = get_object_or_404(DynMCQInfo, id_test=input_id_test)
+	response = StreamingHttpResponse(stream_csv(results_rows(DynMCQTestInfo)), content_type='text/csv')
+	response['Content-Disposition'] = 'attachment; filename="results_%s.csv"' % DynMCQTestInfo.id_test
+	return response
+	
 def Moyenne(marks_list):
 	"""Function to compute the average of the mark list
 	Parameter :
@@ -1625,7 +1403,7 @@ def Q1(marks_list):
 	Return :
 		q1 (float) : first quarter
 	"""
-	marks_list.sort()
+	marks_list = sorted(marks_list)
 	if len(marks_list)%4 == 0:
 		q1=marks_list[len(marks_list)//4-1]
 	else:
@@ -1639,7 +1417,7 @@ def Q3(marks_list):
 	Return :
 		q3 (float) : third quarter
 	"""
-	marks_list.sort()
+	marks_list = sorted(marks_list)
 	if len(marks_list)%4 == 0:
 		q3=marks_list[3*len(marks_list)//4-1]
 	else:
@@ -1653,7 +1431,7 @@ def Mediane(marks_list):
 	Return :
 		m (int) : median
 	"""
-	marks_list.sort()
+	marks_list = sorted(marks_list)
 	if len(marks_list)%2 == 0:
 		m=((marks_list[(len(marks_list)-1)//2]+marks_list[len(marks_list)//2])/2)
 	else:
@@ -1684,124 +1462,45 @@ def Statistique_question(DynMCQTestInfo):
 	Return :
 		stats_question (list) : list of occurences of good answers for each questions
 	"""
-	#Get questions
-	num_questions = get_questions(DynMCQTestInfo.questions)
-	stats_question = []
-	mcq_question = num_questions[0]
-	normal_questions = num_questions[1]
-	i = 0
-	while i < int(len(mcq_question) + len(normal_questions)):
-		stats_question.append(0)
-		i += 1
+	#Get the questions and the answer key of the test
+	mcq_questions, normal_questions = DynMCQTestInfo.get_question_ids()
+	answer_key = get_answer_key(DynMCQTestInfo)
+	stats_question = [0] * (len(mcq_questions) + len(normal_questions))
+	#Position of each question in the statistics
+	mcq_index = {}
+	for i, q_num in enumerate(mcq_questions):
+		mcq_index[q_num] = i
+	normal_index = {}
+	for i, q_num in enumerate(normal_questions):
+		normal_index[q_num] = i + len(mcq_questions)
 		
 	#Get pass tests
-	passdynmcqtest = Pass_DynMCQTest.objects.filter(id_test = DynMCQTestInfo.id_test)
-	passdynquestiontest = Pass_DynquestionTest.objects.filter(id_test = DynMCQTestInfo.id_test)
-	passdynmcqtest_List = []
-	passdynquestiontest_List = []
-	for instance in passdynmcqtest:
-		passdynmcqtest_List.append(instance)
-	for instance in passdynquestiontest:
-		passdynquestiontest_List.append(instance)
+	passdynmcqtest = Pass_DynMCQTest.objects.filter(id_test = DynMCQTestInfo.id_test).values_list('q_num', 'r_ans')
+	passdynquestiontest = Pass_DynquestionTest.objects.filter(id_test = DynMCQTestInfo.id_test).values_list('q_num', 'r_answer')
 	
 	#For DynMCQanswer
-	for passdynmcq in passdynmcqtest_List:
-		tmp_dynmcqtest = DynMCQanswer.objects.filter(q_num = passdynmcq.q_num, right_ans = 1)
-		num_right_answers = []
-		for ans in tmp_dynmcqtest:
-			num_right_answers.append(ans.ans_num)
+	for q_num, r_ans in passdynmcqtest:
 		#If good answer, incrementing stats_question of the question
-		if check_answer(passdynmcq.r_ans,num_right_answers):
-			index = 0
-			for i in range(len(mcq_question)):
-				if(passdynmcq.q_num == mcq_question[i]):
-					index = i
-			stats_question[index] += 1
+		if int(q_num) in mcq_index and answer_key.check_mcq(q_num, r_ans):
+			stats_question[mcq_index[int(q_num)]] += 1
 	#For Dynquestion
-	for passdynquestion in passdynquestiontest_List:
-		dynquestion = Dynquestion.objects.get(q_num = passdynquestion.q_num)
-		right_answer = dynquestion.r_text
-		student_answer = passdynquestion.r_answer
+	for q_num, r_answer in passdynquestiontest:
 		#If good answer, incrementing stats_question of the question
-		if right_answer.lower() == student_answer.lower():
-			index = 0
-			for i in range(len(normal_questions)):
-				if(passdynquestion.q_num == normal_questions[i]):
-					index = i + len(mcq_question)
-			stats_question[index] += 1
+		if int(q_num) in normal_index and answer_key.check_normal(q_num, r_answer):
+			stats_question[normal_index[int(q_num)]] += 1
 	return stats_question
 	
-def Pourcentage_stats_question(stats_question,PassDynMCQInfo_List):
+def Pourcentage_stats_question(stats_question,nb_attempts):
 	"""Function to compute the percentages statistics for each questions of the test
 	Parameter :
 		stats_question (list) : list of occurences of good answers for each questions
-		PassDynMCQInfo_List (list) : list of pass test instance
+		nb_attempts (int) : number of graded attempts (Test_Statistics.count)
 	Return :
-		pourcentage_question (list) : percentage of good answers for each questions
+		pourcentage_question (list) : percentage of good answers for each questions, 0 when no attempt is graded
 	"""
 	pourcentage_question = []
 	for stat in stats_question:
-		pourcentage = 100*stat/len(PassDynMCQInfo_List)
+		pourcentage = 100*stat/nb_attempts if nb_attempts else 0
 		pourcentage = "%.2f" % pourcentage
 		pourcentage_question.append(pourcentage)
 	return pourcentage_question
-	
-def GraphsQuestions(stats_question, nb_q):
-	"""Function to create a graph to display statistics on questions
-	Parameter :
-		stats_question (list) : list of occurences of good answers for each questions
-		nb_q (int) : number of questionss
-	"""
-	plt.rcdefaults()
-	fig, ax = plt.subplots()
-
-	questions = []
-	i = 1
-	while i <= nb_q:
-		questions.append("q"+str(i))
-		i += 1
-	y_pos = np.arange(len(stats_question))
-	performance = stats_question
-
-	ax.barh(y_pos, performance, align='center')
-	ax.set_yticks(y_pos)
-	ax.set_yticklabels(questions)
-	ax.invert_yaxis()
-	ax.set_xlabel('Bonnes réponses')
-	ax.set_title('Stats Questions')
-	plt.savefig('./pages/static/images/GraphsQuestions.png')
-	
-def GraphsNote(total_freq,nb_q):
-	"""Function to create a graph to display statistics on marks
-	Parameter :
-		total_freq (list) : list of frequences of the test
-		nb_q (int) : number of questionss
-	"""
-	labels = []
-	i = 0
-	while i <= nb_q:
-		labels.append(str(i)+"/"+str(nb_q))
-		i += 1
-	sizes = []
-	for q in total_freq:
-		sizes.append(q[0])
-	fig, ax = plt.subplots()
-	ax.pie(sizes, labels=labels, autopct='%1.1f%%',shadow=True, startangle=90)
-	ax.axis('equal')
-	ax.set_title('Statistiques des notes')
-	plt.savefig('./pages/static/images/GraphsNote.png')
-	
-def GraphsBoxplot(marks_list):
-	"""Function to create a boxplot to display statistics on marks
-	Parameter :
-		marks_list (list) : list of the pass test marks
-	"""
-	data = marks_list
-	fig, ax = plt.subplots()
-	ax.boxplot(data,vert=False,)
-	ax.set_title('Boxplot du test')
-	plt.savefig('./pages/static/images/GraphsBoxplot.png')
-	
-
-
-
@@ -0,0 +1,53 @@
+import pickle
+import time
+
+from .assembly import get_test_questions
+from .answer_keys import get_answer_key
+from .availability import get_available_tests_for_groups,student_group_sets
+from .pass_page import get_questions_fragment
+
+
+class WarmupReport(object):
+	"""Result of the warm-up of a launched test :
+
+	Attributes :
+
+	items (list) : (name, seconds, bytes) for each warmed cache entry, bytes is the size of the pickled value
+	"""
+	def __init__(self):
+		self.items = []
+
+	def add(self, name, function, *args):
+		"""Calls function(*args), records its time and the size of its result, returns the result"""
+		start = time.perf_counter()
+		value = function(*args)
+		elapsed = time.perf_counter() - start
+		self.items.append((name, elapsed, len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))))
+		return value
+
+	def total_time(self):
+		return sum(seconds for name, seconds, size in self.items)
+
+	def total_size(self):
+		return sum(size for name, seconds, size in self.items)
+
+def warm_test(DynMCQTestInfo):
+	"""Function to build everything the students of a launched test need before their first request :
+	The questions of the test, its answer key, the rendered questions of the pass page
+	and the list of the available tests of each set of groups of the students.
+	The entries already cached are only read.
+	The entries are built in the shared Django cache, read by every process of the server (see CACHES in the settings) :
+	the caches local to a process (LRUCache) are only filled in the process of the teacher, the other processes fill theirs from the shared cache.
+	Parameter :
+		DynMCQTestInfo (DynMCQInfo instance) : the launched test
+	Return :
+		report (WarmupReport) : time and size of each entry
+	"""
+	report = WarmupReport()
+	report.add("questions", get_test_questions, DynMCQTestInfo)
+	report.add("answer key", get_answer_key, DynMCQTestInfo)
+	report.add("pass page", get_questions_fragment, DynMCQTestInfo)
+	group_sets = report.add("groups of the students", student_group_sets, DynMCQTestInfo)
+	for group_ids in sorted(group_sets):
+		report.add("available tests (groups %s)" % ",".join(str(group_id) for group_id in group_ids), get_available_tests_for_groups, group_ids)
+	return report